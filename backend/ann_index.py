@@ -0,0 +1,248 @@
+# Approximate nearest-neighbour index (IVF-PQ) over the EN/KO Numberbatch matrix.
+#
+# Rows are L2-normalised, so cosine similarity is an inner product. A coarse
+# k-means quantizer splits the vocabulary into `nlist` inverted lists; inside a
+# list each row is stored as the product-quantized residual to its centroid
+# (`m` one-byte codes). A query scores only the `nprobe` closest lists with a
+# (m, 256) lookup table and re-ranks the best candidates exactly against the
+# full-precision matrix. Everything is plain NumPy and saved as .npy files next
+# to the embedding store, so the index can be memory-mapped like the matrix.
+
+import os
+
+import numpy as np
+
+PQ_CENTROIDS = 256  # one byte per sub-quantizer code
+
+
+def index_paths(prefix):
+    """Returns the file paths that make up an ANN index."""
+    return {
+        "centroids": f"{prefix}_centroids.npy",
+        "codebooks": f"{prefix}_codebooks.npy",
+        "codes": f"{prefix}_codes.npy",
+        "row_ids": f"{prefix}_row_ids.npy",
+        "list_offsets": f"{prefix}_list_offsets.npy",
+        "row_langs": f"{prefix}_row_langs.npy",
+        "languages": f"{prefix}_languages.npy",
+    }
+
+
+def index_exists(prefix):
+    """True if every file of the index is present on disk."""
+    return all(os.path.exists(path) for path in index_paths(prefix).values())
+
+
+def _assign(x, centroids, chunk_rows=16384):
+    """Index of the nearest centroid (squared L2) for every row of x, in chunks."""
+    centroid_sq = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(len(x), dtype=np.int32)
+    for start in range(0, len(x), chunk_rows):
+        block = x[start : start + chunk_rows]
+        # ||x||^2 is constant per row, so it doesn't change the argmin.
+        distances = centroid_sq[None, :] - 2.0 * (block @ centroids.T)
+        labels[start : start + len(block)] = np.argmin(distances, axis=1)
+    return labels
+
+
+def kmeans(x, k, n_iter=10, seed=0):
+    """Plain Lloyd k-means in NumPy. Empty clusters are re-seeded from random rows."""
+    rng = np.random.default_rng(seed)
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = _assign(x, centroids)
+        counts = np.bincount(labels, minlength=k)
+        nonempty = counts > 0
+        # Per-cluster sums via one sort + reduceat (np.add.at is very slow).
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+        sums = np.add.reduceat(x[order], starts, axis=0)
+        centroids[nonempty] = sums / counts[nonempty, None]
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), size=len(empty), replace=False)]
+    return centroids
+
+
+def _normalized_chunks(matrix, inverse_norms, chunk_rows):
+    """Yields (start, float32 L2-normalised block) over the rows of `matrix`."""
+    for start in range(0, matrix.shape[0], chunk_rows):
+        block = np.asarray(matrix[start : start + chunk_rows], dtype=np.float32)
+        yield start, block * inverse_norms[start : start + len(block), None]
+
+
+def build_index(
+    matrix,
+    inverse_norms,
+    row_langs,
+    languages,
+    nlist=None,
+    m=30,
+    train_size=100000,
+    n_iter=10,
+    chunk_rows=65536,
+    seed=0,
+):
+    """
+    Builds an IVF-PQ index over `matrix` (N, dim). `inverse_norms` holds the
+    per-row factor that L2-normalises a stored row (1 / ||row||, times the
+    dequantisation scale for int8 matrices); `row_langs` is the index into
+    `languages` per row.
+    Returns the index arrays as a dict (see save_index).
+    """
+    num_rows, dim = matrix.shape
+    if dim % m != 0:
+        raise ValueError(f"Dimension {dim} is not divisible by m={m}.")
+    nlist = nlist or max(1, int(np.sqrt(num_rows)))
+    dsub = dim // m
+    inverse_norms = np.asarray(inverse_norms, dtype=np.float32)
+
+    rng = np.random.default_rng(seed)
+    sample_ids = np.sort(
+        rng.choice(num_rows, size=min(train_size, num_rows), replace=False)
+    )
+    sample = (
+        np.asarray(matrix[sample_ids], dtype=np.float32)
+        * inverse_norms[sample_ids, None]
+    )
+
+    centroids = kmeans(sample, nlist, n_iter=n_iter, seed=seed)
+    nlist = len(centroids)
+    residuals = (sample - centroids[_assign(sample, centroids)]).reshape(
+        len(sample), m, dsub
+    )
+    codebooks = np.stack(
+        [
+            kmeans(residuals[:, j], PQ_CENTROIDS, n_iter=n_iter, seed=seed + 1 + j)
+            for j in range(m)
+        ]
+    )
+    if codebooks.shape[1] < PQ_CENTROIDS:  # tiny vocabularies
+        pad = PQ_CENTROIDS - codebooks.shape[1]
+        codebooks = np.concatenate(
+            [codebooks, np.repeat(codebooks[:, :1], pad, axis=1)], axis=1
+        )
+
+    labels = np.empty(num_rows, dtype=np.int32)
+    codes = np.empty((num_rows, m), dtype=np.uint8)
+    for start, block in _normalized_chunks(matrix, inverse_norms, chunk_rows):
+        block_labels = _assign(block, centroids)
+        labels[start : start + len(block)] = block_labels
+        block_residuals = (block - centroids[block_labels]).reshape(len(block), m, dsub)
+        for j in range(m):
+            codes[start : start + len(block), j] = _assign(
+                block_residuals[:, j], codebooks[j]
+            )
+
+    row_ids = np.argsort(labels, kind="stable").astype(np.int32)
+    list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(np.bincount(labels, minlength=nlist), out=list_offsets[1:])
+    return {
+        "centroids": centroids,
+        "codebooks": codebooks.astype(np.float32),
+        "codes": codes[row_ids],
+        "row_ids": row_ids,
+        "list_offsets": list_offsets,
+        "row_langs": np.asarray(row_langs, dtype=np.uint8)[row_ids],
+        "languages": np.asarray(languages, dtype=str),
+    }
+
+
+def save_index(prefix, arrays):
+    """Writes the arrays returned by build_index as .npy files."""
+    for name, path in index_paths(prefix).items():
+        np.save(path, arrays[name])
+
+
+class IVFPQIndex:
+    """Loaded IVF-PQ index. Codes and row ids are memory-mapped."""
+
+    def __init__(self, prefix):
+        paths = index_paths(prefix)
+        self.centroids = np.load(paths["centroids"])
+        self.codebooks = np.load(paths["codebooks"])
+        self.codes = np.load(paths["codes"], mmap_mode="r")
+        self.row_ids = np.load(paths["row_ids"], mmap_mode="r")
+        self.list_offsets = np.load(paths["list_offsets"])
+        self.row_langs = np.load(paths["row_langs"], mmap_mode="r")
+        self.languages = [str(lang) for lang in np.load(paths["languages"])]
+        self.m = self.codebooks.shape[0]
+        self.dsub = self.codebooks.shape[2]
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    def _candidates(self, query, nprobe):
+        """Approximate scores and positions (in list order) for the probed lists."""
+        centroid_scores = self.centroids @ query
+        nprobe = min(nprobe, self.nlist)
+        probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        starts = self.list_offsets[probed]
+        ends = self.list_offsets[probed + 1]
+        sizes = ends - starts
+        if sizes.sum() == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        positions = np.concatenate(
+            [np.arange(s, e) for s, e in zip(starts, ends) if e > s]
+        )
+        list_scores = np.repeat(centroid_scores[probed], sizes)
+
+        # <q, c + r> = <q, c> + sum_j <q_j, codebook_j[code_j]>
+        lut = np.einsum("jcd,jd->jc", self.codebooks, query.reshape(self.m, self.dsub))
+        codes = self.codes[positions]
+        scores = list_scores + lut[np.arange(self.m), codes].sum(axis=1)
+        return scores.astype(np.float32), positions
+
+    def search(
+        self,
+        query,
+        k=10,
+        nprobe=16,
+        languages=None,
+        exclude_rows=(),
+        row_mask=None,
+        rerank_fn=None,
+        rerank_factor=10,
+    ):
+        """
+        Returns (row_ids, scores) of the k best rows for an L2-normalised query.
+        `languages` restricts results to those language codes. `row_mask`, a
+        boolean array over vocabulary rows, drops the rows where it is False
+        (e.g. zero vectors, which the exact scan skips too). `rerank_fn(rows)`,
+        if given, returns exact scores used to re-rank the k * rerank_factor best
+        approximate candidates.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        scores, positions = self._candidates(query, nprobe)
+        keep = np.ones(len(positions), dtype=bool)
+        if languages is not None:
+            lang_ids = [
+                self.languages.index(l) for l in languages if l in self.languages
+            ]
+            keep &= np.isin(self.row_langs[positions], lang_ids)
+        rows = np.asarray(self.row_ids[positions], dtype=np.int64)
+        if len(exclude_rows):
+            keep &= ~np.isin(rows, exclude_rows)
+        if row_mask is not None:
+            keep &= row_mask[rows]
+        scores, rows = scores[keep], rows[keep]
+
+        if rerank_fn is not None and len(rows):
+            shortlist = min(len(rows), k * rerank_factor)
+            top = np.argpartition(-scores, shortlist - 1)[:shortlist]
+            rows = rows[top]
+            scores = np.asarray(rerank_fn(rows), dtype=np.float32)
+
+        k = min(k, len(rows))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
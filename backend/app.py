@@ -1,9 +1,42 @@
-from flask import Flask, request, jsonify
+import logging
+import time
+
+from flask import Flask, request, jsonify, g, Response
+import instrumentation
+import language_routing
+import model_lifecycle
+import shape_metrics
 import utils  # utils.py 모듈을 import 합니다.
 import numpy as np
-import torch
 from flasgger import Swagger  # Swagger 추가
 
+logger = instrumentation.get_logger("app")
+
+# --- Request metrics (rendered at /metrics) ---
+HTTP_REQUESTS = instrumentation.counter(
+    "http_requests_total",
+    "HTTP requests by endpoint and status.",
+    ("endpoint", "status"),
+)
+HTTP_REQUEST_SECONDS = instrumentation.histogram(
+    "http_request_seconds", "HTTP request latency by endpoint.", ("endpoint",)
+)
+JSON_SERIALIZATION_SECONDS = instrumentation.histogram(
+    "json_serialization_seconds",
+    "Time to serialise response bodies to JSON.",
+    ("endpoint",),
+)
+ROUTED_WORDS = instrumentation.counter(
+    "routed_words_total",
+    "Request words by detected language (or too_short / unsupported).",
+    ("lang",),
+)
+COORDINATE_RESULTS = instrumentation.counter(
+    "coordinate_results_total",
+    "Words answered by /word-to-coordinates, by result (found, oov, failed).",
+    ("result",),
+)
+
 # from langdetect import DetectorFactory # Optional: For reproducible results
 # DetectorFactory.seed = 0 # Optional: Seed for reproducibility
 
@@ -12,23 +45,208 @@ from flasgger import Swagger  # Swagger 추가
 def is_korean(text):
     """
     입력 텍스트가 한글을 포함하는지 확인하는 함수
-    한글 유니코드 범위: AC00-D7A3 (가-힣)
+    한글 유니코드 범위: AC00-D7A3 (가-힣) 및 자모 (language_routing 참고)
     """
-    for char in text:
-        if "\uac00" <= char <= "\ud7a3":
-            return True
-    return False
+    return language_routing.classify_scripts([text])[0] == language_routing.HANGUL
 
 
 def detect_language(text):
     """
     텍스트의 언어를 판단하는 함수
-    한글이 포함되어 있으면 'ko', 그렇지 않으면 'en'으로 판단
+    문자 체계(script)별 후보 언어 중 어휘에 있는 첫 언어, 없으면 첫 후보.
+    지원하지 않는 문자 체계이면 None.
     """
-    if is_korean(text):
-        return "ko"
-    else:
-        return "en"
+    candidates = language_routing.candidate_languages(
+        [text], utils.SCRIPT_LANGUAGES, utils.SUPPORTED_LANGUAGES
+    )
+    return utils.choose_word_languages([text], candidates)[0]
+
+
+def _route_words(words):
+    """
+    Returns the detected language for each word, or None for words that are too
+    short or whose language isn't supported. The script of every word is
+    classified in one batch (language_routing); words whose script has several
+    supported languages get the first one that has the word in its vocabulary.
+    """
+    langs = [None] * len(words)
+    routed = {}  # lang / too_short / unsupported -> count, added to ROUTED_WORDS once
+    positions = []
+    for i, word in enumerate(words):
+        # langdetect 부분을 제거하고 새로운 언어 감지 함수 사용
+        if len(word.strip()) <= 1:
+            logger.debug(
+                "Word '%s' is too short for language detection. Skipping.", word
+            )
+            routed["too_short"] = routed.get("too_short", 0) + 1
+        else:
+            positions.append(i)
+
+    # 문자 체계 테이블로 한 번에 언어 후보를 판단
+    batch = [words[i] for i in positions]
+    candidates = language_routing.candidate_languages(
+        batch, utils.SCRIPT_LANGUAGES, utils.SUPPORTED_LANGUAGES
+    )
+    for i, word, detected_lang in zip(
+        positions, batch, utils.choose_word_languages(batch, candidates)
+    ):
+        if detected_lang is None:
+            logger.debug(
+                "Word: '%s' (Language not supported or detection failed). Skipping.",
+                word,
+            )
+            routed["unsupported"] = routed.get("unsupported", 0) + 1
+        else:
+            routed[detected_lang] = routed.get(detected_lang, 0) + 1
+            langs[i] = detected_lang
+    for key, count in routed.items():
+        ROUTED_WORDS.inc(key, amount=count)
+    return langs
+
+
+def validate_words_payload(data):
+    """
+    Checks a decoded {"words": [...]} JSON body shared by the word endpoints.
+    Returns an error message, or None if the payload is valid.
+    """
+    if (
+        not isinstance(data, dict)
+        or "words" not in data
+        or not isinstance(data["words"], list)
+    ):
+        return "Invalid input. 'words' array (list of strings) is required."
+    # Ensure all items in words list are strings
+    for word_item in data["words"]:
+        if not isinstance(word_item, str):
+            return "All items in 'words' array must be strings."
+    if not isinstance(data.get("details", False), bool):
+        return "'details' must be a boolean."
+    return None
+
+
+def _parse_words_request():
+    """
+    Reads the {"words": [...]} JSON body shared by the word endpoints.
+    Returns (words, None) or (None, error_response).
+    """
+    try:
+        data = request.get_json()
+        error = validate_words_payload(data)
+        if error is not None:
+            return None, (jsonify({"error": error}), 400)
+    except Exception as e:
+        return None, (jsonify({"error": f"Failed to parse JSON input: {str(e)}"}), 400)
+    return data["words"], None
+
+
+def split_coordinate_batch(input_words):
+    """
+    Language detection and short-word filtering stay per word; the lookup and
+    PCA projection run once for the whole batch.
+    Returns (coordinates with None for skipped words, batch_words, batch_langs).
+    """
+    coordinates = {}
+    batch_words = []
+    batch_langs = []
+    for word, detected_lang in zip(input_words, _route_words(input_words)):
+        if detected_lang is None:
+            coordinates[word] = None
+        else:
+            batch_words.append(word)
+            batch_langs.append(detected_lang)
+    return coordinates, batch_words, batch_langs
+
+
+def fill_coordinate_batch(coordinates, batch_words, batch_langs, batch_coords):
+    """
+    Adds the result of utils.get_words_coordinates_pytorch (None if the
+    projection failed) for batch_words to coordinates.
+    """
+    projection_failed = batch_coords is None
+    if projection_failed:
+        instrumentation.log_every_n(
+            logger,
+            logging.ERROR,
+            "projection_failed",
+            utils.REQUEST_LOG_SAMPLE_EVERY,
+            "PCA transformation failed for words: %s",
+            batch_words,
+        )
+        COORDINATE_RESULTS.inc("failed", amount=len(batch_words))
+        batch_coords = [None] * len(batch_words)
+
+    oov = 0
+    for word, detected_lang, coord in zip(batch_words, batch_langs, batch_coords):
+        if coord is None and not projection_failed:
+            logger.debug(
+                "Word '%s' (detected lang: %s) resulted in a zero vector (OOV in filtered Numberbatch).",
+                word,
+                detected_lang,
+            )
+            oov += 1
+        coordinates[word] = coord
+    if not projection_failed:
+        COORDINATE_RESULTS.inc("oov", amount=oov)
+        COORDINATE_RESULTS.inc("found", amount=len(batch_words) - oov)
+    return coordinates
+
+
+_SKIPPED = {"method": "skipped", "keys": []}
+
+
+def coordinate_response(coordinates, batch_words, batch_resolutions, details):
+    """
+    The /word-to-coordinates body: the flat {word: [x, y] | null} mapping, or
+    with details {"coordinates": ..., "resolutions": {word: resolution}} where
+    resolution says how an OOV word was matched (see
+    utils.resolve_oov_word_pytorch) and is "skipped" for unrouted words.
+    OOV fallbacks (normalized, fuzzy, average) are only returned with their
+    resolution; without details those words are null, as before fallbacks.
+    """
+    if not details:
+        if batch_resolutions is not None:
+            for word, resolution in zip(batch_words, batch_resolutions):
+                if resolution["method"] != "exact":
+                    coordinates[word] = None
+        return coordinates
+    resolutions = dict.fromkeys(coordinates, _SKIPPED)
+    if batch_resolutions is not None:
+        resolutions.update(zip(batch_words, batch_resolutions))
+    return {"coordinates": coordinates, "resolutions": resolutions}
+
+
+def word_resolutions(langs, resolutions):
+    """
+    The resolution of every word of a routed batch (see _route_words), with
+    "skipped" for the words that were not routed.
+    """
+    return [
+        _SKIPPED if lang is None else resolution
+        for lang, resolution in zip(langs, resolutions)
+    ]
+
+
+def drop_fallbacks(resolutions, coordinates=None, similarity=None):
+    """
+    Without details, words matched by an OOV fallback count as not found, as
+    in coordinate_response: their entries in `coordinates` (a list) become
+    None and their rows and columns of `similarity` NaN, in place.
+    """
+    fallbacks = [
+        i for i, resolution in enumerate(resolutions) if resolution["method"] != "exact"
+    ]
+    if coordinates is not None:
+        for i in fallbacks:
+            coordinates[i] = None
+    if similarity is not None and fallbacks:
+        similarity[fallbacks, :] = np.nan
+        similarity[:, fallbacks] = np.nan
+
+
+def timed_jsonify(payload):
+    """jsonify, timed into JSON_SERIALIZATION_SECONDS for the current endpoint."""
+    with JSON_SERIALIZATION_SECONDS.time(request.endpoint):
+        return jsonify(payload)
 
 
 app = Flask(__name__)
@@ -44,34 +262,162 @@ app.config["SWAGGER"] = {
 }
 swagger = Swagger(app)  # Initialize Flasgger
 
-with app.app_context():
-    print(f"Using PyTorch device: {utils.device}")  # utils.device를 직접 사용
-    print("Loading PyTorch-based EN/KO models on startup...")
+# Models are loaded in a separate stage, not at import time: importing this
+# module only pulls in Flask and the lightweight utils, so a worker boots in
+# seconds. load_models() runs on the lifecycle's single background loader
+# (model_lifecycle.py), started by the first request or explicitly (e.g. from
+# __main__ or a server hook). Handlers never load anything themselves: they
+# answer 503 until what they need is mapped.
+lifecycle = model_lifecycle.ModelLifecycle(lambda: load_models())
+instrumentation.callback_metric(
+    "models_ready",
+    "1 once load_models() has finished.",
+    lambda: lifecycle.finished,
+)
+instrumentation.callback_metric(
+    "model_state",
+    "1 for the current state of the model lifecycle (idle, loading, ready, degraded).",
+    lambda: [
+        ({"state": state}, int(state == lifecycle.state))
+        for state in model_lifecycle.STATES
+    ],
+)
 
-    # 1. Load PyTorch Numberbatch embeddings
-    # This can take a very long time on first run if data needs to be downloaded and processed.
-    load_success = utils.load_numberbatch_pytorch()
-    if not load_success or utils.embeddings_tensor is None:
-        print(
-            "CRITICAL: PyTorch EN/KO Numberbatch model could not be loaded. API will likely fail."
-        )
+# Required capabilities: the lifecycle is degraded while one of them is missing.
+CAPABILITIES = {
+    "coordinates": (utils.can_serve_coordinates, "EN/KO coordinate table or PCA model"),
+    "embeddings": (utils.can_serve_embeddings, "Word embedding model (EN/KO)"),
+}
+
+
+def missing_capabilities():
+    """The required capabilities that are not loaded."""
+    return [name for name, (available, _) in CAPABILITIES.items() if not available()]
+
+
+def _map_artifacts():
+    """Maps the prepared artifacts into utils. Nothing is downloaded or trained here."""
+    # 0. Fast path: the vocabulary plus the precomputed 2D coordinate table are
+    # enough to serve /word-to-coordinates, without the 300-d matrix or PCA.
+    if (
+        utils.load_numberbatch_vocabulary_pytorch()
+        and utils.load_coordinate_table_pytorch()
+    ):
+        logger.info("Serving EN/KO coordinates from the precomputed table.")
+
+    # 1. PyTorch Numberbatch embeddings (memory-mapped), for the similarity,
+    # /shape and /nearest endpoints. Coordinates are served while this maps.
+    if utils.load_numberbatch_pytorch():
+        logger.info(f"PyTorch EN/KO Numberbatch model loaded ({utils.get_device()}).")
     else:
-        print("PyTorch EN/KO Numberbatch model loaded.")
-
-    # 2. Load PCA model (trained on PyTorch embeddings)
-    # This will also trigger PCA model training if it doesn't exist,
-    # which in turn relies on the Numberbatch embeddings being loaded.
-    pca_load_success = (
-        utils.get_pca_model_pytorch()
-    )  # Function returns the model or None
-    if pca_load_success is None or utils.pca_model_pt is None:
-        print(
-            "CRITICAL: PCA model (EN/KO) could not be loaded or trained. API will likely fail."
-        )
+        logger.critical("PyTorch EN/KO Numberbatch model could not be loaded.")
+
+    # 2. PCA model, to project words the table doesn't cover (or without a table)
+    if utils.get_pca_model_pytorch() is None:
+        if utils.coordinates_table is None:
+            logger.critical("PCA model (EN/KO) could not be loaded.")
+        else:
+            logger.warning("PCA model (EN/KO) could not be loaded.")
     else:
-        print("PCA model (EN/KO) loaded or trained.")
+        logger.info("PCA model (EN/KO) loaded.")
+    if utils.coordinates_table is None and utils.pca_model_pt is not None:
+        logger.warning(
+            "EN/KO coordinate table not available. Coordinates are projected per request."
+        )
+
+
+def load_models():
+    """
+    Maps the vocabulary, coordinate table, embeddings, PCA, ANN and fuzzy
+    index and the pivot catalogue. If a required artifact is missing and
+    utils.PREPARE_MISSING_ARTIFACTS is set, prepares the artifacts first (see
+    preparation.prepare_artifacts) and maps them again. Returns the missing
+    required capabilities.
+    """
+    logger.info("Loading PyTorch-based EN/KO models...")
+    _map_artifacts()
+    missing = missing_capabilities()
+    if (
+        missing
+        and utils.PREPARE_MISSING_ARTIFACTS
+        and utils.SERVING_VOCABULARY == "full"
+    ):
+        # This can take a very long time on first run (download, parse, PCA fit).
+        logger.warning(f"Missing {missing}; preparing the EN/KO artifacts...")
+        import preparation
+
+        if preparation.prepare_artifacts():
+            _map_artifacts()
+        missing = missing_capabilities()
+
+    # 4. Optional ANN index for /nearest (built offline by scripts/build_ann_index.py)
+    if not utils.load_ann_index_pytorch():
+        logger.warning(
+            "EN/KO ANN index not available. /nearest will use the exact scan."
+        )
+
+    # 5. Optional fuzzy index for OOV words (built offline by scripts/build_fuzzy_index.py)
+    if not utils.load_fuzzy_index_pytorch():
+        logger.warning(
+            "EN/KO fuzzy index not available. OOV words will not be typo-corrected."
+        )
 
-    print("Model loading process finished.")
+    # 6. Optional pivot catalogue for /pivot (built offline by scripts/build_pivot_catalogue.py)
+    if not utils.load_pivot_catalogue_pytorch():
+        logger.warning("EN/KO pivot catalogue not available. /pivot will return 503.")
+
+    logger.info("Model loading process finished.")
+    return missing
+
+
+def ensure_models_loaded(timeout=None):
+    """Starts the background loader if needed and waits for it. Returns the state."""
+    return lifecycle.wait(timeout)
+
+
+def unavailable_response(*capabilities):
+    """
+    None if the given capabilities are loaded, else the (body, headers) of the
+    503 to answer: the lifecycle state, plus Retry-After while loading.
+    """
+    for name in capabilities:
+        available, description = CAPABILITIES[name]
+        if not available():
+            status = lifecycle.status()
+            body = {
+                "error": f"{description} is not available ({status['state']})",
+                "model_state": status,
+            }
+            headers = {}
+            if status["state"] in (model_lifecycle.IDLE, model_lifecycle.LOADING):
+                headers["Retry-After"] = str(utils.MODEL_LOADING_RETRY_AFTER_SECONDS)
+            return body, headers
+    return None
+
+
+def _models_unavailable(*capabilities):
+    unavailable = unavailable_response(*capabilities)
+    if unavailable is None:
+        return None
+    body, headers = unavailable
+    return jsonify(body), 503, headers
+
+
+@app.before_request
+def _start_loader_before_request():
+    g.request_start_time = time.perf_counter()
+    # Never waits; a degraded worker is retried by a restart or an explicit start().
+    lifecycle.start(retry_degraded=False)
+
+
+@app.after_request
+def _record_request_metrics(response):
+    endpoint = request.endpoint or "unknown"
+    HTTP_REQUESTS.inc(endpoint, response.status_code)
+    start_time = g.get("request_start_time")
+    if start_time is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start_time, endpoint)
+    return response
 
 
 @app.route("/word-to-coordinates", methods=["POST"])
@@ -96,11 +442,15 @@ def get_word_coordinates():
                                 type: string
                             description: A list of words (English or Korean) to get coordinates for.
                             example: ["king", "apple", "사과", "사랑", "amour"]
+                        details:
+                            type: boolean
+                            default: false
+                            description: Also resolve out-of-vocabulary words and return how each word was resolved. They fall back to a normalised spelling, the closest vocabulary key (typos) or the mean of the phrase's words. Without details only exact matches get coordinates.
                     required:
                         - words
     responses:
         200:
-            description: A JSON object mapping each input word to its 2D coordinates (or null if language not supported/detected or word not found).
+            description: A JSON object mapping each input word to its 2D coordinates (or null if language not supported/detected or word not found exactly). With details, OOV words get the coordinates of their fallback match and the response is an object with "coordinates" (this mapping) and "resolutions" (per word, the method - exact, normalized, fuzzy, average, none or skipped - and the vocabulary keys used).
             content:
                 application/json:
                     schema:
@@ -116,105 +466,604 @@ def get_word_coordinates():
                                 king: [0.123, -0.456]
                                 사과: [-0.200, 0.500]
                                 amour: null
+                    examples:
+                        default:
+                            value:
+                                king: [0.123, -0.456]
+                                kingz: null
+                        details:
+                            value:
+                                coordinates:
+                                    king: [0.123, -0.456]
+                                    kingz: [0.123, -0.456]
+                                resolutions:
+                                    king: {"method": "exact", "keys": ["/c/en/king"]}
+                                    kingz: {"method": "fuzzy", "keys": ["/c/en/king"], "distance": 1}
         400:
             description: Invalid input (e.g., missing 'words' array or malformed JSON).
         500:
-            description: Internal server error (e.g., models not loaded, language detection library error).
-    """
-    # Access models loaded at startup via the global scope of the utils module.
-    # These are utils.embeddings_tensor, utils.word_to_idx, utils.pca_model_pt
-
-    # Fallback/Re-check: In a production system, you might have more robust health checks or re-initialization logic.
-    # For now, we assume they were loaded at startup, but add a basic check.
-    if utils.embeddings_tensor is None or utils.word_to_idx is None:
-        print("Error: PyTorch EN/KO Numberbatch embeddings not available. Reloading...")
-        if not utils.load_numberbatch_pytorch() or utils.embeddings_tensor is None:
-            return (
-                jsonify(
-                    {"error": "Word embedding model (EN/KO PyTorch) is not available"}
-                ),
-                500,
-            )
+            description: Internal server error (e.g., language detection library error).
+        503:
+            description: The coordinate table (or the embeddings plus PCA model) is still loading or failed to load. Carries the model state; Retry-After while loading.
+    """
+    # Models are loaded by the background loader (see model_lifecycle.py);
+    # until the table (or the matrix plus PCA) is mapped this answers 503.
+    unavailable = _models_unavailable("coordinates")
+    if unavailable is not None:
+        return unavailable
 
-    if utils.pca_model_pt is None or not hasattr(utils.pca_model_pt, "transform"):
-        print("Error: PCA model (EN/KO) not available/invalid. Reloading/training...")
-        if utils.get_pca_model_pytorch() is None or utils.pca_model_pt is None:
-            return (
-                jsonify({"error": "PCA model (EN/KO) is not available or invalid"}),
-                500,
-            )
+    input_words, error_response = _parse_words_request()
+    if error_response is not None:
+        return error_response
+
+    coordinates, batch_words, batch_langs = split_coordinate_batch(input_words)
+    batch_coords, batch_resolutions = utils.get_words_resolved_coordinates_pytorch(
+        batch_words, batch_langs
+    )
+    fill_coordinate_batch(coordinates, batch_words, batch_langs, batch_coords)
+    return timed_jsonify(
+        coordinate_response(
+            coordinates,
+            batch_words,
+            batch_resolutions,
+            request.get_json().get("details", False),
+        )
+    )
+
+
+@app.route("/similarity-matrix", methods=["POST"])
+def get_similarity_matrix():
+    """
+    Get the pairwise cosine similarity of a list of words (auto-detects English or Korean).
+    Every pair of words is an edge of the n-gon; the whole n x n matrix is computed
+    with a single matrix product over the L2-normalised embeddings.
+    ---
+    requestBody:
+        description: A JSON object containing a list of words (pivot first, then the inputs).
+        required: true
+        content:
+            application/json:
+                schema:
+                    type: object
+                    properties:
+                        words:
+                            type: array
+                            items:
+                                type: string
+                            example: ["king", "castle", "사랑"]
+                        details:
+                            type: boolean
+                            default: false
+                            description: Also resolve out-of-vocabulary words (as in /word-to-coordinates) and return how each word was resolved. Without details only exact matches get similarities.
+                    required:
+                        - words
+    responses:
+        200:
+            description: The input words and their n x n cosine similarity matrix. Rows/columns of words that are not found exactly are null. With details, OOV words use the vector of their fallback match and "resolutions" says how each word was resolved.
+            content:
+                application/json:
+                    schema:
+                        type: object
+                        properties:
+                            words:
+                                type: array
+                                items:
+                                    type: string
+                            matrix:
+                                type: array
+                                items:
+                                    type: array
+                                    items:
+                                        type: number
+                                        format: float
+                                        nullable: true
+                            resolutions:
+                                type: object
+                                description: Only with details, see /word-to-coordinates.
+                    example:
+                        words: ["king", "castle", "amour"]
+                        matrix: [[1.0, 0.42, null], [0.42, 1.0, null], [null, null, null]]
+        400:
+            description: Invalid input (e.g., missing 'words' array or malformed JSON).
+        500:
+            description: Internal server error.
+        503:
+            description: The embeddings are still loading or failed to load. Carries the model state; Retry-After while loading.
+    """
+    unavailable = _models_unavailable("embeddings")
+    if unavailable is not None:
+        return unavailable
+
+    input_words, error_response = _parse_words_request()
+    if error_response is not None:
+        return error_response
+
+    langs = _route_words(input_words)
+    similarity_np, resolutions = utils.get_resolved_similarity_matrix_pytorch(
+        input_words, langs
+    )
+    if similarity_np is None:
+        return (
+            jsonify({"error": "Word embedding model (EN/KO PyTorch) is not available"}),
+            500,
+        )
+    resolutions = word_resolutions(langs, resolutions)
+    details = request.get_json().get("details", False)
+    if not details:
+        drop_fallbacks(resolutions, similarity=similarity_np)
+
+    matrix = [
+        [None if np.isnan(value) else value for value in row]
+        for row in similarity_np.tolist()
+    ]
+    body = {"words": input_words, "matrix": matrix}
+    if details:
+        body["resolutions"] = dict(zip(input_words, resolutions))
+    return timed_jsonify(body)
+
+
+@app.route("/shape", methods=["POST"])
+def get_shape():
+    """
+    Build the n-gon of a pivot word and the player's guesses in one call.
+    The words are routed, resolved and projected in one batch; the vertices
+    follow the input order (pivot first) and the last guess is joined back to
+    the pivot. Words that are not found (exactly, unless details is set) are
+    left out of the polygon.
+    ---
+    requestBody:
+        description: The pivot word and the guesses (English or Korean).
+        required: true
+        content:
+            application/json:
+                schema:
+                    type: object
+                    properties:
+                        pivot:
+                            type: string
+                            example: king
+                        guesses:
+                            type: array
+                            items:
+                                type: string
+                            example: ["sleep", "bedtime", "castle"]
+                        details:
+                            type: boolean
+                            default: false
+                            description: Also resolve out-of-vocabulary words (as in /word-to-coordinates) and return how each word was resolved. Without details only exact matches become vertices.
+                    required:
+                        - pivot
+                        - guesses
+    responses:
+        200:
+            description: The polygon. vertices has the [x, y] coordinates (or null) of every word, edges the cosine similarity and 2D length of each polygon edge, and score is SHAPE_SCORE_SCALE times the mean non-negative edge similarity.
+            content:
+                application/json:
+                    schema:
+                        type: object
+                        properties:
+                            words:
+                                type: array
+                                items:
+                                    type: string
+                            vertices:
+                                type: array
+                                items:
+                                    type: array
+                                    items:
+                                        type: number
+                                        format: float
+                                    nullable: true
+                            missing:
+                                type: array
+                                items:
+                                    type: string
+                            edges:
+                                type: array
+                                items:
+                                    type: object
+                                    properties:
+                                        from:
+                                            type: string
+                                        to:
+                                            type: string
+                                        similarity:
+                                            type: number
+                                            format: float
+                                            nullable: true
+                                        length:
+                                            type: number
+                                            format: float
+                            area:
+                                type: number
+                                format: float
+                            perimeter:
+                                type: number
+                                format: float
+                            score:
+                                type: integer
+                            resolutions:
+                                type: object
+                                description: Only with details, see /word-to-coordinates.
+                    example:
+                        words: ["king", "castle", "sleep"]
+                        vertices: [[0.12, -0.45], [0.2, -0.3], [-0.1, 0.05]]
+                        missing: []
+                        edges:
+                            - {"from": "king", "to": "castle", "similarity": 0.42, "length": 0.17}
+                            - {"from": "castle", "to": "sleep", "similarity": 0.08, "length": 0.46}
+                            - {"from": "sleep", "to": "king", "similarity": 0.11, "length": 0.55}
+                        area: 0.0345
+                        perimeter: 1.18
+                        score: 20
+        400:
+            description: Invalid input (e.g., missing pivot, too many guesses or malformed JSON).
+        500:
+            description: Internal server error.
+        503:
+            description: The embeddings or coordinates are still loading or failed to load. Carries the model state; Retry-After while loading.
+    """
+    unavailable = _models_unavailable("coordinates", "embeddings")
+    if unavailable is not None:
+        return unavailable
 
     try:
         data = request.get_json()
-        if not data or "words" not in data or not isinstance(data["words"], list):
-            return (
-                jsonify(
-                    {
-                        "error": "Invalid input. 'words' array (list of strings) is required."
-                    }
-                ),
-                400,
-            )
-        # Ensure all items in words list are strings
-        for word_item in data["words"]:
-            if not isinstance(word_item, str):
-                return (
-                    jsonify({"error": "All items in 'words' array must be strings."}),
-                    400,
-                )
-
     except Exception as e:
         return jsonify({"error": f"Failed to parse JSON input: {str(e)}"}), 400
+    if not isinstance(data, dict) or not isinstance(data.get("pivot"), str):
+        return jsonify({"error": "Invalid input. 'pivot' (string) is required."}), 400
+    guesses = data.get("guesses")
+    if not isinstance(guesses, list) or not all(
+        isinstance(guess, str) for guess in guesses
+    ):
+        return (
+            jsonify({"error": "'guesses' must be an array of strings."}),
+            400,
+        )
+    details = data.get("details", False)
+    if not isinstance(details, bool):
+        return jsonify({"error": "'details' must be a boolean."}), 400
+    if not 1 <= len(guesses) <= utils.SHAPE_MAX_GUESSES:
+        return (
+            jsonify(
+                {
+                    "error": f"'guesses' must hold between 1 and {utils.SHAPE_MAX_GUESSES} words."
+                }
+            ),
+            400,
+        )
 
-    input_words = data["words"]
-    coordinates = {}
+    words = [data["pivot"]] + guesses
+    langs = _route_words(words)
+    coordinates, resolutions = utils.get_words_resolved_coordinates_pytorch(
+        words, langs
+    )
+    similarity_np = utils.get_similarity_matrix_pytorch(words, langs)
+    if coordinates is None or similarity_np is None:
+        return (
+            jsonify({"error": "Word embedding or PCA model (EN/KO) is not available"}),
+            500,
+        )
+    resolutions = word_resolutions(langs, resolutions)
+    if not details:
+        drop_fallbacks(resolutions, coordinates, similarity_np)
+    body = shape_metrics.build_shape(
+        words, coordinates, similarity_np, utils.SHAPE_SCORE_SCALE
+    )
+    if details:
+        body["resolutions"] = dict(zip(words, resolutions))
+    return timed_jsonify(body)
 
-    for word in input_words:
-        # langdetect 부분을 제거하고 새로운 언어 감지 함수 사용
-        if len(word.strip()) <= 1:
-            print(f"Word '{word}' is too short for language detection. Skipping.")
-            coordinates[word] = None
-            continue
-
-        # 간단한 한글/영어 판단 함수 사용
-        detected_lang = detect_language(word)
-
-        if detected_lang in utils.SUPPORTED_LANGUAGES:
-            # print(f"Word: '{word}', Detected language: {detected_lang}")
-            word_vector_pt = utils.get_word_vector_pytorch(word, detected_lang)
-
-            if word_vector_pt is not None and not torch.all(word_vector_pt.eq(0)):
-                coord_2d_np = utils.transform_to_2d_pytorch(word_vector_pt)
-                if coord_2d_np is not None:
-                    coordinates[word] = coord_2d_np.tolist()
-                else:
-                    print(
-                        f"PCA transformation failed for word: {word} (lang: {detected_lang})"
-                    )
-                    coordinates[word] = None
-            else:
-                print(
-                    f"Word '{word}' (detected lang: {detected_lang}) resulted in a zero vector (OOV in filtered Numberbatch)."
-                )
-                coordinates[word] = None
-        else:
-            print(
-                f"Word: '{word}', Detected language: '{detected_lang}' (Not supported or detection failed). Skipping."
-            )
-            coordinates[word] = None
 
-    return jsonify(coordinates)
+@app.route("/nearest", methods=["POST"])
+def get_nearest_words():
+    """
+    Get the words closest to a given word (auto-detects English or Korean).
+    Candidates come from an approximate nearest-neighbour index and are re-ranked
+    by exact cosine similarity. With "exact": true (or when no index is built) the
+    whole vocabulary is scanned instead. Useful for "suggest a word" and pivot hints.
+    ---
+    requestBody:
+        description: A JSON object with the query word and optional search settings.
+        required: true
+        content:
+            application/json:
+                schema:
+                    type: object
+                    properties:
+                        word:
+                            type: string
+                            example: "king"
+                        k:
+                            type: integer
+                            description: Number of neighbours to return (1-100).
+                            default: 10
+                        languages:
+                            type: array
+                            items:
+                                type: string
+                            description: Only return words in these languages (at least one; default all).
+                            example: ["en", "ko"]
+                        exact:
+                            type: boolean
+                            description: Use the exact brute-force scan instead of the ANN index.
+                            default: false
+                    required:
+                        - word
+    responses:
+        200:
+            description: The query word and its nearest neighbours (null if the word is not found).
+            content:
+                application/json:
+                    example:
+                        word: "king"
+                        neighbors:
+                            - {"word": "queen", "lang": "en", "similarity": 0.83}
+                            - {"word": "왕", "lang": "ko", "similarity": 0.81}
+        400:
+            description: Invalid input (e.g., missing 'word', bad 'k' or unsupported language).
+        500:
+            description: Internal server error.
+        503:
+            description: The embeddings are still loading or failed to load. Carries the model state; Retry-After while loading.
+    """
+    unavailable = _models_unavailable("embeddings")
+    if unavailable is not None:
+        return unavailable
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("word"), str):
+        return jsonify({"error": "Invalid input. 'word' (string) is required."}), 400
+    k = data.get("k", 10)
+    if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= 100:
+        return jsonify({"error": "'k' must be an integer between 1 and 100."}), 400
+    languages = data.get("languages", utils.SUPPORTED_LANGUAGES)
+    if (
+        not isinstance(languages, list)
+        or not languages
+        or any(lang not in utils.SUPPORTED_LANGUAGES for lang in languages)
+    ):
+        return (
+            jsonify(
+                {
+                    "error": f"'languages' must be a non-empty subset of {utils.SUPPORTED_LANGUAGES}."
+                }
+            ),
+            400,
+        )
+
+    exact = data.get("exact", False)
+    if not isinstance(exact, bool):
+        return jsonify({"error": "'exact' must be a boolean."}), 400
+
+    word = data["word"]
+    detected_lang = _route_words([word])[0]
+    if detected_lang is None:
+        return jsonify({"word": word, "neighbors": None})
+    neighbors = utils.get_nearest_words_pytorch(
+        word, detected_lang, k=k, languages=languages, exact=exact
+    )
+    if neighbors is None:
+        return (
+            jsonify({"error": "Word embedding model (EN/KO PyTorch) is not available"}),
+            500,
+        )
+    if not neighbors:
+        return jsonify({"word": word, "neighbors": None})
+
+    result = []
+    for key, similarity in neighbors:
+        neighbor_lang, neighbor_word = utils.split_conceptnet_key(key)
+        result.append(
+            {"word": neighbor_word, "lang": neighbor_lang, "similarity": similarity}
+        )
+    return timed_jsonify({"word": word, "neighbors": result})
+
+
+@app.route("/pivot", methods=["GET"])
+def get_pivot():
+    """
+    Get a pivot word for a new round from the precomputed pivot catalogue.
+    Returns a random pivot, or the entry of a given word, with its 2D
+    coordinates, nearest neighbours and the quantiles of its similarity to the
+    rest of the vocabulary. Every answer is a read from the catalogue built by
+    scripts/build_pivot_catalogue.py; nothing is searched at request time.
+    ---
+    parameters:
+        - name: lang
+          in: query
+          required: false
+          schema:
+              type: string
+              enum: ["en", "ko"]
+          description: Language of the random pivot (any language if omitted).
+        - name: word
+          in: query
+          required: false
+          schema:
+              type: string
+          description: Look up this pivot instead of picking a random one.
+        - name: k
+          in: query
+          required: false
+          schema:
+              type: integer
+              default: 10
+          description: Number of neighbours to return (at most the number stored).
+    responses:
+        200:
+            description: The pivot.
+            content:
+                application/json:
+                    example:
+                        word: king
+                        lang: en
+                        coordinates: [0.123, -0.456]
+                        neighbors:
+                            - {"word": "queen", "lang": "en", "similarity": 0.78}
+                            - {"word": "왕", "lang": "ko", "similarity": 0.74}
+                        similarity_quantiles: {"0.5": 0.02, "0.9": 0.11, "0.99": 0.27, "0.999": 0.41}
+        400:
+            description: Invalid parameters.
+        404:
+            description: The word (or language) has no pivot in the catalogue.
+        503:
+            description: The pivot catalogue has not been built or is still loading. Carries the model state.
+    """
+    lang = request.args.get("lang")
+    word = request.args.get("word")
+    if lang is not None and lang not in utils.SUPPORTED_LANGUAGES:
+        return (
+            jsonify({"error": f"'lang' must be one of {utils.SUPPORTED_LANGUAGES}."}),
+            400,
+        )
+    k = request.args.get("k", "10")
+    if not k.isdecimal() or int(k) < 1:
+        return jsonify({"error": "'k' must be a positive integer."}), 400
+    k = int(k)
+    if utils.pivot_catalogue_pt is None:
+        return (
+            jsonify(
+                {
+                    "error": "Pivot catalogue (EN/KO) is not available",
+                    "model_state": lifecycle.status(),
+                }
+            ),
+            503,
+        )
+
+    if word is not None and lang is None:
+        lang = _route_words([word])[0]
+        if lang is None:
+            return jsonify({"error": f"'{word}' is not a pivot."}), 404
+    pivot = utils.get_pivot_pytorch(word=word, lang=lang, k=k)
+    if pivot is None:
+        return jsonify({"error": f"'{word or lang}' has no pivot."}), 404
+
+    neighbors = []
+    for key, similarity in pivot["neighbors"]:
+        neighbor_lang, neighbor_word = utils.split_conceptnet_key(key)
+        neighbors.append(
+            {"word": neighbor_word, "lang": neighbor_lang, "similarity": similarity}
+        )
+    pivot["neighbors"] = neighbors
+    pivot["similarity_quantiles"] = {
+        f"{level:g}": value for level, value in pivot["similarity_quantiles"].items()
+    }
+    return timed_jsonify(pivot)
+
+
+@app.route("/cache-stats", methods=["GET"])
+def get_cache_stats():
+    """
+    Get hit, miss and eviction counters of the word lookup and coordinate caches.
+    ---
+    responses:
+        200:
+            description: Cache counters plus the model versions used in the cache keys.
+            content:
+                application/json:
+                    example:
+                        vocabulary_version: 1
+                        pca_version: 1
+                        fuzzy_index_version: 1
+                        word_index_cache: {"size": 120, "maxsize": 100000, "ttl_seconds": 3600, "hits": 5400, "misses": 120, "evictions": 0, "expirations": 0, "hit_rate": 0.978}
+                        coordinate_cache: {"size": 118, "maxsize": 100000, "ttl_seconds": 3600, "hits": 5380, "misses": 118, "evictions": 0, "expirations": 0, "hit_rate": 0.979}
+    """
+    return jsonify(utils.get_cache_stats())
+
+
+@app.route("/healthz", methods=["GET"])
+def get_health():
+    """
+    Liveness probe: the process is up. Reports which models are loaded.
+    ---
+    responses:
+        200:
+            description: Process is alive; model state of this worker.
+            content:
+                application/json:
+                    example:
+                        status: ok
+                        models_ready: true
+                        model_state: {"state": "ready", "missing": [], "attempts": 1, "loading_seconds": 2.4}
+                        pid: 4242
+                        vocabulary_size: 1452033
+                        embeddings: null
+                        pca_model: false
+                        coordinate_table: true
+                        ann_index: true
+    """
+    state = utils.get_model_state()
+    return jsonify(
+        {
+            "status": "ok",
+            "models_ready": lifecycle.finished,
+            "model_state": lifecycle.status(),
+            **state,
+        }
+    )
+
+
+@app.route("/readyz", methods=["GET"])
+def get_readiness():
+    """
+    Readiness probe: 200 once the loader has finished and coordinates can be served, 503 before.
+    ---
+    responses:
+        200:
+            description: Ready to serve.
+        503:
+            description: Models are still loading or failed to load (see model_state).
+    """
+    ready = lifecycle.finished and utils.can_serve_coordinates()
+    state = utils.get_model_state()
+    return (
+        jsonify(
+            {
+                "status": "ready" if ready else "not ready",
+                "models_ready": lifecycle.finished,
+                "model_state": lifecycle.status(),
+                **state,
+            }
+        ),
+        200 if ready else 503,
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Prometheus metrics: request counts and latencies, lookup/fetch/projection/JSON timers, OOV rate, language mix and cache counters.
+    ---
+    responses:
+        200:
+            description: Metrics in the Prometheus text exposition format.
+            content:
+                text/plain:
+                    example: |
+                        # HELP word_lookups_total Word-to-row lookups by language and result (hit or oov).
+                        # TYPE word_lookups_total counter
+                        word_lookups_total{lang="en",result="hit"} 5120
+                        word_lookups_total{lang="en",result="oov"} 87
+    """
+    return Response(
+        instrumentation.render_prometheus(),
+        mimetype="text/plain; version=0.0.4",
+    )
 
 
 if __name__ == "__main__":
     # To prepare PCA training data (NumPy array from EN/KO PyTorch embeddings), run the script:
     # python backend/scripts/prepare_pca_data.py
-    # This should be done once before extensively using the API for best results.
-    # It relies on the PyTorch EN/KO Numberbatch embeddings being available (or generated on its first run).
-    # If backend/data/word_vectors_for_pca_enko.npy does not exist,
-    # the PCA model (pca_model_enko.joblib) will be trained using a fallback
-    # (very small) sample of words defined in utils.py during the first API call
-    # or on app startup if get_pca_model_pytorch() is called.
+    # It fits the PCA projector and precomputes the 2D coordinate table
+    # (see preparation.py); the API then serves from the table.
+    # python backend/scripts/prepare_artifacts.py rebuilds whatever is missing or
+    # stale according to the build manifest (see artifact_manifest.py).
+    # Without it, the app reports degraded (503) unless
+    # utils.PREPARE_MISSING_ARTIFACTS is set.
+    ensure_models_loaded()
 
     # For development, host='0.0.0.0' allows access from other devices on the network.
     # Port 5001 is used to avoid conflict with other services.
@@ -0,0 +1,295 @@
+# Build manifest for the artifacts in the data directory.
+#
+# Every prepared artifact (the embedding store, PCA projector, coordinate
+# table, ANN / fuzzy indexes, pivot catalogue, and the raw inputs they were
+# built from) gets an entry in one JSON file: per file its size, mtime, sha256
+# and, for .npy files, shape and dtype; the producer and its version; the
+# inputs it was built from (content hashes of upstream artifacts plus the
+# config that shaped it); and, for vocabulary-aligned artifacts, the hash of
+# the vocabulary. An artifact is named after its path or prefix (e.g.
+# "nb_store_enko", "nb_coords_enko.npy"), so each vocabulary set has its own.
+#
+# Producers write into staging paths next to the final ones and publish them
+# with os.replace, so a reader never maps a half-written file and processes
+# that already mapped the old file keep its pages. The manifest entry is
+# written after the files; until then the files don't match it and are
+# rejected, so a crash at any point leaves either the old, consistent
+# artifact or one that fails verification and gets rebuilt.
+#
+# Verification is cheap when nothing changed: sizes and mtimes are compared
+# and a file is only re-hashed when its mtime moved (e.g. after a copy).
+#
+# Staging paths are fixed per artifact, so builds of one data directory take
+# its build lock (build_lock): a second builder, in another process, waits
+# and then finds the artifacts current instead of overwriting staged files.
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+MANIFEST_VERSION = 1
+STAGING_PREFIX = ".staging-"
+BUILD_LOCK_NAME = ".build.lock"
+HASH_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def artifact_name(path):
+    """Manifest name of the artifact at `path` (a file path or a file prefix)."""
+    return os.path.basename(path)
+
+
+def staging_path(path):
+    """Where a producer writes `path` (a file path or prefix) before publishing it."""
+    directory, base = os.path.split(path)
+    return os.path.join(directory, STAGING_PREFIX + base)
+
+
+def file_digest(path):
+    """sha256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def describe_file(path):
+    """Manifest record of one file: name, size, mtime, sha256 (+ shape/dtype for .npy)."""
+    stat = os.stat(path)
+    record = {
+        "file": os.path.basename(path),
+        "bytes": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_digest(path),
+    }
+    if path.endswith(".npy"):
+        array = np.load(path, mmap_mode="r")
+        record["shape"] = list(array.shape)
+        record["dtype"] = array.dtype.str
+    return record
+
+
+def combined_hash(files, keys=None):
+    """One hash over the sha256 of the given file records (all of them by default)."""
+    keys = sorted(files if keys is None else keys)
+    digest = hashlib.sha256()
+    for key in keys:
+        digest.update(f"{key}:{files[key]['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def discard(paths):
+    """Removes the given files (e.g. leftover staging files) if they exist."""
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def publish(staged_paths, final_paths):
+    """
+    Moves each staged file over its final path (fsync, then os.replace).
+    Final files without a staged counterpart are removed, so an artifact never
+    mixes files of two builds (e.g. int8 scales left behind by a float store).
+    """
+    for key, final_path in final_paths.items():
+        staged = staged_paths[key]
+        if os.path.exists(staged):
+            with open(staged, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(staged, final_path)
+        elif os.path.exists(final_path):
+            os.remove(final_path)
+
+
+def _normalized(value):
+    """JSON round trip, so tuples and lists (and int keys) compare equal."""
+    return json.loads(json.dumps(value))
+
+
+@contextlib.contextmanager
+def _locked(manifest_path):
+    with open(manifest_path + ".lock", "w") as f_lock:
+        fcntl.flock(f_lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f_lock, fcntl.LOCK_UN)
+
+
+_build_lock = threading.RLock()
+_build_lock_depth = 0
+
+
+@contextlib.contextmanager
+def build_lock(directory):
+    """
+    Holds the exclusive build lock of a data directory (fcntl, so across
+    processes). Reentrant in the process holding it, so a build made of
+    several locked steps keeps one lock throughout.
+    """
+    global _build_lock_depth
+    with _build_lock:
+        if _build_lock_depth:
+            _build_lock_depth += 1
+            try:
+                yield
+            finally:
+                _build_lock_depth -= 1
+            return
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, BUILD_LOCK_NAME), "w") as f_lock:
+            try:
+                fcntl.flock(f_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                print(f"Waiting for the build running in {directory} to finish...")
+                fcntl.flock(f_lock, fcntl.LOCK_EX)
+            _build_lock_depth = 1
+            try:
+                yield
+            finally:
+                _build_lock_depth = 0
+                fcntl.flock(f_lock, fcntl.LOCK_UN)
+
+
+def load_manifest(manifest_path):
+    """The manifest as a dict; an empty one if the file is missing or unreadable."""
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "artifacts": {}}
+    manifest.setdefault("artifacts", {})
+    return manifest
+
+
+def _save_manifest(manifest_path, manifest):
+    staged = staging_path(manifest_path)
+    with open(staged, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(staged, manifest_path)
+
+
+def get_entry(manifest_path, name):
+    """The manifest entry of an artifact, or None if it isn't recorded."""
+    return load_manifest(manifest_path)["artifacts"].get(name)
+
+
+def record_artifact(
+    manifest_path,
+    name,
+    paths,
+    producer,
+    producer_version,
+    inputs,
+    vocabulary_hash=None,
+    vocabulary_files=(),
+):
+    """
+    Records the artifact made of `paths` (key -> path; missing files are
+    skipped). `inputs` is a JSON-able dict of what it was built from.
+    `vocabulary_files` names the keys whose combined hash is the artifact's
+    own vocabulary hash (the store); other vocabulary-aligned artifacts pass
+    the `vocabulary_hash` they were built against. Returns the entry.
+    """
+    files = {
+        key: describe_file(path) for key, path in paths.items() if os.path.exists(path)
+    }
+    if vocabulary_files:
+        vocabulary_hash = combined_hash(files, vocabulary_files)
+    entry = {
+        "producer": producer,
+        "producer_version": producer_version,
+        "inputs": _normalized(inputs),
+        "content_hash": combined_hash(files),
+        "vocabulary_hash": vocabulary_hash,
+        "files": files,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    with _locked(manifest_path):
+        manifest = load_manifest(manifest_path)
+        manifest["version"] = MANIFEST_VERSION
+        manifest["artifacts"][name] = entry
+        _save_manifest(manifest_path, manifest)
+    return entry
+
+
+def forget_artifact(manifest_path, name):
+    """Drops an artifact's entry (e.g. before rebuilding it in place)."""
+    with _locked(manifest_path):
+        manifest = load_manifest(manifest_path)
+        if manifest["artifacts"].pop(name, None) is not None:
+            _save_manifest(manifest_path, manifest)
+
+
+def verify_artifact(manifest_path, name, paths):
+    """
+    Checks the files at `paths` against the artifact's entry. Returns
+    (entry, problem): entry is None if the artifact isn't recorded; problem is
+    a description of the first mismatch (missing, partial, modified or
+    unexpected file), or None if the files are the recorded ones. Files whose
+    mtime moved but whose content matches get their mtime re-recorded.
+    """
+    entry = get_entry(manifest_path, name)
+    if entry is None:
+        return None, None
+    files = entry["files"]
+    for key, path in paths.items():
+        if key not in files and os.path.exists(path):
+            return entry, f"has an unrecorded file {path}"
+    touched = {}
+    for key, record in files.items():
+        path = paths.get(key)
+        if path is None or not os.path.exists(path):
+            return entry, f"is missing {record['file']}"
+        stat = os.stat(path)
+        if stat.st_size != record["bytes"]:
+            return (
+                entry,
+                f"file {path} has {stat.st_size} bytes, recorded {record['bytes']} (partial or replaced)",
+            )
+        if stat.st_mtime_ns != record["mtime_ns"]:
+            if file_digest(path) != record["sha256"]:
+                return entry, f"file {path} was modified after it was recorded"
+            touched[key] = stat.st_mtime_ns
+    if touched:
+        with _locked(manifest_path):
+            manifest = load_manifest(manifest_path)
+            current = manifest["artifacts"].get(name)
+            if current is not None and current["content_hash"] == entry["content_hash"]:
+                for key, mtime_ns in touched.items():
+                    current["files"][key]["mtime_ns"] = mtime_ns
+                _save_manifest(manifest_path, manifest)
+    return entry, None
+
+
+def is_current(manifest_path, name, paths, producer_version, inputs):
+    """
+    True if the artifact is recorded, its files verify and it was built by
+    `producer_version` from exactly `inputs`. Returns (current, reason).
+    """
+    entry, problem = verify_artifact(manifest_path, name, paths)
+    if entry is None:
+        return False, "not recorded"
+    if problem:
+        return False, problem
+    if entry["producer_version"] != producer_version:
+        return False, (
+            f"built by producer version {entry['producer_version']}, current is {producer_version}"
+        )
+    inputs = _normalized(inputs)
+    changed = sorted(
+        key
+        for key in set(inputs) | set(entry["inputs"])
+        if inputs.get(key) != entry["inputs"].get(key)
+    )
+    if changed:
+        return False, f"inputs changed: {', '.join(changed)}"
+    return True, "up to date"
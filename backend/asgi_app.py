@@ -0,0 +1,368 @@
+# ASGI serving mode for the coordinate API.
+#
+# The frontend sends one word per POST, so under load the Flask app spends
+# most of its time on per-request overhead around a tiny lookup. Here
+# /word-to-coordinates is answered natively: requests arriving within
+# COALESCE_WINDOW_MS are merged into one utils.get_words_resolved_coordinates_pytorch
+# call (flushed early at COALESCE_MAX_BATCH words) and the result is split back
+# per request, with the same JSON contract as app.py. Routing and lookups run
+# on the batch thread, never on the event loop. Every other route is passed
+# through to the Flask app on a worker thread.
+#
+# Run with: uvicorn asgi_app:app --port 5001  (or python asgi_app.py)
+
+import asyncio
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as flask_app_module
+import instrumentation
+import utils
+
+flask_app = flask_app_module.app
+logger = instrumentation.get_logger("asgi_app")
+# Coalesced requests are recorded under the Flask endpoint's name.
+COORDINATES_ENDPOINT = "get_word_coordinates"
+COALESCED_BATCH_WORDS = instrumentation.histogram(
+    "coalesced_batch_words",
+    "Words per coalesced /word-to-coordinates batch.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+
+
+def resolve_coordinate_requests(requests):
+    """
+    Runs on the batch thread: routes the words of every request, resolves all
+    routed words with one batched lookup and splits the result back. Returns
+    per request (coordinates, batch_words, batch_resolutions), as the Flask
+    handler builds them.
+    """
+    splits = [
+        flask_app_module.split_coordinate_batch(input_words) for input_words in requests
+    ]
+    words = [word for _, batch_words, _ in splits for word in batch_words]
+    langs = [lang for _, _, batch_langs in splits for lang in batch_langs]
+    coords, resolutions = None, None
+    if words:
+        COALESCED_BATCH_WORDS.observe(len(words))
+        try:
+            coords, resolutions = utils.get_words_resolved_coordinates_pytorch(
+                words, langs
+            )
+        except Exception as e:
+            logger.error("Coalesced EN/KO coordinate lookup failed: %s", e)
+
+    results = []
+    start = 0
+    for coordinates, batch_words, batch_langs in splits:
+        end = start + len(batch_words)
+        if batch_words:
+            flask_app_module.fill_coordinate_batch(
+                coordinates,
+                batch_words,
+                batch_langs,
+                None if coords is None else coords[start:end],
+            )
+        results.append(
+            (
+                coordinates,
+                batch_words,
+                None if resolutions is None else resolutions[start:end],
+            )
+        )
+        start = end
+    return results, len(words)
+
+
+class CoordinateBatcher:
+    """
+    Collects the word lists of /word-to-coordinates requests and resolves them
+    with one batched routing and lookup per window. Batches run one at a time
+    on a single worker thread, so the next batch fills up while the current
+    one is projected.
+    """
+
+    def __init__(self, window_ms=None, max_batch=None):
+        self.window = (
+            utils.COALESCE_WINDOW_MS if window_ms is None else window_ms
+        ) / 1000.0
+        self.max_batch = utils.COALESCE_MAX_BATCH if max_batch is None else max_batch
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="coords-batch"
+        )
+        self._pending = []  # (input words, future)
+        self._pending_words = 0
+        self._flush_handle = None
+        # Counters for /coalesce-stats
+        self.requests = 0
+        self.batches = 0
+        self.words = 0
+
+    async def submit(self, input_words):
+        """
+        Returns (coordinates, batch_words, batch_resolutions) for the words of
+        one request, see resolve_coordinate_requests.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((input_words, future))
+        self._pending_words += len(input_words)
+        self.requests += 1
+        if self._pending_words >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending, self._pending_words = self._pending, [], 0
+        if pending:
+            asyncio.ensure_future(self._run_batch(pending))
+
+    async def _run_batch(self, pending):
+        loop = asyncio.get_running_loop()
+        try:
+            results, num_words = await loop.run_in_executor(
+                self._executor,
+                resolve_coordinate_requests,
+                [input_words for input_words, _ in pending],
+            )
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        if num_words:
+            self.batches += 1
+            self.words += num_words
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "requests": self.requests,
+            "batches": self.batches,
+            "words": self.words,
+            "mean_batch_words": self.words / self.batches if self.batches else 0.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+async def _read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            break
+    return bytes(body)
+
+
+async def _send_json(send, status, payload, headers=None):
+    with flask_app_module.JSON_SERIALIZATION_SECONDS.time(COORDINATES_ENDPOINT):
+        body = (
+            flask_app.json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n"
+        )
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ]
+            + [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in (headers or {}).items()
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _wsgi_environ(scope, body):
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "CONTENT_LENGTH": str(len(body)),
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _call_wsgi(environ):
+    """Runs the Flask app on a buffered request; returns (status, headers, body)."""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = headers
+
+    result = flask_app.wsgi_app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return response["status"], response["headers"], body
+
+
+class CoalescingApp:
+    """ASGI application: coalesced /word-to-coordinates, Flask for the rest."""
+
+    def __init__(self, window_ms=None, max_batch=None):
+        self.batcher = CoordinateBatcher(window_ms, max_batch)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            if scope["path"] == "/word-to-coordinates" and scope["method"] == "POST":
+                start_time = time.perf_counter()
+                status = await self._word_to_coordinates(receive, send)
+                flask_app_module.HTTP_REQUESTS.inc(COORDINATES_ENDPOINT, status)
+                flask_app_module.HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - start_time, COORDINATES_ENDPOINT
+                )
+            elif scope["path"] == "/coalesce-stats" and scope["method"] == "GET":
+                await _send_json(send, 200, self.batcher.stats())
+            else:
+                await self._proxy_to_flask(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # The models load in the background; until then requests get a 503.
+                flask_app_module.lifecycle.start(retry_degraded=False)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.batcher.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _word_to_coordinates(self, receive, send):
+        """Answers one /word-to-coordinates request; returns the HTTP status."""
+        body = await _read_body(receive)
+        # Readiness first, like the Flask handler: 503 before any 400.
+        flask_app_module.lifecycle.start(retry_degraded=False)
+        unavailable = flask_app_module.unavailable_response("coordinates")
+        if unavailable is not None:
+            payload, headers = unavailable
+            await _send_json(send, 503, payload, headers)
+            return 503
+        try:
+            data = json.loads(body)
+        except Exception as e:
+            await _send_json(
+                send, 400, {"error": f"Failed to parse JSON input: {str(e)}"}
+            )
+            return 400
+        error = flask_app_module.validate_words_payload(data)
+        if error is not None:
+            await _send_json(send, 400, {"error": error})
+            return 400
+
+        coordinates, batch_words, batch_resolutions = await self.batcher.submit(
+            data["words"]
+        )
+        await _send_json(
+            send,
+            200,
+            flask_app_module.coordinate_response(
+                coordinates,
+                batch_words,
+                batch_resolutions,
+                data.get("details", False),
+            ),
+        )
+        return 200
+
+    async def _proxy_to_flask(self, scope, receive, send):
+        body = await _read_body(receive)
+        (
+            status,
+            headers,
+            response_body,
+        ) = await asyncio.get_running_loop().run_in_executor(
+            None, _call_wsgi, _wsgi_environ(scope, body)
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": response_body})
+
+
+app = CoalescingApp()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(
+        description="Serves the coordinate API over ASGI with request coalescing."
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument(
+        "--window-ms",
+        type=float,
+        default=utils.COALESCE_WINDOW_MS,
+        help="How long a batch waits for more /word-to-coordinates requests.",
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=utils.COALESCE_MAX_BATCH,
+        help="Flush a batch early once it holds this many words.",
+    )
+    args = parser.parse_args()
+
+    uvicorn.run(
+        CoalescingApp(args.window_ms, args.max_batch),
+        host=args.host,
+        port=args.port,
+    )
@@ -0,0 +1,177 @@
+# Memory-mapped storage for the EN/KO Numberbatch embeddings and vocabulary.
+#
+# The matrix is kept as a plain .npy file (a small header followed by the raw
+# row-major float data) and the vocabulary as a vocab_index.VocabularyIndex
+# (one contiguous UTF-8 buffer of terms plus per-row language ids, searched by
+# binary search). Everything is opened with mmap, so several worker processes share the same
+# page-cache pages and load time does not grow with the vocabulary size.
+#
+# The matrix can be stored as float32, float16, or int8 with one float32 scale
+# per row (row ~= int8_row * scale); see quantize_rows / dequantize_rows.
+
+import os
+import shutil
+
+import numpy as np
+
+import vocab_index
+
+SUPPORTED_STORE_DTYPES = ("float32", "float16", "int8")
+INT8_MAX = 127
+
+
+def store_paths(prefix):
+    """Returns the file paths that make up an embedding store."""
+    return {
+        "embeddings": f"{prefix}_embeddings.npy",
+        "scales": f"{prefix}_scales.npy",  # int8 stores only
+    }
+
+
+def artifact_paths(prefix):
+    """Every file of an embedding store: the matrix, int8 scales and vocabulary index."""
+    return {**store_paths(prefix), **vocab_index.index_paths(prefix)}
+
+
+def quantize_rows(rows, dtype):
+    """
+    Converts float rows to the store dtype. Returns (stored_rows, scales) where
+    `scales` is a float32 per-row scale for int8 and None otherwise.
+    """
+    rows = np.asarray(rows, dtype=np.float32)
+    if dtype != "int8":
+        return rows.astype(dtype, copy=False), None
+    max_abs = np.abs(rows).max(axis=1) if rows.size else np.zeros(len(rows))
+    scales = np.where(max_abs > 0, max_abs / INT8_MAX, 1.0).astype(np.float32)
+    quantized = np.rint(rows / scales[:, None]).clip(-INT8_MAX, INT8_MAX)
+    return quantized.astype(np.int8), scales
+
+
+def dequantize_rows(rows, scales=None):
+    """Inverse of quantize_rows: float32 rows from stored rows (and int8 scales)."""
+    rows = np.asarray(rows, dtype=np.float32)
+    if scales is None:
+        return rows
+    return rows * np.asarray(scales, dtype=np.float32)[:, None]
+
+
+def store_exists(prefix):
+    """
+    True if the matrix and the vocabulary index are on disk. Scales are only
+    required for int8 matrices and are checked on load.
+    """
+    if not os.path.exists(store_paths(prefix)["embeddings"]):
+        return False
+    return vocab_index.index_exists(prefix)
+
+
+def save_scales(prefix, scales):
+    """Writes the int8 per-row scales, or removes stale ones for float stores."""
+    path = store_paths(prefix)["scales"]
+    if scales is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    np.save(path, np.asarray(scales, dtype=np.float32))
+
+
+def create_embeddings_file(prefix, rows, dim, dtype="float32"):
+    """
+    Preallocates the on-disk embedding matrix and returns it as a writable memmap.
+    Callers fill the rows in place and call flush() when done.
+    """
+    if dtype not in SUPPORTED_STORE_DTYPES:
+        raise ValueError(
+            f"Unsupported store dtype '{dtype}'. Expected one of {SUPPORTED_STORE_DTYPES}."
+        )
+    return np.lib.format.open_memmap(
+        store_paths(prefix)["embeddings"], mode="w+", dtype=dtype, shape=(rows, dim)
+    )
+
+
+def write_embeddings_from_raw(prefix, raw_path, rows, dim, dtype="float32"):
+    """
+    Turns a headerless file of `rows` x `dim` row-major values into the store's
+    .npy matrix by writing the header and streaming the raw bytes after it.
+    """
+    if dtype not in SUPPORTED_STORE_DTYPES:
+        raise ValueError(
+            f"Unsupported store dtype '{dtype}'. Expected one of {SUPPORTED_STORE_DTYPES}."
+        )
+    expected_bytes = rows * dim * np.dtype(dtype).itemsize
+    if os.path.getsize(raw_path) != expected_bytes:
+        raise ValueError(
+            f"Raw embeddings file {raw_path} has {os.path.getsize(raw_path)} bytes, expected {expected_bytes}."
+        )
+    header = {
+        "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        "fortran_order": False,
+        "shape": (rows, dim),
+    }
+    with open(store_paths(prefix)["embeddings"], "wb") as f_out:
+        np.lib.format.write_array_header_1_0(f_out, header)
+        with open(raw_path, "rb") as f_raw:
+            shutil.copyfileobj(f_raw, f_out, length=16 * 1024 * 1024)
+
+
+def save_store(
+    prefix, embeddings, keys, dtype="float32", languages=None, chunk_rows=65536
+):
+    """Saves an in-memory (N, dim) float matrix and its N keys as an embedding store."""
+    matrix = np.asarray(embeddings)
+    if matrix.ndim != 2 or matrix.shape[0] != len(keys):
+        raise ValueError(
+            f"Embedding matrix shape {matrix.shape} does not match {len(keys)} keys."
+        )
+    out = create_embeddings_file(prefix, matrix.shape[0], matrix.shape[1], dtype)
+    scales = np.empty(matrix.shape[0], dtype=np.float32) if dtype == "int8" else None
+    for start in range(0, matrix.shape[0], chunk_rows):
+        stored, block_scales = quantize_rows(matrix[start : start + chunk_rows], dtype)
+        out[start : start + len(stored)] = stored
+        if scales is not None:
+            scales[start : start + len(stored)] = block_scales
+    out.flush()
+    del out
+    save_scales(prefix, scales)
+    vocab_index.save_index(prefix, keys, languages)
+
+
+def load_vocabulary(prefix):
+    """
+    Opens only the vocabulary of an embedding store (no matrix) as a
+    vocab_index.VocabularyIndex.
+    """
+    return vocab_index.load_index(prefix)
+
+
+def load_store(prefix):
+    """
+    Opens an embedding store. Returns (matrix, vocabulary) where `matrix` is a
+    copy-on-write memmap of shape (N, dim) and `vocabulary` a
+    vocab_index.VocabularyIndex.
+    """
+    paths = store_paths(prefix)
+    # mode "c" keeps the pages shared between processes while still giving a
+    # writable array, which torch.from_numpy expects.
+    matrix = np.load(paths["embeddings"], mmap_mode="c")
+    vocabulary = load_vocabulary(prefix)
+    if matrix.ndim != 2 or matrix.shape[0] != len(vocabulary):
+        raise ValueError(
+            f"Embedding store is inconsistent: matrix {matrix.shape}, {len(vocabulary)} keys."
+        )
+    return matrix, vocabulary
+
+
+def load_row_scales(prefix, matrix):
+    """
+    Returns the per-row float32 scales for an int8 matrix (memory-mapped), or
+    None for float stores.
+    """
+    if matrix.dtype != np.int8:
+        return None
+    scales = np.load(store_paths(prefix)["scales"], mmap_mode="c")
+    if scales.shape != (matrix.shape[0],):
+        raise ValueError(
+            f"Embedding store scales have shape {scales.shape}, expected ({matrix.shape[0]},)."
+        )
+    return scales
@@ -0,0 +1,218 @@
+# Character n-gram index for resolving misspelled / inflected words to vocabulary keys.
+#
+# Every term is folded (lowercased, NFD so Hangul syllables become jamo and an
+# inflected Korean form shares most of its n-grams with the stem), padded with
+# boundary markers and cut into n-grams. Each n-gram is hashed into one of
+# NUM_BUCKETS buckets; the index is an inverted list per bucket (CSR: offsets
+# + row postings) plus the number of distinct n-grams per row. A query reads
+# the posting lists of its rarest n-grams first until a posting budget is
+# spent, so its cost is bounded no matter how common its n-grams are, scores
+# the candidates by n-gram overlap (Dice) and re-ranks the best few by edit
+# distance. Everything is saved as .npy files and memory-mapped, like the
+# ANN index.
+
+import os
+import unicodedata
+import zlib
+
+import numpy as np
+
+NGRAM = 2
+NUM_BUCKETS = 1 << 20
+# Longer terms (long phrases) are not indexed; they are never typo targets.
+MAX_TERM_CHARS = 48
+BOUNDARY_START = "\x02"
+BOUNDARY_END = "\x03"
+
+
+def index_paths(prefix):
+    """Returns the file paths that make up a fuzzy index."""
+    return {
+        "bucket_offsets": f"{prefix}_bucket_offsets.npy",
+        "postings": f"{prefix}_postings.npy",
+        "gram_counts": f"{prefix}_gram_counts.npy",
+    }
+
+
+def index_exists(prefix):
+    """True if every file of the index is present on disk."""
+    return all(os.path.exists(path) for path in index_paths(prefix).values())
+
+
+def fold(term):
+    """Lowercased, NFD-decomposed form used for n-grams and edit distance."""
+    return unicodedata.normalize("NFD", term.lower())
+
+
+def ngrams(folded):
+    """Distinct boundary-padded character n-grams of a folded term."""
+    padded = BOUNDARY_START + folded + BOUNDARY_END
+    return {padded[i : i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def _bucket(gram):
+    return zlib.crc32(gram.encode("utf-8")) % NUM_BUCKETS
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent
+    transpositions), or max_distance + 1 as soon as it is known to exceed it.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost
+            )
+            if (
+                previous_previous is not None
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def build_index(vocabulary):
+    """
+    Builds the n-gram index over every term of a vocab_index.VocabularyIndex
+    (rows line up with the embedding store). Returns the arrays as a dict
+    (see save_index).
+    """
+    num_rows = len(vocabulary)
+    gram_counts = np.zeros(num_rows, dtype=np.uint16)
+    bucket_cache = {}
+    buckets = []
+    rows = []
+    for row in range(num_rows):
+        term = vocabulary.term_at(row)
+        if len(term) > MAX_TERM_CHARS:
+            continue
+        grams = ngrams(fold(term))
+        gram_counts[row] = len(grams)
+        for gram in grams:
+            bucket = bucket_cache.get(gram)
+            if bucket is None:
+                bucket = bucket_cache[gram] = _bucket(gram)
+            buckets.append(bucket)
+        rows.extend([row] * len(grams))
+
+    buckets = np.asarray(buckets, dtype=np.int64)
+    # Rows are already increasing, so a stable sort keeps each posting list sorted.
+    order = np.argsort(buckets, kind="stable")
+    bucket_offsets = np.zeros(NUM_BUCKETS + 1, dtype=np.int64)
+    np.cumsum(np.bincount(buckets, minlength=NUM_BUCKETS), out=bucket_offsets[1:])
+    return {
+        "bucket_offsets": bucket_offsets,
+        "postings": np.asarray(rows, dtype=np.int32)[order],
+        "gram_counts": gram_counts,
+    }
+
+
+def save_index(prefix, arrays):
+    """Writes the arrays returned by build_index as .npy files."""
+    for name, path in index_paths(prefix).items():
+        np.save(path, arrays[name])
+
+
+class FuzzyIndex:
+    """
+    Loaded n-gram index. Postings are memory-mapped. Queries take the
+    VocabularyIndex the index was built from (same rows, possibly remapped).
+    """
+
+    def __init__(self, prefix):
+        paths = index_paths(prefix)
+        self.bucket_offsets = np.load(paths["bucket_offsets"], mmap_mode="r")
+        self.postings = np.load(paths["postings"], mmap_mode="r")
+        self.gram_counts = np.load(paths["gram_counts"], mmap_mode="r")
+
+    def __len__(self):
+        return len(self.gram_counts)
+
+    def candidates(
+        self, vocabulary, folded, lang, max_postings=200000, max_candidates=32
+    ):
+        """
+        Rows of `lang` sharing the most n-grams with a folded term, as
+        (rows, dice scores) sorted best first. Reads at most `max_postings`
+        postings, rarest n-grams first.
+        """
+        if lang not in vocabulary.languages:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        lang_id = vocabulary.languages.index(lang)
+        grams = ngrams(folded)
+        buckets = np.unique([_bucket(gram) for gram in grams])
+        starts = np.asarray(self.bucket_offsets[buckets])
+        sizes = np.asarray(self.bucket_offsets[buckets + 1]) - starts
+
+        parts = []
+        budget = max_postings
+        for position in np.argsort(sizes, kind="stable"):
+            if sizes[position] == 0:
+                continue
+            if sizes[position] > budget:
+                break
+            start = starts[position]
+            parts.append(self.postings[start : start + sizes[position]])
+            budget -= sizes[position]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows, overlap = np.unique(np.concatenate(parts), return_counts=True)
+        keep = np.asarray(vocabulary.row_langs[rows]) == lang_id
+        rows, overlap = rows[keep], overlap[keep]
+        dice = (2.0 * overlap / (len(grams) + self.gram_counts[rows])).astype(
+            np.float32
+        )
+        if len(rows) > max_candidates:
+            top = np.argpartition(-dice, max_candidates - 1)[:max_candidates]
+            rows, dice = rows[top], dice[top]
+        order = np.argsort(-dice, kind="stable")
+        return rows[order].astype(np.int64), dice[order]
+
+    def best_match(
+        self,
+        vocabulary,
+        term,
+        lang,
+        max_distance=2,
+        max_postings=200000,
+        max_candidates=32,
+    ):
+        """
+        Closest vocabulary row to `term` in `lang` by edit distance (on the
+        folded forms) among the n-gram candidates. Returns (row, distance) or
+        None if nothing is within max_distance.
+        """
+        folded = fold(term)
+        rows, dice = self.candidates(
+            vocabulary, folded, lang, max_postings, max_candidates
+        )
+        best = None
+        for row, score in zip(rows.tolist(), dice.tolist()):
+            distance = edit_distance(
+                folded, fold(vocabulary.term_at(row)), max_distance
+            )
+            if distance > max_distance:
+                continue
+            # Fewest edits first, then the larger n-gram overlap.
+            rank = (distance, -score)
+            if best is None or rank < best[0]:
+                best = (rank, row, distance)
+        return None if best is None else (best[1], best[2])
+
+
+def load_index(prefix):
+    """Opens the fuzzy index written by save_index."""
+    return FuzzyIndex(prefix)
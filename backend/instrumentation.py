@@ -0,0 +1,246 @@
+# Metrics and logging for the serving path.
+#
+# Counters and latency histograms are plain in-process objects (one lock each,
+# no dependencies) registered in REGISTRY and rendered in the Prometheus text
+# exposition format by render_prometheus(), which app.py serves at /metrics.
+# Values that already live elsewhere (cache counters, model state) are
+# registered as callback metrics and read at scrape time.
+#
+# Diagnostics go through the "shape_of_words" logger instead of print().
+# Per-word messages on the request path are logged at DEBUG, or sampled with
+# log_every_n so a burst of OOV words doesn't flood the log.
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LOGGER_NAME = "shape_of_words"
+
+# Latency buckets in seconds, from cache hits (~us) to cold loads.
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+def get_logger(name):
+    """Logger below the shared "shape_of_words" logger."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def configure_logging(level="INFO"):
+    """Sends "shape_of_words" records to stderr at `level`. Idempotent."""
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+        logger.addHandler(handler)
+    return logger
+
+
+_sample_counts = {}
+_sample_lock = threading.Lock()
+
+
+def log_every_n(logger, level, key, n, msg, *args):
+    """
+    Logs the 1st, (n+1)th, (2n+1)th... record for `key`, with the number of
+    occurrences so far. The message is only formatted when it is emitted.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    with _sample_lock:
+        count = _sample_counts.get(key, 0) + 1
+        _sample_counts[key] = count
+    if (count - 1) % n == 0:
+        logger.log(level, msg + " (occurrence %d, logged 1 in %d)", *args, count, n)
+
+
+def _label_key(labelnames, labels):
+    if len(labels) != len(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {labels}.")
+    return tuple(str(value) for value in labels)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        name
+        + '="'
+        + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            (self.name + _format_labels(self.labelnames, key), value)
+            for key, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram (seconds) with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        key = _label_key(self.labelnames, labels)
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[position] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, *labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(counts)) for key, counts in self._values.items())
+        lines = []
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    (
+                        self.name
+                        + "_bucket"
+                        + _format_labels(self.labelnames, key, [("le", le)]),
+                        cumulative,
+                    )
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append((self.name + "_sum" + labels, counts[-1]))
+            lines.append((self.name + "_count" + labels, cumulative))
+        return lines
+
+
+class CallbackMetric:
+    """Gauge (or counter) whose samples are produced at scrape time by `collect()`."""
+
+    def __init__(self, name, documentation, collect, kind="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self._collect = collect
+        self.kind = kind
+
+    def samples(self):
+        """collect() returns a number or a list of (labels dict, number)."""
+        values = self._collect()
+        if not isinstance(values, list):
+            values = [({}, values)]
+        return [
+            (self.name + _format_labels((), (), sorted(labels.items())), value)
+            for labels, value in values
+            if value is not None
+        ]
+
+
+REGISTRY = {}
+
+
+def _register(metric):
+    if metric.name in REGISTRY:
+        return REGISTRY[metric.name]
+    REGISTRY[metric.name] = metric
+    return metric
+
+
+def counter(name, documentation, labelnames=()):
+    return _register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def callback_metric(name, documentation, collect, kind="gauge"):
+    return _register(CallbackMetric(name, documentation, collect, kind))
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def render_prometheus():
+    """All registered metrics in the Prometheus text format (version 0.0.4)."""
+    lines = []
+    for metric in REGISTRY.values():
+        try:
+            samples = metric.samples()
+        except Exception as e:
+            get_logger("instrumentation").warning(
+                "Collecting metric %s failed: %s", metric.name, e
+            )
+            continue
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(f"{name} {_format_value(value)}" for name, value in samples)
+    return "\n".join(lines) + "\n"
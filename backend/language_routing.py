@@ -0,0 +1,118 @@
+# Writing-system classification used to route request words to /c/<lang>/.
+#
+# A word's script is read off a precompiled codepoint table instead of a
+# per-character Python loop: a batch of words is joined, encoded as UTF-32 and
+# turned into one array of codepoints, each codepoint is mapped to a script
+# bit by one table lookup, and the bits are OR-ed per word with
+# np.bitwise_or.reduceat. The combined mask picks the word's script by
+# priority (a word with any Hangul is Korean, kana beats Han, ...), and the
+# script maps to its candidate languages, in priority order, through a table
+# built once per SUPPORTED_LANGUAGES. The per-word cost therefore doesn't grow
+# with the number of supported languages; choosing between several
+# candidates (e.g. Latin -> en, fr) is left to utils.choose_word_languages.
+
+import numpy as np
+
+# Script bits; a word's mask is the OR of the bits of its characters.
+LATIN = 1
+CYRILLIC = 2
+HAN = 4
+KANA = 8
+HANGUL = 16
+SCRIPT_NAMES = {
+    LATIN: "latin",
+    CYRILLIC: "cyrillic",
+    HAN: "han",
+    KANA: "kana",
+    HANGUL: "hangul",
+}
+# Highest priority first. Words without any letters (digits, punctuation) are
+# treated as Latin, as they were before scripts were distinguished.
+SCRIPT_PRIORITY = (HANGUL, KANA, HAN, CYRILLIC, LATIN)
+DEFAULT_SCRIPT = LATIN
+
+_SCRIPT_RANGES = (
+    (LATIN, 0x0041, 0x005A),
+    (LATIN, 0x0061, 0x007A),
+    (LATIN, 0x00C0, 0x00D6),
+    (LATIN, 0x00D8, 0x00F6),
+    (LATIN, 0x00F8, 0x024F),
+    (LATIN, 0x1E00, 0x1EFF),
+    (CYRILLIC, 0x0400, 0x052F),
+    (HAN, 0x3400, 0x4DBF),
+    (HAN, 0x4E00, 0x9FFF),
+    (HAN, 0xF900, 0xFAFF),
+    (KANA, 0x3040, 0x30FF),
+    (KANA, 0x31F0, 0x31FF),
+    (KANA, 0xFF66, 0xFF9F),
+    (HANGUL, 0x1100, 0x11FF),
+    (HANGUL, 0x3130, 0x318F),
+    (HANGUL, 0xA960, 0xA97F),
+    (HANGUL, 0xAC00, 0xD7A3),
+    (HANGUL, 0xD7B0, 0xD7FF),
+)
+# Supplementary CJK ideographs (extensions B and later) are checked by range.
+_SUPPLEMENTARY_HAN = (0x20000, 0x323AF)
+
+# Codepoint -> script bit for the Basic Multilingual Plane (64 KB).
+CODEPOINT_SCRIPTS = np.zeros(0x10000, dtype=np.uint8)
+for _bit, _first, _last in _SCRIPT_RANGES:
+    CODEPOINT_SCRIPTS[_first : _last + 1] = _bit
+
+# Script mask -> the word's script (highest-priority bit present).
+MASK_SCRIPTS = np.full(2 ** len(SCRIPT_PRIORITY), DEFAULT_SCRIPT, dtype=np.uint8)
+for _mask in range(1, len(MASK_SCRIPTS)):
+    MASK_SCRIPTS[_mask] = next(bit for bit in SCRIPT_PRIORITY if _mask & bit)
+
+
+def classify_scripts(words):
+    """Script bit (LATIN, HANGUL, ...) of each word, as a uint8 array."""
+    if not words:
+        return np.empty(0, dtype=np.uint8)
+    codes = np.frombuffer("".join(words).encode("utf-32-le"), dtype=np.uint32)
+    bits = CODEPOINT_SCRIPTS[np.minimum(codes, 0xFFFF)]
+    first, last = _SUPPLEMENTARY_HAN
+    bits[(codes >= first) & (codes <= last)] = HAN
+
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+    masks = np.zeros(len(words), dtype=np.uint8)
+    nonempty = lengths > 0
+    if len(codes):
+        starts = (np.cumsum(lengths) - lengths)[nonempty]
+        masks[nonempty] = np.bitwise_or.reduceat(bits, starts)
+    return MASK_SCRIPTS[masks]
+
+
+def build_candidate_table(script_languages, supported_languages):
+    """
+    Script bit -> tuple of candidate languages, in priority order, keeping only
+    supported languages. Scripts without a supported language map to ().
+    """
+    return {
+        bit: tuple(
+            lang
+            for lang in script_languages.get(name, ())
+            if lang in supported_languages
+        )
+        for bit, name in SCRIPT_NAMES.items()
+    }
+
+
+_candidate_tables = {}
+
+
+def candidate_languages(words, script_languages, supported_languages):
+    """
+    Candidate languages of each word (a tuple, possibly empty), from its
+    script. The table is built once per (script_languages, supported) config.
+    """
+    config = (
+        tuple((name, tuple(langs)) for name, langs in script_languages.items()),
+        tuple(supported_languages),
+    )
+    table = _candidate_tables.get(config)
+    if table is None:
+        table = _candidate_tables[config] = build_candidate_table(
+            script_languages, supported_languages
+        )
+    return [table[bit] for bit in classify_scripts(words).tolist()]
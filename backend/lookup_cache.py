@@ -0,0 +1,77 @@
+# Bounded LRU/TTL cache for the word lookup and projection hot paths.
+#
+# Game traffic is skewed towards a few pivot words and common guesses, so
+# utils keeps the resolved row index and the 2D coordinates of recently used
+# words here. Negative (OOV) results are cached too. Callers put the model
+# version into the key and clear the cache when a model is reloaded/retrained.
+
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by LRUCache.get on a miss, since None is a valid cached value.
+MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional time-to-live and hit/miss counters."""
+
+    def __init__(self, maxsize, ttl_seconds=None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Returns the cached value or MISSING."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry. Counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
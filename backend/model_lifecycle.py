@@ -0,0 +1,119 @@
+# Lifecycle of the serving models in one process.
+#
+# The models are loaded by a single background thread: the first start()
+# launches it and every later call is a no-op while it runs or once it has
+# succeeded, so concurrent requests never start duplicate loads. Request
+# handlers don't load, download or train anything themselves; they check
+# whether what they need is available and answer 503 otherwise.
+#
+#   idle      nothing started yet
+#   loading   the loader is running; capabilities appear as they are mapped
+#             (e.g. the coordinate table before the embeddings)
+#   ready     the loader finished and every required capability is available
+#   degraded  the loader finished (or failed) without some required
+#             capability; `missing` says which. Endpoints that don't need it
+#             keep working. start() retries.
+
+import threading
+import time
+
+import instrumentation
+
+IDLE = "idle"
+LOADING = "loading"
+READY = "ready"
+DEGRADED = "degraded"
+STATES = (IDLE, LOADING, READY, DEGRADED)
+
+logger = instrumentation.get_logger("model_lifecycle")
+
+
+class ModelLifecycle:
+    """
+    State of the models plus the single-flight loader. `load` maps the models
+    and returns the required capabilities that are still missing (an empty
+    list when everything is loaded).
+    """
+
+    def __init__(self, load):
+        self._load = load
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self.state = IDLE
+        self.missing = []
+        self.error = None
+        self.attempts = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self, retry_degraded=True):
+        """
+        Starts the background loader unless it is running or the models are
+        ready (or degraded, with retry_degraded=False). Returns the state.
+        """
+        with self._lock:
+            if self.state in (LOADING, READY) or (
+                self.state == DEGRADED and not retry_degraded
+            ):
+                return self.state
+            self.state = LOADING
+            self.error = None
+            self.attempts += 1
+            self.started_at = time.time()
+            self.finished_at = None
+            self._finished.clear()
+            threading.Thread(target=self._run, name="model-loader", daemon=True).start()
+            return self.state
+
+    def _run(self):
+        missing, error = [], None
+        try:
+            missing = list(self._load())
+        except Exception as e:
+            logger.exception("Model loading failed.")
+            error = str(e)
+        with self._lock:
+            self.missing = missing
+            self.error = error
+            self.state = READY if not missing and error is None else DEGRADED
+            self.finished_at = time.time()
+        self._finished.set()
+        if self.state == READY:
+            logger.info(
+                f"Models ready after {self.finished_at - self.started_at:.1f}s."
+            )
+        else:
+            logger.critical(
+                f"Models degraded: missing {missing or 'everything'}"
+                + (f" ({error})" if error else "")
+                + ". Prepare the artifacts with scripts/prepare_artifacts.py."
+            )
+
+    def wait(self, timeout=None):
+        """
+        Starts the loader if it hasn't run yet and blocks until it finishes
+        (or `timeout` seconds pass). Returns the state.
+        """
+        self.start(retry_degraded=False)
+        self._finished.wait(timeout)
+        return self.state
+
+    @property
+    def finished(self):
+        """True once a load attempt has finished (ready or degraded)."""
+        return self.state in (READY, DEGRADED)
+
+    def status(self):
+        """The state as a dict, for the health endpoints and 503 bodies."""
+        with self._lock:
+            status = {
+                "state": self.state,
+                "missing": list(self.missing),
+                "attempts": self.attempts,
+            }
+            if self.error is not None:
+                status["error"] = self.error
+            if self.started_at is not None:
+                end = self.finished_at or time.time()
+                status["loading_seconds"] = round(end - self.started_at, 3)
+            return status
@@ -0,0 +1,39 @@
+# Download of the raw ConceptNet Numberbatch dump. Only needed offline, when
+# preparing the embedding store; `requests` is imported here and nowhere on
+# the serving path.
+
+import os
+
+
+def download_numberbatch_raw_file(url, path):
+    """Downloads the ConceptNet Numberbatch raw .txt.gz file if it doesn't exist."""
+    import requests
+
+    if os.path.exists(path):
+        print(f"Multilingual Numberbatch raw file {path} already exists.")
+        return True
+
+    print(f"Downloading FULL Multilingual ConceptNet Numberbatch from {url}...")
+    print(
+        "WARNING: This is a very large file and may take a long time and significant disk space."
+    )
+    # Written next to the target and renamed when complete, so an interrupted
+    # download is never mistaken for the dump.
+    partial_path = f"{path}.partial"
+    try:
+        response = requests.get(url, stream=True)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        with open(partial_path, "wb") as f:
+            for chunk in response.iter_content(
+                chunk_size=1024 * 1024
+            ):  # Larger chunk size for large file
+                f.write(chunk)
+                print(".", end="", flush=True)  # Progress indicator
+        os.replace(partial_path, path)
+        print(f"\nDownloaded to {path}")
+    except requests.exceptions.RequestException as e:
+        print(f"Error downloading Numberbatch: {e}")
+        if os.path.exists(partial_path):  # Clean up partial download
+            os.remove(partial_path)
+        return False
+    return True
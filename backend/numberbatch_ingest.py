@@ -0,0 +1,145 @@
+# Streaming, parallel parser for the ConceptNet Numberbatch text dump.
+#
+# Lines are read straight from the .gz (no decompressed copy on disk), rows of
+# unsupported languages are dropped by a byte-prefix check before any float is
+# parsed, and the remaining rows are parsed in chunks by a process pool. Parsed
+# chunks are appended to a raw spill file, so peak memory is bounded by the
+# number of chunks in flight rather than by the vocabulary size.
+# Rows are converted to the store dtype (float32, float16 or int8 with per-row
+# scales) in the workers.
+
+import gzip
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import embedding_store
+import vocab_index
+
+DEFAULT_CHUNK_LINES = 20000
+
+
+def _parse_vector_chunk(lines, dim, dtype):
+    """
+    Parses raw b'<key> <v1> ... <vdim>' lines into a preallocated (n, dim) array
+    and converts it to the store dtype. Returns (keys, rows, scales); scales is
+    None unless dtype is int8. Lines with the wrong number of values are skipped.
+    Runs in a worker process.
+    """
+    keys = []
+    values = []
+    for line in lines:
+        key, _, vector_text = line.rstrip().partition(b" ")
+        if vector_text.count(b" ") != dim - 1:
+            continue
+        keys.append(key.decode("utf-8"))
+        values.append(vector_text)
+
+    out = np.empty((len(keys), dim), dtype=np.float32)
+    if keys:
+        flat = np.fromstring(b" ".join(values), dtype=np.float32, sep=" ")
+        if flat.size == out.size:
+            out[:] = flat.reshape(len(keys), dim)
+        else:
+            # A malformed number somewhere in the chunk; fall back to per-row parsing.
+            good = []
+            for i, vector_text in enumerate(values):
+                row = np.fromstring(vector_text, dtype=np.float32, sep=" ")
+                if row.size == dim:
+                    out[len(good)] = row
+                    good.append(keys[i])
+            keys = good
+            out = out[: len(keys)]
+    stored, scales = embedding_store.quantize_rows(out, dtype)
+    return keys, stored, scales
+
+
+def _iter_candidate_chunks(f_in, prefixes, chunk_lines):
+    """Yields lists of raw lines whose key starts with one of `prefixes`."""
+    chunk = []
+    for line in f_in:
+        if line.startswith(prefixes):
+            chunk.append(line)
+            if len(chunk) >= chunk_lines:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def open_numberbatch_source(path):
+    """Opens a Numberbatch dump for binary line reading, decompressing .gz on the fly."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def ingest_numberbatch(
+    source_path,
+    store_prefix,
+    languages,
+    dtype="float32",
+    chunk_lines=DEFAULT_CHUNK_LINES,
+    max_workers=None,
+):
+    """
+    Parses the Numberbatch dump at `source_path` into an embedding store at
+    `store_prefix`, keeping only '/c/<lang>/' keys for `languages`.
+    Returns (rows, dim) of the written matrix.
+    """
+    prefixes = tuple(f"/c/{lang}/".encode("utf-8") for lang in languages)
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * 2
+    spill_path = f"{store_prefix}_embeddings.raw.partial"
+
+    keys = []
+    scales = [] if dtype == "int8" else None
+    rows = 0
+    try:
+        with open_numberbatch_source(source_path) as f_in, open(
+            spill_path, "wb"
+        ) as f_spill, ProcessPoolExecutor(max_workers=max_workers) as pool:
+            # First line is header (e.g., "9161912 300")
+            num_embeddings_header, dim = map(int, f_in.readline().split())
+            print(
+                f"Header indicates {num_embeddings_header} total embeddings of dim {dim}. "
+                f"Filtering for {list(languages)} with {max_workers} workers..."
+            )
+
+            pending = deque()
+
+            def _write_oldest():
+                nonlocal rows
+                chunk_keys, chunk_rows, chunk_scales = pending.popleft().result()
+                f_spill.write(chunk_rows.tobytes())
+                keys.extend(chunk_keys)
+                if scales is not None:
+                    scales.append(chunk_scales)
+                previous = rows
+                rows += len(chunk_keys)
+                if rows // 50000 != previous // 50000:
+                    print(f"Processed {rows} embeddings...")
+
+            for chunk in _iter_candidate_chunks(f_in, prefixes, chunk_lines):
+                pending.append(pool.submit(_parse_vector_chunk, chunk, dim, dtype))
+                if len(pending) >= max_in_flight:
+                    _write_oldest()
+            while pending:
+                _write_oldest()
+
+        if rows == 0:
+            raise ValueError(f"No embeddings for {list(languages)} in {source_path}.")
+
+        embedding_store.write_embeddings_from_raw(
+            store_prefix, spill_path, rows, dim, dtype
+        )
+        embedding_store.save_scales(
+            store_prefix, None if scales is None else np.concatenate(scales)
+        )
+        vocab_index.save_index(store_prefix, keys, languages)
+    finally:
+        if os.path.exists(spill_path):
+            os.remove(spill_path)
+    return rows, dim
@@ -0,0 +1,102 @@
+# Lightweight linear projector for the 2D PCA map, with no scikit-learn at runtime.
+#
+# sklearn's PCA.transform validates dtype, shape and feature names on every
+# call, which costs far more than the 600 multiply-adds of a 1x300 projection.
+# PCAProjector keeps only what the projection needs (components_, mean_ and,
+# for whitened models, explained_variance_) as contiguous float32 arrays and
+# folds the centring into a bias: coords = X @ components_t + bias.
+#
+# Projectors are saved as a small .npz. A fitted sklearn PCA/IncrementalPCA
+# (e.g. the old pca_model_enko.joblib) is converted with from_model.
+
+import numpy as np
+
+
+class PCAProjector:
+    """Fitted linear projection X -> (X - mean_) @ components_.T (optionally whitened)."""
+
+    def __init__(
+        self,
+        components,
+        mean,
+        explained_variance=None,
+        explained_variance_ratio=None,
+        whiten=False,
+    ):
+        self.components_ = np.ascontiguousarray(components, dtype=np.float32)
+        self.mean_ = np.ascontiguousarray(mean, dtype=np.float32)
+        self.n_components_, self.n_features_in_ = self.components_.shape
+        if self.mean_.shape != (self.n_features_in_,):
+            raise ValueError(
+                f"PCA mean has shape {self.mean_.shape}, expected ({self.n_features_in_},)."
+            )
+        self.explained_variance_ = (
+            None
+            if explained_variance is None
+            else np.asarray(explained_variance, dtype=np.float32)
+        )
+        self.explained_variance_ratio_ = (
+            None
+            if explained_variance_ratio is None
+            else np.asarray(explained_variance_ratio, dtype=np.float32)
+        )
+        self.whiten = bool(whiten)
+        if self.whiten and self.explained_variance_ is None:
+            raise ValueError("A whitened PCA projector needs explained_variance.")
+
+        # (dim, k) so a batch is one (n, dim) @ (dim, k) matmul.
+        self.components_t = np.ascontiguousarray(self.components_.T)
+        self.bias = -(self.mean_ @ self.components_t)
+        self.scale = np.sqrt(self.explained_variance_) if self.whiten else None
+
+    @classmethod
+    def from_model(cls, model):
+        """Copies the projection out of a fitted sklearn PCA-like model."""
+        return cls(
+            model.components_,
+            model.mean_,
+            getattr(model, "explained_variance_", None),
+            getattr(model, "explained_variance_ratio_", None),
+            getattr(model, "whiten", False),
+        )
+
+    def transform(self, X):
+        """
+        Projects a (dim,) vector or an (n, dim) batch to (k,) / (n, k) float32.
+        No validation beyond the matmul's own shape check.
+        """
+        coords = np.asarray(X, dtype=np.float32) @ self.components_t + self.bias
+        if self.scale is not None:
+            coords /= self.scale
+        return coords
+
+    def save(self, path):
+        """Writes the projector as an .npz file."""
+        arrays = {
+            "components": self.components_,
+            "mean": self.mean_,
+            "whiten": np.array(self.whiten),
+        }
+        if self.explained_variance_ is not None:
+            arrays["explained_variance"] = self.explained_variance_
+        if self.explained_variance_ratio_ is not None:
+            arrays["explained_variance_ratio"] = self.explained_variance_ratio_
+        # np.savez appends .npz to other names; write through a file object instead.
+        with open(path, "wb") as f_out:
+            np.savez(f_out, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a projector written by save."""
+        with np.load(path) as data:
+            return cls(
+                data["components"],
+                data["mean"],
+                data["explained_variance"] if "explained_variance" in data else None,
+                (
+                    data["explained_variance_ratio"]
+                    if "explained_variance_ratio" in data
+                    else None
+                ),
+                bool(data["whiten"]),
+            )
@@ -0,0 +1,173 @@
+# Precomputed catalogue of pivot words for the game.
+#
+# A round starts from a pivot word. Instead of scanning the EN/KO matrix per
+# round, an offline job (preparation.build_and_save_pivot_catalogue_pytorch)
+# picks a curated pool of pivots per language and stores, for each, its top-k
+# neighbours, quantiles of its similarity to a fixed sample of the
+# vocabulary (what a "good" guess looks like for this pivot) and its 2D
+# coordinates. The table is a handful of .npy files, sorted by (language,
+# row) and memory-mapped, so picking a random pivot or looking one up is a
+# constant-time read.
+
+import os
+import re
+
+import numpy as np
+
+
+def catalogue_paths(prefix):
+    """Returns the file paths that make up a pivot catalogue."""
+    return {
+        "rows": f"{prefix}_rows.npy",
+        "lang_offsets": f"{prefix}_lang_offsets.npy",
+        "languages": f"{prefix}_languages.npy",
+        "neighbour_rows": f"{prefix}_neighbour_rows.npy",
+        "neighbour_scores": f"{prefix}_neighbour_scores.npy",
+        "quantile_levels": f"{prefix}_quantile_levels.npy",
+        "quantiles": f"{prefix}_quantiles.npy",
+        "coords": f"{prefix}_coords.npy",
+        "vocabulary_size": f"{prefix}_vocabulary_size.npy",
+    }
+
+
+def catalogue_exists(prefix):
+    """True if every file of the catalogue is present on disk."""
+    return all(os.path.exists(path) for path in catalogue_paths(prefix).values())
+
+
+def select_pivot_rows(
+    vocabulary, lang, count, term_pattern, frequency_words=None, usable=None
+):
+    """
+    Up to `count` candidate pivot rows of `lang`: single terms matching
+    `term_pattern` (a regex for the whole term), in frequency-list order if
+    `frequency_words` is given (words not in it are never picked), otherwise
+    in vocabulary order. `usable` is an optional boolean mask over rows (e.g.
+    non-zero vectors).
+    """
+    pattern = re.compile(term_pattern)
+    if frequency_words is not None:
+        candidates = (vocabulary.lookup(word, lang) for word in frequency_words)
+    else:
+        lang_id = vocabulary.languages.index(lang)
+        candidates = np.flatnonzero(
+            np.asarray(vocabulary.row_langs) == lang_id
+        ).tolist()
+
+    rows = []
+    seen = set()
+    for row in candidates:
+        if row < 0 or row in seen or (usable is not None and not usable[row]):
+            continue
+        if pattern.fullmatch(vocabulary.term_at(row)):
+            rows.append(row)
+            seen.add(row)
+            if len(rows) == count:
+                break
+    return rows
+
+
+def build_catalogue(
+    pivot_langs,
+    pivot_rows,
+    neighbour_rows,
+    neighbour_scores,
+    quantile_levels,
+    quantiles,
+    coords,
+    vocabulary_size,
+):
+    """
+    Packs per-pivot results into the on-disk layout: sorted by (language,
+    row) with per-language offsets. `pivot_langs` is a list with the language
+    of each pivot. Scores and quantiles are stored as float16.
+    """
+    languages = sorted(set(pivot_langs), key=pivot_langs.index)
+    lang_ids = np.array([languages.index(lang) for lang in pivot_langs])
+    pivot_rows = np.asarray(pivot_rows, dtype=np.int64)
+    order = np.lexsort((pivot_rows, lang_ids))
+    lang_offsets = np.zeros(len(languages) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(lang_ids, minlength=len(languages)), out=lang_offsets[1:])
+    return {
+        "rows": pivot_rows[order].astype(np.int32),
+        "lang_offsets": lang_offsets,
+        "languages": np.asarray(languages, dtype=str),
+        "neighbour_rows": np.asarray(neighbour_rows, dtype=np.int32)[order],
+        "neighbour_scores": np.asarray(neighbour_scores, dtype=np.float16)[order],
+        "quantile_levels": np.asarray(quantile_levels, dtype=np.float32),
+        "quantiles": np.asarray(quantiles, dtype=np.float16)[order],
+        "coords": np.asarray(coords, dtype=np.float32)[order],
+        "vocabulary_size": np.asarray(vocabulary_size, dtype=np.int64),
+    }
+
+
+def save_catalogue(prefix, arrays):
+    """Writes the arrays returned by build_catalogue as .npy files."""
+    for name, path in catalogue_paths(prefix).items():
+        np.save(path, arrays[name])
+
+
+class PivotCatalogue:
+    """Loaded pivot catalogue. The per-pivot arrays are memory-mapped."""
+
+    def __init__(self, prefix):
+        paths = catalogue_paths(prefix)
+        self.rows = np.load(paths["rows"], mmap_mode="r")
+        self.lang_offsets = np.load(paths["lang_offsets"])
+        self.languages = [str(lang) for lang in np.load(paths["languages"])]
+        self.neighbour_rows = np.load(paths["neighbour_rows"], mmap_mode="r")
+        self.neighbour_scores = np.load(paths["neighbour_scores"], mmap_mode="r")
+        self.quantile_levels = np.load(paths["quantile_levels"]).tolist()
+        self.quantiles = np.load(paths["quantiles"], mmap_mode="r")
+        self.coords = np.load(paths["coords"], mmap_mode="r")
+        self.vocabulary_size = int(np.load(paths["vocabulary_size"]))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def language_range(self, lang):
+        """(start, end) positions of the pivots of `lang`; empty if it has none."""
+        if lang not in self.languages:
+            return 0, 0
+        lang_id = self.languages.index(lang)
+        return int(self.lang_offsets[lang_id]), int(self.lang_offsets[lang_id + 1])
+
+    def position_of(self, row, lang):
+        """Position of vocabulary row `row` among the pivots of `lang`, or -1."""
+        start, end = self.language_range(lang)
+        position = start + int(np.searchsorted(self.rows[start:end], row))
+        if position < end and self.rows[position] == row:
+            return position
+        return -1
+
+    def random_position(self, rng, lang=None):
+        """Uniformly random pivot position (of `lang` if given), or -1 if none."""
+        start, end = (0, len(self)) if lang is None else self.language_range(lang)
+        if start == end:
+            return -1
+        return rng.randrange(start, end)
+
+    def language_at(self, position):
+        lang_id = int(np.searchsorted(self.lang_offsets, position, side="right")) - 1
+        return self.languages[lang_id]
+
+    def entry(self, position, k=None):
+        """
+        Raw entry of a pivot: {"row", "lang", "coords", "neighbour_rows",
+        "neighbour_scores", "quantiles"}, with at most k neighbours.
+        """
+        return {
+            "row": int(self.rows[position]),
+            "lang": self.language_at(position),
+            "coords": self.coords[position].tolist(),
+            "neighbour_rows": self.neighbour_rows[position, :k].tolist(),
+            "neighbour_scores": self.neighbour_scores[position, :k]
+            .astype(np.float32)
+            .tolist(),
+            "quantiles": self.quantiles[position].astype(np.float32).tolist(),
+        }
+
+
+def load_catalogue(prefix):
+    """Opens the pivot catalogue written by save_catalogue."""
+    return PivotCatalogue(prefix)
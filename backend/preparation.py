@@ -0,0 +1,1318 @@
+# Offline preparation of the EN/KO serving artifacts: parsing the Numberbatch
+# dump into the embedding store, fitting the PCA projector, projecting the
+# coordinate table, building the ANN and fuzzy (OOV) indexes and the pivot
+# catalogue, and pruning the vocabulary into the smaller serving set.
+#
+# Serving only maps the finished artifacts (see utils.py), so this module and
+# its heavy dependencies (torch, scikit-learn, the ingest process pool) are
+# imported lazily, from the prepare scripts or, if
+# utils.PREPARE_MISSING_ARTIFACTS is set, by the app's background loader when
+# the artifacts are missing.
+# Results are published through the utils globals.
+#
+# Every artifact is written to staging paths, published with os.replace and
+# recorded in the build manifest (see artifact_manifest.py) with the inputs
+# it was built from; prepare_artifacts uses those records to rebuild only the
+# stages whose inputs changed. Every builder holds the data directory's build
+# lock (artifact_manifest.build_lock), so concurrent builds, e.g. a script and
+# a server preparing at the same time, run one after the other.
+
+import functools
+import os
+import time
+
+import numpy as np
+import torch
+
+import ann_index
+import artifact_manifest
+import embedding_store
+import fuzzy_index
+import numberbatch_download
+import numberbatch_ingest
+import pca_projector
+import pivot_catalogue
+import utils
+import vocab_index
+import vocabulary_pruning
+
+# --- Build manifest ---
+
+# Version of each producer, recorded with its artifacts. Bump one when its
+# output changes for the same inputs, so prepare_artifacts rebuilds the stage.
+PRODUCER_VERSIONS = {
+    "source": 1,  # input files we don't produce (dump, frequency lists)
+    "download": 1,
+    "embedding_store": 1,
+    "pca_sample": 1,
+    "pca_projector": 1,
+    "coordinate_table": 1,
+    "fuzzy_index": 1,
+    "ann_index": 1,
+    "pivot_catalogue": 1,
+    "pruned_store": 1,
+    "pruned_table": 1,
+}
+
+
+def _verified_entry(path, paths):
+    """Manifest entry of the artifact at `path` if it is recorded and its files verify."""
+    entry, problem = artifact_manifest.verify_artifact(
+        utils.ARTIFACT_MANIFEST_PATH, artifact_manifest.artifact_name(path), paths
+    )
+    return None if problem else entry
+
+
+def _content_hash(path, paths):
+    entry = _verified_entry(path, paths)
+    return None if entry is None else entry["content_hash"]
+
+
+def _source_hash(path):
+    """
+    Content hash of an input file we don't produce (the raw dump, a frequency
+    list), recorded on first use. None if there is no file.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    paths = {"file": path}
+    entry = _verified_entry(path, paths)
+    if entry is None:
+        entry = artifact_manifest.record_artifact(
+            utils.ARTIFACT_MANIFEST_PATH,
+            artifact_manifest.artifact_name(path),
+            paths,
+            "source",
+            PRODUCER_VERSIONS["source"],
+            {},
+        )
+    return entry["content_hash"]
+
+
+def _publish_artifact(stage, path, paths, staged_paths, inputs, **record):
+    """
+    Moves a staged build of the artifact at `path` into place and records it
+    (see artifact_manifest.record_artifact for `record`). Returns the entry.
+    """
+    artifact_manifest.publish(staged_paths, paths)
+    return artifact_manifest.record_artifact(
+        utils.ARTIFACT_MANIFEST_PATH,
+        artifact_manifest.artifact_name(path),
+        paths,
+        stage,
+        PRODUCER_VERSIONS[stage],
+        inputs,
+        **record,
+    )
+
+
+def _holds_build_lock(build):
+    """Runs `build` holding the build lock of utils.DATA_DIR."""
+
+    @functools.wraps(build)
+    def locked_build(*args, **kwargs):
+        with artifact_manifest.build_lock(utils.DATA_DIR):
+            return build(*args, **kwargs)
+
+    return locked_build
+
+
+def _store_inputs(source_hash):
+    return {
+        "source": source_hash,
+        "languages": list(utils.SUPPORTED_LANGUAGES),
+        "dtype": utils.EMBEDDING_STORE_DTYPE,
+    }
+
+
+def _pca_inputs(store_hash, n_components, fit_mode):
+    return {
+        "embedding_store": store_hash,
+        "n_components": n_components,
+        "fit_mode": fit_mode,
+        "full_fit_method": utils.PCA_FULL_FIT_METHOD,
+        "sample": (
+            None
+            if fit_mode == "full"
+            else _content_hash(
+                utils.WORD_VECTORS_PT_PATH, {"sample": utils.WORD_VECTORS_PT_PATH}
+            )
+        ),
+    }
+
+
+def _pca_sample_params(num_words, balance_languages, seed):
+    return {
+        "num_words": num_words,
+        "balance_languages": balance_languages,
+        "seed": seed,
+    }
+
+
+def _projection_inputs(store_hash, pca_hash):
+    return {"embedding_store": store_hash, "pca_projector": pca_hash}
+
+
+def _loaded_projection_inputs():
+    return _projection_inputs(
+        utils.artifact_hashes.get("embedding_store"),
+        utils.artifact_hashes.get("pca_projector"),
+    )
+
+
+def _frequency_list_hashes(frequency_lists):
+    return {lang: _source_hash(path) for lang, path in frequency_lists.items()}
+
+
+def _pivot_config(per_language, k, seed):
+    return {
+        "per_language": per_language,
+        "k": k,
+        "seed": seed,
+        "term_patterns": utils.PIVOT_TERM_PATTERNS,
+        "frequency_lists": _frequency_list_hashes(utils.PIVOT_FREQUENCY_LISTS),
+        "min_neighbour_similarity": utils.PIVOT_MIN_NEIGHBOUR_SIMILARITY,
+        "quantile_levels": utils.PIVOT_QUANTILE_LEVELS,
+        "quantile_sample_rows": utils.PIVOT_QUANTILE_SAMPLE_ROWS,
+    }
+
+
+def _prune_config():
+    return {
+        "languages": list(utils.SUPPORTED_LANGUAGES),
+        "max_tokens": utils.PRUNE_MAX_TOKENS,
+        "token_patterns": utils.PRUNE_TOKEN_PATTERNS,
+        "frequency_lists": _frequency_list_hashes(utils.PRUNE_FREQUENCY_LISTS),
+        "word_budgets": utils.PRUNE_WORD_BUDGETS,
+    }
+
+
+# --- Embedding store ---
+
+
+@_holds_build_lock
+def download_numberbatch_raw_file():
+    """Downloads the ConceptNet Numberbatch raw .txt.gz file if it doesn't exist."""
+    path = utils.NUMBERBATCH_GZ_PATH
+    existed = os.path.exists(path)
+    if not numberbatch_download.download_numberbatch_raw_file(
+        utils.NUMBERBATCH_RAW_URL, path
+    ):
+        return False
+    if not existed:
+        artifact_manifest.record_artifact(
+            utils.ARTIFACT_MANIFEST_PATH,
+            artifact_manifest.artifact_name(path),
+            {"file": path},
+            "download",
+            PRODUCER_VERSIONS["download"],
+            {"url": utils.NUMBERBATCH_RAW_URL},
+        )
+    return True
+
+
+@_holds_build_lock
+def parse_numberbatch_and_save_pytorch():
+    """
+    Streams the raw Numberbatch dump (straight from the .gz), keeps the EN/KO rows
+    and writes them to the memory-mapped embedding store, then maps it.
+    Parsing runs in parallel chunks; see numberbatch_ingest.py.
+    """
+    if os.path.exists(utils.NUMBERBATCH_GZ_PATH):
+        source_path = utils.NUMBERBATCH_GZ_PATH
+    elif os.path.exists(utils.NUMBERBATCH_TXT_PATH):
+        # An already decompressed dump also works
+        source_path = utils.NUMBERBATCH_TXT_PATH
+    else:
+        print(f"Error: {utils.NUMBERBATCH_GZ_PATH} not found. Cannot parse.")
+        return False
+
+    print(
+        f"Parsing {source_path} for {utils.SUPPORTED_LANGUAGES} into "
+        f"{utils.EMBEDDING_STORE_PREFIX}_* ({utils.EMBEDDING_STORE_DTYPE})..."
+    )
+    prefix = utils.EMBEDDING_STORE_PREFIX
+    staged_prefix = artifact_manifest.staging_path(prefix)
+    staged_paths = embedding_store.artifact_paths(staged_prefix)
+    artifact_manifest.discard(staged_paths)
+    try:
+        inputs = _store_inputs(_source_hash(source_path))
+        rows, dim = numberbatch_ingest.ingest_numberbatch(
+            source_path,
+            staged_prefix,
+            utils.SUPPORTED_LANGUAGES,
+            dtype=utils.EMBEDDING_STORE_DTYPE,
+        )
+        _publish_artifact(
+            "embedding_store",
+            prefix,
+            embedding_store.artifact_paths(prefix),
+            staged_paths,
+            inputs,
+            vocabulary_files=tuple(vocab_index.index_paths(prefix)),
+        )
+    except Exception as e:
+        artifact_manifest.discard(staged_paths)
+        print(f"Error parsing Numberbatch dump into the EN/KO embedding store: {e}")
+        return False
+
+    if dim != utils.NUMBERBATCH_DIM:
+        print(
+            f"Warning: Expected dimension {utils.NUMBERBATCH_DIM}, but file reports {dim}. Using reported dimension."
+        )
+    print(f"Finished parsing. Found {rows} EN/KO embeddings.")
+    print("PyTorch EN/KO Numberbatch artifacts saved successfully.")
+    return utils._load_embedding_store()
+
+
+@_holds_build_lock
+def convert_legacy_pytorch_artifacts():
+    """
+    One-off migration of the old torch.save/pickle artifacts into the memory-mapped
+    store, so existing data directories don't need a full re-parse.
+    """
+    import pickle
+
+    print("Converting legacy PyTorch EN/KO artifacts to the memory-mapped store...")
+    prefix = utils.EMBEDDING_STORE_PREFIX
+    staged_prefix = artifact_manifest.staging_path(prefix)
+    staged_paths = embedding_store.artifact_paths(staged_prefix)
+    artifact_manifest.discard(staged_paths)
+    try:
+        legacy_tensor = torch.load(utils.PYTORCH_EMBEDDINGS_PATH, map_location="cpu")
+        with open(utils.PYTORCH_IDX_TO_WORD_PATH, "rb") as f_i2w:
+            legacy_idx_to_word = pickle.load(f_i2w)
+        if not isinstance(legacy_tensor, torch.Tensor) or not isinstance(
+            legacy_idx_to_word, list
+        ):
+            print("Error: Legacy PyTorch EN/KO artifacts have incorrect types.")
+            return False
+        embedding_store.save_store(
+            staged_prefix,
+            legacy_tensor.detach().float().numpy(),
+            legacy_idx_to_word,
+            dtype=utils.EMBEDDING_STORE_DTYPE,
+            languages=utils.SUPPORTED_LANGUAGES,
+        )
+        _publish_artifact(
+            "embedding_store",
+            prefix,
+            embedding_store.artifact_paths(prefix),
+            staged_paths,
+            _store_inputs(_source_hash(utils.PYTORCH_EMBEDDINGS_PATH)),
+            vocabulary_files=tuple(vocab_index.index_paths(prefix)),
+        )
+    except Exception as e:
+        artifact_manifest.discard(staged_paths)
+        print(f"Error converting legacy PyTorch EN/KO artifacts: {e}")
+        return False
+    print("Legacy artifacts converted.")
+    return True
+
+
+@_holds_build_lock
+def prepare_embedding_store():
+    """
+    Builds the embedding store when it is missing: converts legacy artifacts if
+    present, otherwise downloads and parses the raw dump. Maps the result.
+    """
+    if (
+        os.path.exists(utils.PYTORCH_EMBEDDINGS_PATH)
+        and os.path.exists(utils.PYTORCH_IDX_TO_WORD_PATH)
+        and convert_legacy_pytorch_artifacts()
+        and utils._load_embedding_store()
+    ):
+        return True
+
+    print(
+        "Preprocessed PyTorch EN/KO artifacts not found or failed to load. Starting full preparation..."
+    )
+    if not download_numberbatch_raw_file():
+        return False
+    if not parse_numberbatch_and_save_pytorch():
+        return False
+
+    print("Full EN/KO Numberbatch preparation and loading complete.")
+    return True
+
+
+# --- PCA training sample ---
+
+
+def _stratified_quotas(counts, total, balance_languages=False):
+    """
+    Splits `total` samples over languages with `counts` rows each: proportional
+    to the counts, or equal per language when `balance_languages` is set.
+    A language that runs out of rows hands its share to the others.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    weights = np.ones(len(counts)) if balance_languages else counts.astype(np.float64)
+    quotas = np.zeros(len(counts), dtype=np.int64)
+    active = counts > 0
+    remaining = min(int(total), int(counts.sum()))
+    while remaining > 0 and active.any():
+        shares = remaining * weights * active / weights[active].sum()
+        exhausted = active & (shares >= counts - quotas)
+        if not exhausted.any():
+            floors = np.floor(shares).astype(np.int64)
+            quotas += floors
+            # Hand out what flooring left over, largest fractional part first.
+            leftover = remaining - int(floors.sum())
+            order = np.argsort(-(shares - floors) * active, kind="stable")
+            quotas[order[:leftover]] += 1
+            break
+        remaining -= int((counts - quotas)[exhausted].sum())
+        quotas[exhausted] = counts[exhausted]
+        active &= ~exhausted
+    return quotas
+
+
+def sample_pca_training_rows(num_words, balance_languages=False, seed=0):
+    """
+    Draws a stratified random sample of EN/KO vocabulary rows (without
+    replacement) using the per-row language ids of the vocabulary index.
+    Returns the sorted row indices, so the single gather reads the matrix in order.
+    """
+    vocabulary = utils.word_to_idx
+    row_langs = np.asarray(vocabulary.row_langs)
+    counts = np.bincount(row_langs, minlength=len(vocabulary.languages))
+    quotas = _stratified_quotas(counts, num_words, balance_languages)
+
+    rng = np.random.default_rng(seed)
+    sampled = []
+    for lang_id, quota in enumerate(quotas):
+        if quota == 0:
+            continue
+        lang_rows = np.flatnonzero(row_langs == lang_id)
+        sampled.append(rng.choice(lang_rows, size=quota, replace=False))
+        print(
+            f"Sampling {quota} of {len(lang_rows)} '{vocabulary.languages[lang_id]}' rows."
+        )
+    if not sampled:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(sampled))
+
+
+@_holds_build_lock
+def build_and_save_pca_sample_pytorch(num_words=40000, balance_languages=False, seed=0):
+    """
+    Draws the PCA training sample (see sample_pca_training_rows), drops zero
+    vectors and saves it to utils.WORD_VECTORS_PT_PATH, the rows the "sample"
+    fit mode fits on. Returns True on success.
+    """
+    if utils.embeddings_tensor is None and not utils.load_numberbatch_pytorch():
+        print("Cannot build the EN/KO PCA sample: embeddings failed to load.")
+        return False
+    if len(utils.word_to_idx) == 0:
+        print("Cannot build the EN/KO PCA sample: the vocabulary is empty.")
+        return False
+
+    print(f"Sampling up to {num_words} EN/KO word vectors for PCA training...")
+    rows = sample_pca_training_rows(num_words, balance_languages, seed)
+    data_np = utils.gather_embedding_rows_pytorch(rows).cpu().numpy()
+
+    # Zero vectors are treated as OOV elsewhere; keep them out of the fit.
+    nonzero = np.any(data_np != 0, axis=1)
+    if not nonzero.all():
+        print(f"Dropping {int((~nonzero).sum())} zero vectors from the sample.")
+        data_np = data_np[nonzero]
+
+    if data_np.shape[0] < 2:
+        print(
+            f"Collected only {data_np.shape[0]} EN/KO vectors. PCA requires at least 2 samples. Sample not saved."
+        )
+        return False
+
+    paths = {"sample": utils.WORD_VECTORS_PT_PATH}
+    staged_paths = {"sample": artifact_manifest.staging_path(paths["sample"])}
+    try:
+        np.save(staged_paths["sample"], data_np)
+        _publish_artifact(
+            "pca_sample",
+            utils.WORD_VECTORS_PT_PATH,
+            paths,
+            staged_paths,
+            {
+                "embedding_store": utils.artifact_hashes.get("embedding_store"),
+                "params": _pca_sample_params(num_words, balance_languages, seed),
+            },
+        )
+    except Exception as e:
+        artifact_manifest.discard(staged_paths)
+        print(f"Error saving the EN/KO PCA sample: {e}")
+        return False
+    print(
+        f"EN/KO PCA sample ({data_np.shape[0]} vectors, {data_np.shape[1]} dims) saved to {utils.WORD_VECTORS_PT_PATH}"
+    )
+    return True
+
+
+# --- PCA fitting ---
+
+
+def _iter_nonzero_blocks_pytorch(chunk_rows):
+    """Yields float32 CPU blocks of the embedding matrix with zero (OOV) rows dropped."""
+    for start in range(0, utils.embeddings_tensor.shape[0], chunk_rows):
+        block = utils.embedding_block_pytorch(start, start + chunk_rows).cpu()
+        yield block[block.abs().sum(dim=1) > 0]
+
+
+def streaming_covariance_pytorch(chunk_rows=utils.PCA_FIT_CHUNK_ROWS):
+    """
+    Mean and covariance of all non-zero vocabulary rows in one streamed pass.
+    Accumulates sum(x) and X^T X in float64, so memory is O(dim^2 + chunk).
+    Returns (num_rows, mean, covariance) as float64 CPU tensors.
+    """
+    dim = utils.embeddings_tensor.shape[1]
+    num_rows = 0
+    row_sum = torch.zeros(dim, dtype=torch.float64)
+    gram = torch.zeros(dim, dim, dtype=torch.float64)
+    for block in _iter_nonzero_blocks_pytorch(chunk_rows):
+        block = block.double()
+        num_rows += block.shape[0]
+        row_sum += block.sum(dim=0)
+        gram += block.T @ block
+    if num_rows < 2:
+        return num_rows, None, None
+    mean = row_sum / num_rows
+    covariance = (gram - num_rows * torch.outer(mean, mean)) / (num_rows - 1)
+    return num_rows, mean, covariance
+
+
+def _pca_from_covariance(num_rows, mean, covariance, n_components):
+    """
+    Builds a PCAProjector from a covariance matrix (eigendecomposition). Same
+    components as sklearn's PCA fitted on the rows behind the covariance.
+    """
+    eigenvalues, eigenvectors = torch.linalg.eigh(covariance)
+    eigenvalues = eigenvalues.flip(0).clamp(min=0)
+    components = eigenvectors.flip(1).T[:n_components]
+    # Same sign convention as sklearn: largest-magnitude loading is positive.
+    signs = torch.sign(
+        components.gather(1, components.abs().argmax(dim=1, keepdim=True))
+    )
+    components = components * signs
+
+    return pca_projector.PCAProjector(
+        components.numpy(),
+        mean.numpy(),
+        eigenvalues[:n_components].numpy(),
+        (eigenvalues[:n_components] / eigenvalues.sum()).numpy(),
+    )
+
+
+def fit_pca_full_vocabulary_pytorch(
+    n_components=2, method=None, chunk_rows=utils.PCA_FIT_CHUNK_ROWS
+):
+    """
+    Fits PCA on every non-zero EN/KO vocabulary row, streaming over the
+    (memory-mapped) matrix in chunks instead of materialising it.
+    method "covariance" (default: utils.PCA_FULL_FIT_METHOD) is exact;
+    "incremental" uses sklearn's IncrementalPCA. Returns a PCAProjector, or None.
+    """
+    method = method or utils.PCA_FULL_FIT_METHOD
+    if utils.embeddings_tensor is None and not utils.load_numberbatch_pytorch():
+        print("Cannot fit EN/KO PCA: Numberbatch embeddings failed to load.")
+        return None
+
+    start_time = time.perf_counter()
+    if method == "covariance":
+        num_rows, mean, covariance = streaming_covariance_pytorch(chunk_rows)
+        if num_rows < n_components:
+            print(f"Not enough non-zero rows ({num_rows}) for EN/KO PCA.")
+            return None
+        pca = _pca_from_covariance(num_rows, mean, covariance, n_components)
+    elif method == "incremental":
+        from sklearn.decomposition import IncrementalPCA
+
+        pca = IncrementalPCA(n_components=n_components)
+        num_rows = 0
+        for block in _iter_nonzero_blocks_pytorch(chunk_rows):
+            # partial_fit needs at least n_components rows per batch.
+            if block.shape[0] >= n_components:
+                pca.partial_fit(block.numpy())
+                num_rows += block.shape[0]
+        if num_rows == 0:
+            print("No non-zero rows for EN/KO PCA.")
+            return None
+        pca = pca_projector.PCAProjector.from_model(pca)
+    else:
+        print(f"Unknown PCA fit method '{method}'.")
+        return None
+    print(
+        f"EN/KO PCA fitted on {num_rows} rows ({method}) in {time.perf_counter() - start_time:.1f}s, "
+        f"explained variance ratio {[round(float(v), 4) for v in pca.explained_variance_ratio_]}."
+    )
+    return pca
+
+
+@_holds_build_lock
+def train_and_save_pca_pytorch(n_components=2, fit_mode=None):
+    """
+    Trains a PCA model on a subset of PyTorch word vectors (scikit-learn, on CPU),
+    saves it as a PCAProjector and rebuilds the coordinate table.
+    With fit_mode "full" (default: utils.PCA_FIT_MODE) every vocabulary row is
+    used, see fit_pca_full_vocabulary_pytorch.
+    """
+    print("Training new EN/KO PCA model...")
+    if utils.embeddings_tensor is None or utils.word_to_idx is None:
+        print(
+            "EN/KO Numberbatch embeddings not loaded. Attempting to load them first..."
+        )
+        if not utils.load_numberbatch_pytorch() or utils.embeddings_tensor is None:
+            print("Cannot train EN/KO PCA: Numberbatch embeddings failed to load.")
+            return None
+
+    fit_mode = fit_mode or utils.PCA_FIT_MODE
+    pca_training_data_np = None
+    # A partly written or modified sample, or one drawn from another store,
+    # would silently skew the fit.
+    sample_ok = fit_mode != "full" and os.path.exists(utils.WORD_VECTORS_PT_PATH)
+    if sample_ok:
+        sample_ok, _ = utils._check_artifact(
+            "EN/KO PCA sample",
+            utils.WORD_VECTORS_PT_PATH,
+            {"sample": utils.WORD_VECTORS_PT_PATH},
+            ("embedding_store",),
+        )
+    if sample_ok:
+        print(
+            f"Loading word vectors for EN/KO PCA training from {utils.WORD_VECTORS_PT_PATH}"
+        )
+        try:
+            # This file contains NumPy array, already on CPU
+            pca_training_data_np = np.load(utils.WORD_VECTORS_PT_PATH)
+            if pca_training_data_np.ndim == 1 and pca_training_data_np.shape[0] > 0:
+                pca_training_data_np = pca_training_data_np.reshape(1, -1)
+            elif pca_training_data_np.ndim == 0:
+                pca_training_data_np = None
+        except Exception as e:
+            print(
+                f"Error loading EN/KO word vectors from {utils.WORD_VECTORS_PT_PATH}: {e}. Falling back."
+            )
+            pca_training_data_np = None
+    elif fit_mode != "full" and not os.path.exists(utils.WORD_VECTORS_PT_PATH):
+        print(
+            f"EN/KO word vectors file {utils.WORD_VECTORS_PT_PATH} not found. Using the full vocabulary."
+        )
+
+    current_pca = None
+    if fit_mode == "full" or (
+        pca_training_data_np is None or pca_training_data_np.shape[0] < n_components
+    ):
+        if fit_mode != "full":
+            print("Falling back to fitting EN/KO PCA on the full vocabulary.")
+        current_pca = fit_pca_full_vocabulary_pytorch(n_components)
+        if current_pca is None:
+            return None
+
+    paths = {"projector": utils.PCA_PROJECTOR_PATH}
+    staged_paths = {"projector": artifact_manifest.staging_path(paths["projector"])}
+    try:
+        if current_pca is None:
+            from sklearn.decomposition import PCA
+
+            sklearn_pca = PCA(n_components=n_components)
+            sklearn_pca.fit(pca_training_data_np)  # scikit-learn PCA runs on CPU
+            current_pca = pca_projector.PCAProjector.from_model(sklearn_pca)
+        current_pca.save(staged_paths["projector"])
+        entry = _publish_artifact(
+            "pca_projector",
+            utils.PCA_PROJECTOR_PATH,
+            paths,
+            staged_paths,
+            _pca_inputs(
+                utils.artifact_hashes.get("embedding_store"), n_components, fit_mode
+            ),
+        )
+        # Invalidates cached coordinates
+        utils.set_pca_model_pytorch(current_pca, entry["content_hash"])
+        print(f"EN/KO PCA model trained and saved to {utils.PCA_PROJECTOR_PATH}")
+    except Exception as e:
+        artifact_manifest.discard(staged_paths)
+        print(f"Error during EN/KO PCA training or saving: {e}")
+        utils.set_pca_model_pytorch(None)
+        return None
+
+    # The coordinate table is only valid for the model it was projected with.
+    build_and_save_coordinate_table_pytorch()
+    return utils.pca_model_pt
+
+
+# --- Precomputed lookup structures ---
+
+
+@_holds_build_lock
+def build_and_save_coordinate_table_pytorch(chunk_rows=65536):
+    """
+    Projects the whole EN/KO vocabulary with the current PCA model, in chunks,
+    and saves the (N, 2) result to utils.COORDINATES_TABLE_PATH aligned to
+    utils.idx_to_word_list. Zero vectors (treated as OOV) are stored as NaN.
+    """
+    if utils.embeddings_tensor is None and not utils.load_numberbatch_pytorch():
+        print("Cannot build EN/KO coordinate table: embeddings failed to load.")
+        return False
+    if utils.get_pca_model_pytorch() is None:
+        print("Cannot build EN/KO coordinate table: PCA model unavailable.")
+        return False
+
+    num_rows = utils.embeddings_tensor.shape[0]
+    print(f"Projecting {num_rows} EN/KO vectors into {utils.COORDINATES_TABLE_PATH}...")
+    paths = {"table": utils.COORDINATES_TABLE_PATH}
+    staged_paths = {"table": artifact_manifest.staging_path(paths["table"])}
+    try:
+        # Workers may have the current table mapped; it is replaced, not overwritten.
+        table = np.lib.format.open_memmap(
+            staged_paths["table"],
+            mode="w+",
+            dtype=np.float32,
+            shape=(num_rows, 2),
+        )
+        for start in range(0, num_rows, chunk_rows):
+            rows = utils.embedding_block_pytorch(start, start + chunk_rows)
+            coords = utils.transform_to_2d_batch_pytorch(rows)
+            coords[torch.all(rows.eq(0), dim=1).cpu().numpy()] = np.nan
+            table[start : start + len(coords)] = coords
+        table.flush()
+        del table
+        _publish_artifact(
+            "coordinate_table",
+            utils.COORDINATES_TABLE_PATH,
+            paths,
+            staged_paths,
+            _loaded_projection_inputs(),
+            vocabulary_hash=utils.artifact_hashes.get("vocabulary"),
+        )
+    except Exception as e:
+        artifact_manifest.discard(staged_paths)
+        print(f"Error building EN/KO coordinate table: {e}")
+        return False
+    print("EN/KO coordinate table saved.")
+    return utils.load_coordinate_table_pytorch()
+
+
+@_holds_build_lock
+def build_and_save_ann_index_pytorch(**build_params):
+    """
+    Builds the IVF-PQ index over the EN/KO embeddings and saves it next to them
+    (utils.ANN_INDEX_PREFIX). Extra keyword arguments go to ann_index.build_index.
+    """
+    if utils.embeddings_tensor is None and not utils.load_numberbatch_pytorch():
+        print("Cannot build EN/KO ANN index: embeddings failed to load.")
+        return False
+    inverse_norms = utils.get_inverse_row_norms_pytorch()
+    if inverse_norms is None:
+        print("Cannot build EN/KO ANN index: embeddings failed to load.")
+        return False
+
+    row_langs = utils.get_row_language_ids_pytorch().cpu().numpy()
+    # The index normalises the stored rows with one factor per row; for int8
+    # stores that factor includes the dequantisation scale.
+    row_factors = inverse_norms
+    if utils.embedding_row_scales is not None:
+        row_factors = inverse_norms * utils.embedding_row_scales
+    print(f"Building EN/KO ANN index over {len(row_langs)} rows...")
+    prefix = utils.ANN_INDEX_PREFIX
+    staged_prefix = artifact_manifest.staging_path(prefix)
+    staged_paths = ann_index.index_paths(staged_prefix)
+    try:
+        arrays = ann_index.build_index(
+            utils.embeddings_tensor.cpu().numpy(),
+            row_factors.cpu().numpy(),
+            row_langs,
+            utils.SUPPORTED_LANGUAGES,
+            **build_params,
+        )
+        ann_index.save_index(staged_prefix, arrays)
+        _publish_artifact(
+            "ann_index",
+            prefix,
+            ann_index.index_paths(prefix),
+            staged_paths,
+            {
+                "embedding_store": utils.artifact_hashes.get("embedding_store"),
+                "params": build_params,
+            },
+            vocabulary_hash=utils.artifact_hashes.get("vocabulary"),
+        )
+    except Exception as e:
+        artifact_manifest.discard(staged_paths)
+        print(f"Error building EN/KO ANN index: {e}")
+        return False
+    print(f"EN/KO ANN index saved to {utils.ANN_INDEX_PREFIX}_*")
+    return utils.load_ann_index_pytorch()
+
+
+@_holds_build_lock
+def build_and_save_fuzzy_index():
+    """
+    Builds the character n-gram index over the EN/KO vocabulary terms used by
+    the OOV fallback and saves it next to the store (utils.FUZZY_INDEX_PREFIX).
+    Only needs the vocabulary, not the embeddings.
+    """
+    if utils.word_to_idx is None and not utils.load_numberbatch_vocabulary_pytorch():
+        print("Cannot build EN/KO fuzzy index: vocabulary failed to load.")
+        return False
+    print(f"Building EN/KO fuzzy index over {len(utils.word_to_idx)} terms...")
+    prefix = utils.FUZZY_INDEX_PREFIX
+    staged_prefix = artifact_manifest.staging_path(prefix)
+    staged_paths = fuzzy_index.index_paths(staged_prefix)
+    try:
+        arrays = fuzzy_index.build_index(utils.word_to_idx)
+        fuzzy_index.save_index(staged_prefix, arrays)
+        vocabulary_hash = utils.artifact_hashes.get("vocabulary")
+        _publish_artifact(
+            "fuzzy_index",
+            prefix,
+            fuzzy_index.index_paths(prefix),
+            staged_paths,
+            {"vocabulary": vocabulary_hash},
+            vocabulary_hash=vocabulary_hash,
+        )
+    except Exception as e:
+        artifact_manifest.discard(staged_paths)
+        print(f"Error building EN/KO fuzzy index: {e}")
+        return False
+    print(f"EN/KO fuzzy index saved to {utils.FUZZY_INDEX_PREFIX}_*")
+    return utils.load_fuzzy_index_pytorch()
+
+
+@_holds_build_lock
+def build_and_save_pivot_catalogue_pytorch(
+    per_language=None, k=None, chunk_pivots=256, seed=0
+):
+    """
+    Selects the pivot pool of every supported language (utils.PIVOT_* config),
+    computes each pivot's exact top-k neighbours, similarity quantiles against
+    a fixed vocabulary sample and 2D coordinates, in chunks of pivots, and
+    saves the catalogue (utils.PIVOT_CATALOGUE_PREFIX).
+    """
+    per_language = per_language or utils.PIVOTS_PER_LANGUAGE
+    k = k or utils.PIVOT_TOP_K
+    if utils.embeddings_tensor is None and not utils.load_numberbatch_pytorch():
+        print("Cannot build EN/KO pivot catalogue: embeddings failed to load.")
+        return False
+    inverse_norms = utils.get_inverse_row_norms_pytorch()
+    if inverse_norms is None:
+        print("Cannot build EN/KO pivot catalogue: embeddings failed to load.")
+        return False
+    # Pivot coordinates come from the coordinate table, or the PCA model.
+    if utils.coordinates_table is None and not utils.load_coordinate_table_pytorch():
+        utils.get_pca_model_pytorch()
+    usable = (inverse_norms > 0).cpu().numpy()
+    vocabulary = utils.word_to_idx
+
+    # Candidates are over-selected so that isolated vectors can be dropped.
+    candidate_rows, candidate_langs = [], []
+    for lang in utils.SUPPORTED_LANGUAGES:
+        frequency_path = utils.PIVOT_FREQUENCY_LISTS.get(lang)
+        rows = pivot_catalogue.select_pivot_rows(
+            vocabulary,
+            lang,
+            2 * per_language,
+            utils.PIVOT_TERM_PATTERNS.get(lang, r"\w{2,16}"),
+            frequency_words=(
+                vocab_index.read_frequency_list(frequency_path)
+                if frequency_path
+                else None
+            ),
+            usable=usable,
+        )
+        print(f"{len(rows)} {lang} pivot candidates.")
+        candidate_rows.extend(rows)
+        candidate_langs.extend([lang] * len(rows))
+    if not candidate_rows:
+        print("Cannot build EN/KO pivot catalogue: no pivot candidates.")
+        return False
+
+    generator = torch.Generator().manual_seed(seed)
+    usable_rows = torch.from_numpy(np.flatnonzero(usable))
+    sample_rows = usable_rows[
+        torch.randperm(len(usable_rows), generator=generator)[
+            : utils.PIVOT_QUANTILE_SAMPLE_ROWS
+        ]
+    ]
+    sample = torch.nn.functional.normalize(
+        utils.gather_embedding_rows_pytorch(sample_rows), dim=1
+    )
+    levels = torch.tensor(
+        utils.PIVOT_QUANTILE_LEVELS, dtype=torch.float32, device=sample.device
+    )
+
+    neighbour_rows, neighbour_scores, quantiles = [], [], []
+    start_time = time.perf_counter()
+    for start in range(0, len(candidate_rows), chunk_pivots):
+        rows = candidate_rows[start : start + chunk_pivots]
+        queries = utils.gather_embedding_rows_pytorch(rows)
+        top_rows, top_scores = utils.exact_top_k_pytorch(
+            queries, k=k, exclude_rows=rows
+        )
+        neighbour_rows.append(top_rows.cpu().numpy())
+        neighbour_scores.append(top_scores.cpu().numpy())
+        similarities = torch.nn.functional.normalize(queries, dim=1) @ sample.T
+        quantiles.append(torch.quantile(similarities, levels, dim=1).T.cpu().numpy())
+        print(
+            f"  {start + len(rows)}/{len(candidate_rows)} pivots "
+            f"({time.perf_counter() - start_time:.1f}s)"
+        )
+    neighbour_rows = np.concatenate(neighbour_rows)
+    neighbour_scores = np.concatenate(neighbour_scores)
+    quantiles = np.concatenate(quantiles)
+
+    # Keep the first per_language pivots of each language that aren't isolated.
+    keep = []
+    kept = dict.fromkeys(utils.SUPPORTED_LANGUAGES, 0)
+    for i, lang in enumerate(candidate_langs):
+        if (
+            kept[lang] < per_language
+            and neighbour_scores[i, 0] >= utils.PIVOT_MIN_NEIGHBOUR_SIMILARITY
+        ):
+            keep.append(i)
+            kept[lang] += 1
+    if not keep:
+        print("Cannot build EN/KO pivot catalogue: every candidate is isolated.")
+        return False
+    print(f"Kept pivots per language: {kept}")
+
+    pivot_rows = [candidate_rows[i] for i in keep]
+    coords = utils._rows_coordinates_pytorch(pivot_rows)
+    if coords is None:
+        print("Cannot build EN/KO pivot catalogue: PCA model unavailable.")
+        return False
+    prefix = utils.PIVOT_CATALOGUE_PREFIX
+    staged_prefix = artifact_manifest.staging_path(prefix)
+    staged_paths = pivot_catalogue.catalogue_paths(staged_prefix)
+    try:
+        arrays = pivot_catalogue.build_catalogue(
+            [candidate_langs[i] for i in keep],
+            pivot_rows,
+            neighbour_rows[keep],
+            neighbour_scores[keep],
+            utils.PIVOT_QUANTILE_LEVELS,
+            quantiles[keep],
+            coords,
+            len(vocabulary),
+        )
+        pivot_catalogue.save_catalogue(staged_prefix, arrays)
+        _publish_artifact(
+            "pivot_catalogue",
+            prefix,
+            pivot_catalogue.catalogue_paths(prefix),
+            staged_paths,
+            {
+                **_loaded_projection_inputs(),
+                "config": _pivot_config(per_language, k, seed),
+            },
+            vocabulary_hash=utils.artifact_hashes.get("vocabulary"),
+        )
+    except Exception as e:
+        artifact_manifest.discard(staged_paths)
+        print(f"Error building EN/KO pivot catalogue: {e}")
+        return False
+    print(f"EN/KO pivot catalogue saved to {utils.PIVOT_CATALOGUE_PREFIX}_*")
+    return utils.load_pivot_catalogue_pytorch()
+
+
+# --- Pruned serving vocabulary ---
+
+
+def _pruned_artifacts():
+    """(path, paths) of the pruned store, coordinate table and fuzzy index."""
+    store = utils.vocabulary_artifact_path("EMBEDDING_STORE_PREFIX", "pruned")
+    table = utils.vocabulary_artifact_path("COORDINATES_TABLE_PATH", "pruned")
+    fuzzy = utils.vocabulary_artifact_path("FUZZY_INDEX_PREFIX", "pruned")
+    return {
+        "store": (store, embedding_store.artifact_paths(store)),
+        "table": (table, {"table": table}),
+        "fuzzy_index": (fuzzy, fuzzy_index.index_paths(fuzzy)),
+    }
+
+
+@_holds_build_lock
+def build_pruned_vocabulary_artifacts():
+    """
+    Writes the "pruned" artifact set (see vocabulary_pruning.py) from the full
+    one: the pruned store, its slice of the coordinate table and its fuzzy
+    index. Filters and budgets come from the utils.PRUNE_* config.
+    """
+    full_prefix = utils.vocabulary_artifact_path("EMBEDDING_STORE_PREFIX", "full")
+    full_paths = embedding_store.artifact_paths(full_prefix)
+    if not embedding_store.store_exists(full_prefix):
+        print(f"Cannot prune EN/KO vocabulary: {full_prefix}_* not found.")
+        return False
+    artifacts = _pruned_artifacts()
+    staged = {
+        name: {key: artifact_manifest.staging_path(p) for key, p in paths.items()}
+        for name, (_, paths) in artifacts.items()
+    }
+    for staged_paths in staged.values():
+        artifact_manifest.discard(staged_paths)
+    try:
+        full_entry = _verified_entry(full_prefix, full_paths)
+        matrix, vocabulary = embedding_store.load_store(full_prefix)
+        usable = vocabulary_pruning.usable_rows(matrix)
+        row_langs = np.asarray(vocabulary.row_langs)
+        rows = []
+        for lang in utils.SUPPORTED_LANGUAGES:
+            frequency_path = utils.PRUNE_FREQUENCY_LISTS.get(lang)
+            lang_rows = vocabulary_pruning.select_rows(
+                vocabulary,
+                lang,
+                utils.PRUNE_MAX_TOKENS,
+                utils.PRUNE_TOKEN_PATTERNS.get(lang, r"\w+"),
+                utils.PRUNE_WORD_BUDGETS.get(lang),
+                frequency_words=(
+                    vocab_index.read_frequency_list(frequency_path)
+                    if frequency_path
+                    else None
+                ),
+                usable=usable,
+            )
+            total = int(np.count_nonzero(row_langs == vocabulary.languages.index(lang)))
+            print(f"Keeping {len(lang_rows)} of {total} {lang} rows.")
+            rows.extend(lang_rows)
+        rows.sort()
+
+        pruned_prefix, pruned_paths = artifacts["store"]
+        print(f"Writing pruned EN/KO store to {pruned_prefix}_*...")
+        vocabulary_pruning.write_pruned_store(
+            full_prefix, artifact_manifest.staging_path(pruned_prefix), rows
+        )
+        store_entry = _publish_artifact(
+            "pruned_store",
+            pruned_prefix,
+            pruned_paths,
+            staged["store"],
+            {
+                "embedding_store": (
+                    None if full_entry is None else full_entry["content_hash"]
+                ),
+                "config": _prune_config(),
+            },
+            vocabulary_files=tuple(vocab_index.index_paths(pruned_prefix)),
+        )
+        vocabulary_hash = store_entry["vocabulary_hash"]
+
+        full_table = utils.vocabulary_artifact_path("COORDINATES_TABLE_PATH", "full")
+        full_table_entry = _verified_entry(full_table, {"table": full_table})
+        table_path, table_paths = artifacts["table"]
+        if os.path.exists(full_table):
+            vocabulary_pruning.write_pruned_table(
+                full_table, staged["table"]["table"], rows
+            )
+            _publish_artifact(
+                "pruned_table",
+                table_path,
+                table_paths,
+                staged["table"],
+                {
+                    "embedding_store": store_entry["content_hash"],
+                    "pca_projector": (
+                        None
+                        if full_table_entry is None
+                        else full_table_entry["inputs"].get("pca_projector")
+                    ),
+                    "coordinate_table": (
+                        None
+                        if full_table_entry is None
+                        else full_table_entry["content_hash"]
+                    ),
+                },
+                vocabulary_hash=vocabulary_hash,
+            )
+
+        fuzzy_prefix, fuzzy_paths = artifacts["fuzzy_index"]
+        fuzzy_index.save_index(
+            artifact_manifest.staging_path(fuzzy_prefix),
+            fuzzy_index.build_index(embedding_store.load_vocabulary(pruned_prefix)),
+        )
+        _publish_artifact(
+            "fuzzy_index",
+            fuzzy_prefix,
+            fuzzy_paths,
+            staged["fuzzy_index"],
+            {"vocabulary": vocabulary_hash},
+            vocabulary_hash=vocabulary_hash,
+        )
+    except Exception as e:
+        for staged_paths in staged.values():
+            artifact_manifest.discard(staged_paths)
+        print(f"Error pruning EN/KO vocabulary: {e}")
+        return False
+    print(
+        f"Pruned EN/KO artifacts written ({len(rows)} of {len(vocabulary)} rows). "
+        'The ANN index and pivot catalogue are built by their scripts with SERVING_VOCABULARY = "pruned".'
+    )
+    return True
+
+
+# --- Incremental preparation ---
+
+
+def _stage(label, stage, path, paths, inputs, build, exists, adopt, **record):
+    """
+    Runs `build` unless the manifest says the artifact at `path` is current
+    for `inputs`. With adopt, an artifact that `exists` but isn't recorded is
+    recorded as it is (with `record`) instead. Returns True if it is current
+    afterwards.
+    """
+    current, reason = artifact_manifest.is_current(
+        utils.ARTIFACT_MANIFEST_PATH,
+        artifact_manifest.artifact_name(path),
+        paths,
+        PRODUCER_VERSIONS[stage],
+        inputs,
+    )
+    if current:
+        print(f"{label}: up to date.")
+        return True
+    if adopt and exists and reason == "not recorded":
+        artifact_manifest.record_artifact(
+            utils.ARTIFACT_MANIFEST_PATH,
+            artifact_manifest.artifact_name(path),
+            paths,
+            stage,
+            PRODUCER_VERSIONS[stage],
+            inputs,
+            **record,
+        )
+        print(f"{label}: not recorded; recorded the existing files as they are.")
+        return True
+    print(f"{label}: {reason}. Rebuilding...")
+    return bool(build())
+
+
+def _rebuild_embedding_store():
+    # Data directories from before the store may only have the legacy artifacts.
+    if not (
+        os.path.exists(utils.NUMBERBATCH_GZ_PATH)
+        or os.path.exists(utils.NUMBERBATCH_TXT_PATH)
+    ):
+        return prepare_embedding_store()
+    return download_numberbatch_raw_file() and parse_numberbatch_and_save_pytorch()
+
+
+def _pruned_set_is_current(store_hash, pca_hash, table_hash):
+    """True if the pruned artifacts were built from the current full set and config."""
+    artifacts = _pruned_artifacts()
+    store_path, store_paths = artifacts["store"]
+    current, reason = artifact_manifest.is_current(
+        utils.ARTIFACT_MANIFEST_PATH,
+        artifact_manifest.artifact_name(store_path),
+        store_paths,
+        PRODUCER_VERSIONS["pruned_store"],
+        {"embedding_store": store_hash, "config": _prune_config()},
+    )
+    if not current:
+        print(f"Pruned EN/KO store: {reason}.")
+        return False
+    store_entry = _verified_entry(store_path, store_paths)
+    checks = [
+        (
+            "fuzzy_index",
+            "fuzzy_index",
+            {"vocabulary": store_entry["vocabulary_hash"]},
+        )
+    ]
+    if table_hash is not None:
+        checks.append(
+            (
+                "table",
+                "pruned_table",
+                {
+                    "embedding_store": store_entry["content_hash"],
+                    "pca_projector": pca_hash,
+                    "coordinate_table": table_hash,
+                },
+            )
+        )
+    for name, stage, inputs in checks:
+        path, paths = artifacts[name]
+        current, reason = artifact_manifest.is_current(
+            utils.ARTIFACT_MANIFEST_PATH,
+            artifact_manifest.artifact_name(path),
+            paths,
+            PRODUCER_VERSIONS[stage],
+            inputs,
+        )
+        if not current:
+            print(f"Pruned EN/KO {name.replace('_', ' ')}: {reason}.")
+            return False
+    return True
+
+
+@_holds_build_lock
+def prepare_artifacts(include_optional=False, adopt=False):
+    """
+    Brings the full artifact set up to date, stage by stage, rebuilding only
+    the artifacts whose manifest entry is missing, doesn't verify (partial or
+    modified files), or was made by another producer version or from other
+    inputs: the embedding store, PCA sample (if the fit uses one and it was
+    drawn before), PCA projector, coordinate table and fuzzy index; the ANN
+    index and pivot catalogue if they were built before (or
+    with include_optional), with their recorded parameters; and the pruned
+    set if it exists. With adopt, existing artifacts that aren't recorded
+    (data directories prepared before the manifest) are recorded as they are
+    instead of being rebuilt. Returns True if every stage is current.
+    """
+    if utils.SERVING_VOCABULARY != "full":
+        print(
+            'prepare_artifacts builds the full set; call utils.select_serving_vocabulary("full") first.'
+        )
+        return False
+
+    # 1. Embedding store, from the raw dump, or from what it was last built
+    # from if the dump has been deleted since.
+    store_prefix = utils.EMBEDDING_STORE_PREFIX
+    store_paths = embedding_store.artifact_paths(store_prefix)
+    source_hash = _source_hash(utils.NUMBERBATCH_GZ_PATH) or _source_hash(
+        utils.NUMBERBATCH_TXT_PATH
+    )
+    if source_hash is None:
+        store_entry = _verified_entry(store_prefix, store_paths)
+        if store_entry is not None:
+            source_hash = store_entry["inputs"].get("source")
+    if not _stage(
+        "EN/KO embedding store",
+        "embedding_store",
+        store_prefix,
+        store_paths,
+        _store_inputs(source_hash),
+        _rebuild_embedding_store,
+        embedding_store.store_exists(store_prefix),
+        adopt,
+        vocabulary_files=tuple(vocab_index.index_paths(store_prefix)),
+    ):
+        return False
+    store_entry = _verified_entry(store_prefix, store_paths)
+    store_hash = store_entry["content_hash"]
+    vocabulary_hash = store_entry["vocabulary_hash"]
+
+    # 2. PCA sample (if the fit uses one and it was drawn before), redrawn
+    # with its recorded parameters, and the PCA projector (retraining it also
+    # re-projects the coordinate table).
+    sample_entry = artifact_manifest.get_entry(
+        utils.ARTIFACT_MANIFEST_PATH,
+        artifact_manifest.artifact_name(utils.WORD_VECTORS_PT_PATH),
+    )
+    sample_exists = os.path.exists(utils.WORD_VECTORS_PT_PATH)
+    if utils.PCA_FIT_MODE != "full" and (
+        sample_entry is not None or (adopt and sample_exists)
+    ):
+        sample_params = (
+            sample_entry["inputs"].get("params") if sample_entry is not None else None
+        ) or _pca_sample_params(40000, False, 0)
+        if not _stage(
+            "EN/KO PCA sample",
+            "pca_sample",
+            utils.WORD_VECTORS_PT_PATH,
+            {"sample": utils.WORD_VECTORS_PT_PATH},
+            {"embedding_store": store_hash, "params": sample_params},
+            lambda: build_and_save_pca_sample_pytorch(**sample_params),
+            sample_exists,
+            adopt,
+        ):
+            return False
+
+    pca_paths = {"projector": utils.PCA_PROJECTOR_PATH}
+    if not _stage(
+        "EN/KO PCA projector",
+        "pca_projector",
+        utils.PCA_PROJECTOR_PATH,
+        pca_paths,
+        _pca_inputs(store_hash, 2, utils.PCA_FIT_MODE),
+        lambda: train_and_save_pca_pytorch() is not None,
+        os.path.exists(utils.PCA_PROJECTOR_PATH),
+        adopt,
+    ):
+        return False
+    pca_hash = _content_hash(utils.PCA_PROJECTOR_PATH, pca_paths)
+
+    # 3. Coordinate table and fuzzy index.
+    table_paths = {"table": utils.COORDINATES_TABLE_PATH}
+    if not _stage(
+        "EN/KO coordinate table",
+        "coordinate_table",
+        utils.COORDINATES_TABLE_PATH,
+        table_paths,
+        _projection_inputs(store_hash, pca_hash),
+        build_and_save_coordinate_table_pytorch,
+        os.path.exists(utils.COORDINATES_TABLE_PATH),
+        adopt,
+        vocabulary_hash=vocabulary_hash,
+    ):
+        return False
+    table_hash = _content_hash(utils.COORDINATES_TABLE_PATH, table_paths)
+    if not _stage(
+        "EN/KO fuzzy index",
+        "fuzzy_index",
+        utils.FUZZY_INDEX_PREFIX,
+        fuzzy_index.index_paths(utils.FUZZY_INDEX_PREFIX),
+        {"vocabulary": vocabulary_hash},
+        build_and_save_fuzzy_index,
+        fuzzy_index.index_exists(utils.FUZZY_INDEX_PREFIX),
+        adopt,
+        vocabulary_hash=vocabulary_hash,
+    ):
+        return False
+
+    # 4. Optional indexes, rebuilt with the parameters they were built with.
+    ann_entry = artifact_manifest.get_entry(
+        utils.ARTIFACT_MANIFEST_PATH,
+        artifact_manifest.artifact_name(utils.ANN_INDEX_PREFIX),
+    )
+    ann_exists = ann_index.index_exists(utils.ANN_INDEX_PREFIX)
+    if ann_entry is not None or include_optional or (adopt and ann_exists):
+        ann_params = {} if ann_entry is None else ann_entry["inputs"].get("params", {})
+        if not _stage(
+            "EN/KO ANN index",
+            "ann_index",
+            utils.ANN_INDEX_PREFIX,
+            ann_index.index_paths(utils.ANN_INDEX_PREFIX),
+            {"embedding_store": store_hash, "params": ann_params},
+            lambda: build_and_save_ann_index_pytorch(**ann_params),
+            ann_exists,
+            adopt,
+            vocabulary_hash=vocabulary_hash,
+        ):
+            return False
+
+    pivot_entry = artifact_manifest.get_entry(
+        utils.ARTIFACT_MANIFEST_PATH,
+        artifact_manifest.artifact_name(utils.PIVOT_CATALOGUE_PREFIX),
+    )
+    pivot_exists = pivot_catalogue.catalogue_exists(utils.PIVOT_CATALOGUE_PREFIX)
+    if pivot_entry is not None or include_optional or (adopt and pivot_exists):
+        config = {} if pivot_entry is None else pivot_entry["inputs"].get("config", {})
+        per_language = config.get("per_language") or utils.PIVOTS_PER_LANGUAGE
+        k = config.get("k") or utils.PIVOT_TOP_K
+        seed = config.get("seed", 0)
+        if not _stage(
+            "EN/KO pivot catalogue",
+            "pivot_catalogue",
+            utils.PIVOT_CATALOGUE_PREFIX,
+            pivot_catalogue.catalogue_paths(utils.PIVOT_CATALOGUE_PREFIX),
+            {
+                **_projection_inputs(store_hash, pca_hash),
+                "config": _pivot_config(per_language, k, seed),
+            },
+            lambda: build_and_save_pivot_catalogue_pytorch(
+                per_language=per_language, k=k, seed=seed
+            ),
+            pivot_exists,
+            adopt,
+            vocabulary_hash=vocabulary_hash,
+        ):
+            return False
+
+    # 5. The pruned set, if one was written.
+    pruned_prefix, _ = _pruned_artifacts()["store"]
+    if embedding_store.store_exists(pruned_prefix):
+        if _pruned_set_is_current(store_hash, pca_hash, table_hash):
+            print("Pruned EN/KO artifacts: up to date.")
+        else:
+            print("Rebuilding the pruned EN/KO artifacts...")
+            if not build_pruned_vocabulary_artifacts():
+                return False
+    print("EN/KO artifacts are up to date.")
+    return True
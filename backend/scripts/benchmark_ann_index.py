@@ -0,0 +1,82 @@
+import sys
+import os
+import argparse
+import time
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+import preparation
+import utils
+import numpy as np
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report EN/KO ANN index build time, query latency and recall@k."
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Rebuild the index and time it."
+    )
+    args = parser.parse_args()
+
+    if not utils.load_numberbatch_pytorch():
+        print("EN/KO Numberbatch PyTorch embeddings could not be loaded. Aborting.")
+        return 1
+
+    if args.rebuild or not utils.load_ann_index_pytorch():
+        start_time = time.perf_counter()
+        if not preparation.build_and_save_ann_index_pytorch():
+            return 1
+        print(f"Index build time: {time.perf_counter() - start_time:.1f}s")
+    index = utils.ann_index_pt
+    print(f"Index: {len(index)} rows, {index.nlist} lists, {index.m} bytes/code")
+
+    inverse_norms = utils.get_inverse_row_norms_pytorch()
+    rng = np.random.default_rng(0)
+    candidates = np.flatnonzero(inverse_norms.cpu().numpy() > 0)
+    query_rows = rng.choice(candidates, size=min(args.queries, len(candidates)))
+    queries = utils.get_normalized_rows_pytorch(query_rows.tolist()).cpu()
+
+    # Ground truth from the exact block scan, excluding the query row like /nearest.
+    start_time = time.perf_counter()
+    truth, _ = utils.exact_top_k_pytorch(queries, k=args.k, exclude_rows=query_rows)
+    print(
+        f"Exact scan for {len(query_rows)} queries: {time.perf_counter() - start_time:.2f}s"
+    )
+    truth = [set(row) for row in truth.cpu().tolist()]
+
+    for nprobe in args.nprobe:
+        latencies = []
+        hits = 0
+        for query, query_row, expected in zip(queries, query_rows, truth):
+            start_time = time.perf_counter()
+            rows, _ = index.search(
+                query.numpy(),
+                k=args.k,
+                nprobe=nprobe,
+                exclude_rows=np.array([query_row]),
+                row_mask=utils.get_nonzero_row_mask(),
+                rerank_fn=lambda candidate_rows: utils._exact_scores(
+                    query, candidate_rows
+                ),
+            )
+            latencies.append((time.perf_counter() - start_time) * 1000)
+            hits += len(set(rows.tolist()) & expected)
+        recall = hits / (len(truth) * args.k)
+        print(
+            f"nprobe={nprobe:3d}  recall@{args.k}={recall:.3f}  "
+            f"p50={np.percentile(latencies, 50):.2f}ms  p95={np.percentile(latencies, 95):.2f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
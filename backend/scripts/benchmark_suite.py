@@ -0,0 +1,342 @@
+import sys
+import os
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+import numpy as np
+
+# Every stage runs in a fresh interpreter inside the work directory (utils'
+# paths are relative to the cwd), so load times are cold and peak RSS is the
+# stage's own. The stage prints its result as the last line after this marker.
+RESULT_MARKER = "BENCHMARK_RESULT "
+STAGES = ("parse", "load_table", "load_full", "latency", "http")
+
+# Share of fixture rows per language; the other languages are filtered out by
+# the parser, as in the real dump.
+FIXTURE_LANGUAGES = {"en": 0.4, "ko": 0.2, "fr": 0.2, "de": 0.1, "ja": 0.1}
+HANGUL_SYLLABLES = [chr(code) for code in range(0xAC00, 0xAC00 + 2000)]
+OOV_QUERY_SHARE = 0.1
+
+
+def _fixture_term(rng, lang, i):
+    if lang == "ko":
+        return "".join(rng.choice(HANGUL_SYLLABLES, size=rng.integers(1, 4))) + str(i)
+    if i % 7 == 0:
+        return f"w{i}_phrase"
+    return f"w{i}"
+
+
+def write_synthetic_numberbatch(path, num_rows, dim, seed=0, chunk_rows=5000):
+    """
+    Writes a gzipped Numberbatch-format dump: a "rows dim" header, then
+    "/c/<lang>/<term> v1 ... vdim" lines with 4-decimal values.
+    """
+    import gzip
+
+    rng = np.random.default_rng(seed)
+    languages = list(FIXTURE_LANGUAGES)
+    langs = rng.choice(languages, size=num_rows, p=list(FIXTURE_LANGUAGES.values()))
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=1) as f_out:
+        f_out.write(f"{num_rows} {dim}\n")
+        for start in range(0, num_rows, chunk_rows):
+            end = min(start + chunk_rows, num_rows)
+            vectors = rng.standard_normal((end - start, dim)).astype(np.float32) * 0.1
+            lines = []
+            for i, vector in zip(range(start, end), vectors):
+                key = f"/c/{langs[i]}/{_fixture_term(rng, langs[i], i)}"
+                lines.append(key + " " + " ".join(f"{x:.4f}" for x in vector))
+            f_out.write("\n".join(lines) + "\n")
+
+
+def _query_words(keys, count, seed=1):
+    """(word, lang) pairs: mostly vocabulary terms, OOV_QUERY_SHARE unknown words."""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in rng.choice(len(keys), size=count):
+        _, _, lang, term = keys[i].split("/", 3)
+        queries.append((term, lang))
+    for i in range(int(count * OOV_QUERY_SHARE)):
+        queries[i * int(1 / OOV_QUERY_SHARE)] = (f"zz_oov_{i}", "en")
+    return queries
+
+
+def latency_summary(latencies_s):
+    """Latency percentiles in milliseconds."""
+    ms = np.asarray(latencies_s) * 1000.0
+    return {
+        "count": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS).
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _clear_caches(utils):
+    utils.word_index_cache.clear()
+    utils.coordinate_cache.clear()
+
+
+# --- Stages (run inside the work directory) ---
+
+
+def stage_parse(args):
+    import preparation
+    import utils
+
+    source_size = os.path.getsize(utils.NUMBERBATCH_GZ_PATH)
+    start_time = time.perf_counter()
+    if not preparation.parse_numberbatch_and_save_pytorch():
+        raise RuntimeError("Parsing the synthetic fixture failed.")
+    parse_seconds = time.perf_counter() - start_time
+    rows = len(utils.word_to_idx)
+
+    # The PCA projector and the coordinate table are needed by the later stages.
+    start_time = time.perf_counter()
+    if preparation.train_and_save_pca_pytorch(fit_mode="full") is None:
+        raise RuntimeError("PCA training on the synthetic fixture failed.")
+    pca_seconds = time.perf_counter() - start_time
+    return {
+        "seconds": parse_seconds,
+        "input_rows": args.rows,
+        "kept_rows": rows,
+        "input_rows_per_second": args.rows / parse_seconds,
+        "compressed_mb_per_second": source_size / (1024 * 1024) / parse_seconds,
+        "pca_and_coordinate_table_seconds": pca_seconds,
+    }
+
+
+def stage_load_table(args):
+    import app
+
+    start_time = time.perf_counter()
+    app.ensure_models_loaded()
+    return {"seconds": time.perf_counter() - start_time, "path": "coordinate table"}
+
+
+def stage_load_full(args):
+    import utils
+
+    start_time = time.perf_counter()
+    if not utils.load_numberbatch_pytorch():
+        raise RuntimeError("Loading the embedding store failed.")
+    store_seconds = time.perf_counter() - start_time
+    if utils.get_pca_model_pytorch() is None:
+        raise RuntimeError("Loading the PCA projector failed.")
+    # Touch every row once, like a cold similarity/nearest request would.
+    utils.get_inverse_row_norms_pytorch()
+    return {
+        "seconds": time.perf_counter() - start_time,
+        "embedding_store_seconds": store_seconds,
+    }
+
+
+def stage_latency(args):
+    import utils
+
+    if not utils.load_numberbatch_pytorch() or utils.get_pca_model_pytorch() is None:
+        raise RuntimeError("Loading the embeddings or the PCA projector failed.")
+    queries = _query_words(utils.idx_to_word_list, args.queries)
+    result = {}
+
+    # Single word: vector fetch + 2D projection, caches cleared (cold) or kept (warm).
+    for mode in ("cold", "warm"):
+        latencies = []
+        for word, lang in queries:
+            if mode == "cold":
+                _clear_caches(utils)
+            start_time = time.perf_counter()
+            utils.transform_to_2d_pytorch(utils.get_word_vector_pytorch(word, lang))
+            latencies.append(time.perf_counter() - start_time)
+        result[f"single_vector_projection_{mode}"] = latency_summary(latencies)
+
+    # Batched coordinates as used by /word-to-coordinates.
+    for batch_size in args.batch_sizes:
+        for mode in ("cold", "warm"):
+            latencies = []
+            for start in range(0, len(queries) - batch_size + 1, batch_size):
+                batch = queries[start : start + batch_size]
+                if mode == "cold":
+                    _clear_caches(utils)
+                start_time = time.perf_counter()
+                utils.get_words_coordinates_pytorch(
+                    [word for word, _ in batch], [lang for _, lang in batch]
+                )
+                latencies.append(time.perf_counter() - start_time)
+            result[f"batch_{batch_size}_coordinates_{mode}"] = latency_summary(
+                latencies
+            )
+
+    # Similarity matrix for a round's worth of words.
+    latencies = []
+    for start in range(0, len(queries) - 5 + 1, 5):
+        batch = queries[start : start + 5]
+        start_time = time.perf_counter()
+        utils.get_similarity_matrix_pytorch(
+            [word for word, _ in batch], [lang for _, lang in batch]
+        )
+        latencies.append(time.perf_counter() - start_time)
+    result["similarity_matrix_5"] = latency_summary(latencies)
+    return result
+
+
+def stage_http(args):
+    import app
+    import utils
+
+    app.ensure_models_loaded()
+    client = app.app.test_client()
+    queries = _query_words(utils.idx_to_word_list, args.requests)
+    # The first request pays for lazy imports and setup; report it separately.
+    start_time = time.perf_counter()
+    client.post("/word-to-coordinates", json={"words": [queries[1][0]]})
+    result = {"first_request_ms": (time.perf_counter() - start_time) * 1000.0}
+    for words_per_request in (1, 5):
+        latencies = []
+        total_start = time.perf_counter()
+        for start in range(0, len(queries) - words_per_request + 1, words_per_request):
+            words = [word for word, _ in queries[start : start + words_per_request]]
+            start_time = time.perf_counter()
+            response = client.post("/word-to-coordinates", json={"words": words})
+            latencies.append(time.perf_counter() - start_time)
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f"/word-to-coordinates returned {response.status_code}"
+                )
+        elapsed = time.perf_counter() - total_start
+        result[f"word_to_coordinates_{words_per_request}_words"] = {
+            "requests_per_second": len(latencies) / elapsed,
+            **latency_summary(latencies),
+        }
+    return result
+
+
+def run_stage(name, args):
+    """Runs one stage in this process and prints its result after RESULT_MARKER."""
+    result = globals()[f"stage_{name}"](args)
+    result["peak_rss_mb"] = _peak_rss_mb()
+    print(RESULT_MARKER + json.dumps(result))
+
+
+# --- Driver ---
+
+
+def _spawn_stage(name, args, workdir):
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--stage",
+        name,
+        "--rows",
+        str(args.rows),
+        "--queries",
+        str(args.queries),
+        "--requests",
+        str(args.requests),
+        "--batch-sizes",
+        *[str(size) for size in args.batch_sizes],
+    ]
+    completed = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+    if args.verbose:
+        sys.stderr.write(completed.stdout)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER) :])
+    raise RuntimeError(
+        f"Benchmark stage '{name}' failed:\n{completed.stdout[-2000:]}{completed.stderr[-2000:]}"
+    )
+
+
+def _environment():
+    commit = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        pass
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark ingest, startup, lookup, projection and HTTP serving on a synthetic Numberbatch fixture."
+    )
+    parser.add_argument("--rows", type=int, default=100000, help="Fixture rows.")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument(
+        "--workdir",
+        help="Directory for the fixture and artifacts (default: a temporary one). "
+        "An existing fixture there is reused.",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        run_stage(args.stage, args)
+        return 0
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="shape_of_words_bench_")
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    # Same file name the parser looks for (utils.NUMBERBATCH_GZ_PATH).
+    fixture_path = os.path.join(workdir, "data", "numberbatch-19.08.txt.gz")
+    fixture = {"rows": args.rows, "dim": 300, "languages": FIXTURE_LANGUAGES}
+    if not os.path.exists(fixture_path):
+        start_time = time.perf_counter()
+        write_synthetic_numberbatch(fixture_path, args.rows, fixture["dim"])
+        fixture["generation_seconds"] = time.perf_counter() - start_time
+    fixture["compressed_mb"] = os.path.getsize(fixture_path) / (1024 * 1024)
+    print(f"Synthetic Numberbatch fixture: {fixture_path}")
+
+    results = {"environment": _environment(), "fixture": fixture, "stages": {}}
+    # "parse" produces the artifacts the other stages load.
+    stages = [name for name in STAGES if name in args.stages or name == "parse"]
+    for name in stages:
+        print(f"Running benchmark stage '{name}'...")
+        results["stages"][name] = _spawn_stage(name, args, workdir)
+
+    report = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f_out:
+            f_out.write(report + "\n")
+        print(f"Benchmark results written to {args.output}")
+    print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
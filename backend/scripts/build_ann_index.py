@@ -0,0 +1,26 @@
+import sys
+import os
+import time
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+import preparation
+import utils
+
+if __name__ == "__main__":
+    print("Building the EN/KO approximate nearest-neighbour index...")
+
+    if not utils.load_numberbatch_pytorch():
+        print("EN/KO Numberbatch PyTorch embeddings could not be loaded. Aborting.")
+        sys.exit(1)
+
+    # nlist defaults to sqrt(N) inverted lists; m=30 gives 30-byte codes for 300-d vectors.
+    start_time = time.perf_counter()
+    if not preparation.build_and_save_ann_index_pytorch(m=30, train_size=100000):
+        sys.exit(1)
+    print(f"EN/KO ANN index built in {time.perf_counter() - start_time:.1f}s.")
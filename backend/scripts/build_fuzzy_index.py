@@ -0,0 +1,29 @@
+import sys
+import os
+import time
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+import preparation
+import utils
+
+if __name__ == "__main__":
+    print("Building the EN/KO fuzzy index for out-of-vocabulary words...")
+
+    if not utils.load_numberbatch_vocabulary_pytorch():
+        print("EN/KO Numberbatch vocabulary could not be loaded. Aborting.")
+        sys.exit(1)
+
+    start_time = time.perf_counter()
+    if not preparation.build_and_save_fuzzy_index():
+        sys.exit(1)
+    print(f"EN/KO fuzzy index built in {time.perf_counter() - start_time:.1f}s.")
+
+    # A few typical misses, to eyeball what the fallback resolves them to.
+    for word, lang in (("helo", "en"), ("new york", "en"), ("사랑해요", "ko")):
+        print(f"  {word!r} ({lang}) -> {utils.resolve_oov_word_pytorch(word, lang)[1]}")
@@ -0,0 +1,35 @@
+import sys
+import os
+import time
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+import preparation
+import utils
+
+if __name__ == "__main__":
+    print("Building the EN/KO pivot catalogue...")
+
+    if not utils.load_numberbatch_pytorch():
+        print("EN/KO Numberbatch PyTorch embeddings could not be loaded. Aborting.")
+        sys.exit(1)
+    # Pivot coordinates come from the coordinate table, or the PCA model.
+    if (
+        not utils.load_coordinate_table_pytorch()
+        and utils.get_pca_model_pytorch() is None
+    ):
+        print("EN/KO PCA model could not be loaded. Aborting.")
+        sys.exit(1)
+
+    start_time = time.perf_counter()
+    if not preparation.build_and_save_pivot_catalogue_pytorch():
+        sys.exit(1)
+    print(f"EN/KO pivot catalogue built in {time.perf_counter() - start_time:.1f}s.")
+
+    pivot = utils.get_pivot_pytorch(k=5)
+    print(f"  e.g. {pivot['word']} ({pivot['lang']}): {pivot['neighbors']}")
@@ -0,0 +1,76 @@
+import sys
+import os
+import argparse
+import json
+import subprocess
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+# Cumulative `python -X importtime` budget for `import app`, in seconds. A
+# worker must boot in seconds; the models are loaded in a later stage.
+# Enforced by tests/test_import_budget.py.
+IMPORT_BUDGET_SECONDS = 1.5
+
+# Heavy modules that must only be imported when actually used (model loading,
+# preparation, download), never by `import app`.
+LAZY_MODULES = ("torch", "sklearn", "gensim", "requests", "joblib", "preparation")
+
+_PROBE = (
+    "import sys, json; import {module}; "
+    "print(json.dumps(sorted(m for m in {lazy!r} if m in sys.modules)))"
+)
+
+
+def measure_import(module="app"):
+    """
+    Imports `module` in a fresh interpreter under -X importtime.
+    Returns (cumulative seconds, eagerly imported lazy modules).
+    """
+    probe = _PROBE.format(module=module, lazy=LAZY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"`import {module}` failed:\n{result.stderr}")
+
+    # importtime lines: "import time: self [us] | cumulative | imported package".
+    # Top-level imports are the ones without indentation in the package column.
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    eager = json.loads(result.stdout.strip().splitlines()[-1])
+    return total_us / 1e6, eager
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fails if importing the Flask app exceeds the import-time budget."
+    )
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS)
+    parser.add_argument("--module", default="app")
+    args = parser.parse_args()
+
+    seconds, eager = measure_import(args.module)
+    print(f"`import {args.module}`: {seconds:.2f}s (budget {args.budget:.2f}s)")
+    failed = False
+    if seconds > args.budget:
+        print("FAIL: import time is over budget.")
+        failed = True
+    if eager:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(eager)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
@@ -0,0 +1,114 @@
+import sys
+import os
+import argparse
+import json
+import time
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+import preparation
+import utils
+import numpy as np
+from sklearn.decomposition import PCA
+
+
+def fit_sampled(n_components, num_words):
+    """The sampled fit: PCA on WORD_VECTORS_PT_PATH, or on a fresh stratified sample."""
+    if os.path.exists(utils.WORD_VECTORS_PT_PATH):
+        data_np = np.load(utils.WORD_VECTORS_PT_PATH)
+    else:
+        rows = preparation.sample_pca_training_rows(num_words)
+        data_np = utils.gather_embedding_rows_pytorch(rows).cpu().numpy()
+    pca = PCA(n_components=n_components)
+    pca.fit(data_np)
+    return pca, data_np.shape[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare sampled and full-vocabulary EN/KO PCA fits."
+    )
+    parser.add_argument("--components", type=int, default=2)
+    parser.add_argument("--num-words", type=int, default=40000)
+    parser.add_argument(
+        "--methods",
+        nargs="+",
+        default=["covariance", "incremental"],
+        help="Full-vocabulary fit methods to compare against the sampled fit.",
+    )
+    parser.add_argument("--chunk-rows", type=int, default=utils.PCA_FIT_CHUNK_ROWS)
+    parser.add_argument("--json", help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    if not utils.load_numberbatch_pytorch():
+        print("EN/KO Numberbatch PyTorch embeddings could not be loaded. Aborting.")
+        return 1
+
+    # Reference: covariance of the whole vocabulary, used to score every fit.
+    _, _, covariance = preparation.streaming_covariance_pytorch(args.chunk_rows)
+    covariance = covariance.numpy()
+    total_variance = float(np.trace(covariance))
+    reference_components = np.linalg.eigh(covariance)[1][:, ::-1].T[: args.components]
+
+    fits = []
+    start_time = time.perf_counter()
+    pca, num_rows = fit_sampled(args.components, args.num_words)
+    fits.append(("sample", pca, num_rows, time.perf_counter() - start_time))
+    for method in args.methods:
+        start_time = time.perf_counter()
+        pca = preparation.fit_pca_full_vocabulary_pytorch(
+            args.components, method=method, chunk_rows=args.chunk_rows
+        )
+        if pca is None:
+            print(f"Fit '{method}' failed. Skipping.")
+            continue
+        fits.append(
+            (method, pca, len(utils.word_to_idx), time.perf_counter() - start_time)
+        )
+
+    reports = []
+    for name, pca, num_rows, seconds in fits:
+        components = np.asarray(pca.components_, dtype=np.float64)
+        captured = np.einsum("ij,jk,ik->", components, covariance, components)
+        reports.append(
+            {
+                "fit": name,
+                "rows": int(num_rows),
+                "seconds": seconds,
+                "explained_variance_ratio": np.asarray(
+                    pca.explained_variance_ratio_
+                ).tolist(),
+                # Share of the full-vocabulary variance the projection keeps.
+                "full_vocabulary_variance_captured": float(captured) / total_variance,
+                # |cos| between each component and the exact full-vocabulary one.
+                "component_alignment": np.abs(
+                    np.einsum("ij,ij->i", components, reference_components)
+                ).tolist(),
+            }
+        )
+
+    print(
+        f"{'fit':12s} {'rows':>9s} {'seconds':>8s} {'own EVR':>16s} "
+        f"{'full var kept':>13s} {'alignment':>16s}"
+    )
+    for r in reports:
+        own = " ".join(f"{v:.4f}" for v in r["explained_variance_ratio"])
+        alignment = " ".join(f"{v:.4f}" for v in r["component_alignment"])
+        print(
+            f"{r['fit']:12s} {r['rows']:9d} {r['seconds']:8.2f} {own:>16s} "
+            f"{r['full_vocabulary_variance_captured']:13.4%} {alignment:>16s}"
+        )
+    if args.json:
+        with open(args.json, "w") as f_json:
+            json.dump(reports, f_json, indent=2)
+        print(f"Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
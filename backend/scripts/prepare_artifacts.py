@@ -0,0 +1,68 @@
+import sys
+import os
+import argparse
+import time
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+import artifact_manifest
+import utils
+
+
+def print_manifest():
+    """Lists the recorded artifacts and whether their files still match."""
+    manifest = artifact_manifest.load_manifest(utils.ARTIFACT_MANIFEST_PATH)
+    for name, entry in sorted(manifest["artifacts"].items()):
+        paths = {
+            key: os.path.join(utils.DATA_DIR, record["file"])
+            for key, record in entry["files"].items()
+        }
+        _, problem = artifact_manifest.verify_artifact(
+            utils.ARTIFACT_MANIFEST_PATH, name, paths
+        )
+        size_mb = sum(record["bytes"] for record in entry["files"].values()) / 1e6
+        print(
+            f"{name:<40} {entry['producer']:<17} v{entry['producer_version']} "
+            f"{size_mb:>9.1f} MB  {entry['content_hash'][:12]}  {problem or 'ok'}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rebuilds the EN/KO serving artifacts whose inputs changed, as recorded in the build manifest."
+    )
+    parser.add_argument(
+        "--adopt",
+        action="store_true",
+        help="Record existing artifacts missing from the manifest as they are, instead of rebuilding them.",
+    )
+    parser.add_argument(
+        "--include-optional",
+        action="store_true",
+        help="Also build the ANN index and pivot catalogue if they were never built.",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="Only list the recorded artifacts."
+    )
+    args = parser.parse_args()
+
+    if args.list:
+        print_manifest()
+        sys.exit(0)
+
+    import preparation
+
+    # The pruned set is derived from the full one by prepare_artifacts.
+    utils.select_serving_vocabulary("full")
+    start_time = time.perf_counter()
+    if not preparation.prepare_artifacts(
+        include_optional=args.include_optional, adopt=args.adopt
+    ):
+        sys.exit(1)
+    print(f"Done in {time.perf_counter() - start_time:.1f}s.")
+    print_manifest()
@@ -0,0 +1,185 @@
+import sys
+import os
+import argparse
+import json
+import resource
+import subprocess
+import time
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+# Each vocabulary set is measured in a fresh interpreter, so load times are
+# cold and peak RSS is the set's own. The result is the last line after this marker.
+RESULT_MARKER = "PRUNING_REPORT "
+
+
+def _artifact_files(utils, vocabulary):
+    """Every on-disk file of a vocabulary set that exists."""
+    import ann_index
+    import embedding_store
+    import fuzzy_index
+    import pivot_catalogue
+    import vocab_index
+
+    prefix = utils.vocabulary_artifact_path("EMBEDDING_STORE_PREFIX", vocabulary)
+    paths = list(embedding_store.store_paths(prefix).values())
+    paths += vocab_index.index_paths(prefix).values()
+    paths.append(utils.vocabulary_artifact_path("COORDINATES_TABLE_PATH", vocabulary))
+    paths += ann_index.index_paths(
+        utils.vocabulary_artifact_path("ANN_INDEX_PREFIX", vocabulary)
+    ).values()
+    paths += fuzzy_index.index_paths(
+        utils.vocabulary_artifact_path("FUZZY_INDEX_PREFIX", vocabulary)
+    ).values()
+    paths += pivot_catalogue.catalogue_paths(
+        utils.vocabulary_artifact_path("PIVOT_CATALOGUE_PREFIX", vocabulary)
+    ).values()
+    return [path for path in paths if os.path.exists(path)]
+
+
+def measure(vocabulary, sample_log):
+    """Size, load time, memory and OOV rates of one vocabulary set."""
+    import language_routing
+    import utils
+    import vocabulary_pruning
+
+    # torch is imported lazily by the loaders; keep it out of the timings.
+    import torch
+
+    utils.select_serving_vocabulary(vocabulary)
+    baseline_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    start_time = time.perf_counter()
+    table_loaded = (
+        utils.load_numberbatch_vocabulary_pytorch()
+        and utils.load_coordinate_table_pytorch()
+    )
+    table_load_s = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    store_loaded = utils._load_embedding_store()
+    store_load_s = time.perf_counter() - start_time
+    utils.load_fuzzy_index_pytorch()
+    if not store_loaded:
+        return {"vocabulary": vocabulary, "error": "store could not be loaded"}
+
+    words = [
+        word
+        for word in vocabulary_pruning.read_request_words(sample_log)
+        if len(word.strip()) > 1
+    ]
+    candidates = language_routing.candidate_languages(
+        words, utils.SCRIPT_LANGUAGES, utils.SUPPORTED_LANGUAGES
+    )
+    langs = utils.choose_word_languages(words, candidates)
+    routed = [(word, lang) for word, lang in zip(words, langs) if lang is not None]
+    routed_words = [word for word, _ in routed]
+    routed_langs = [lang for _, lang in routed]
+    exact = utils.lookup_word_indices_pytorch(routed_words, routed_langs)
+    word_rows, _ = utils.resolve_word_rows_pytorch(routed_words, routed_langs)
+
+    files = _artifact_files(utils, vocabulary)
+    return {
+        "vocabulary": vocabulary,
+        "rows": len(utils.word_to_idx),
+        "artifact_files": len(files),
+        "artifact_mb": sum(os.path.getsize(path) for path in files) / 1e6,
+        "coordinate_table": bool(table_loaded),
+        "table_load_s": table_load_s,
+        "store_load_s": store_load_s,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "loaded_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        - baseline_rss_mb,
+        "sample_words": len(routed),
+        "oov_rate_exact": (
+            sum(idx < 0 for idx in exact) / len(routed) if routed else 0.0
+        ),
+        "oov_rate_after_fallback": (
+            sum(not rows for rows in word_rows) / len(routed) if routed else 0.0
+        ),
+    }
+
+
+def _spawn_measure(vocabulary, sample_log):
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--measure",
+        vocabulary,
+        "--sample-log",
+        sample_log,
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER) :])
+    sys.stderr.write(completed.stderr)
+    return {"vocabulary": vocabulary, "error": f"exit code {completed.returncode}"}
+
+
+def _print_report(results):
+    columns = (
+        ("rows", "{:>10}"),
+        ("artifact_mb", "{:>10.1f}"),
+        ("table_load_s", "{:>10.3f}"),
+        ("store_load_s", "{:>10.3f}"),
+        ("loaded_rss_mb", "{:>10.1f}"),
+        ("oov_rate_exact", "{:>10.2%}"),
+        ("oov_rate_after_fallback", "{:>10.2%}"),
+    )
+    print("set     " + "".join(f"{name[:10]:>11}" for name, _ in columns))
+    for result in results:
+        if "error" in result:
+            print(f"{result['vocabulary']:<8}  error: {result['error']}")
+            continue
+        print(
+            f"{result['vocabulary']:<8}"
+            + "".join(" " + fmt.format(result[name]) for name, fmt in columns)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Writes the pruned EN/KO serving vocabulary and compares it with the full one."
+    )
+    parser.add_argument(
+        "--sample-log",
+        help="Request words to measure OOV rates on: one word per line, or JSON lines with a 'words' list.",
+    )
+    parser.add_argument(
+        "--report-only",
+        action="store_true",
+        help="Skip pruning; only compare the existing artifact sets.",
+    )
+    parser.add_argument("--output", help="Also write the report as JSON here.")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(RESULT_MARKER + json.dumps(measure(args.measure, args.sample_log)))
+        return
+
+    if not args.report_only:
+        import preparation
+
+        print("Pruning the EN/KO vocabulary...")
+        if not preparation.build_pruned_vocabulary_artifacts():
+            sys.exit(1)
+    if not args.sample_log:
+        return
+
+    results = [
+        _spawn_measure(vocabulary, args.sample_log) for vocabulary in ("full", "pruned")
+    ]
+    _print_report(results)
+    if args.output:
+        with open(args.output, "w") as f_out:
+            json.dump(results, f_out, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import sys
+import os
+import argparse
+import json
+
+# Add the project root and backend directory to sys.path to allow imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)  # This should be the 'backend' directory
+PROJECT_ROOT_DIR = os.path.dirname(BACKEND_DIR)  # This should be the project root
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT_DIR)
+
+import utils
+import embedding_store
+import numpy as np
+import torch
+
+
+def _cosine(a, b):
+    a = torch.nn.functional.normalize(a, dim=1)
+    b = torch.nn.functional.normalize(b, dim=1)
+    return (a * b).sum(dim=1)
+
+
+def report_mode(dtype, num_pairs, chunk_rows, rng):
+    """Memory and worst-case drift of one storage dtype against the float32 matrix."""
+    num_rows, dim = utils.embeddings_tensor.shape
+    stored_bytes = num_rows * dim * np.dtype(dtype).itemsize
+    if dtype == "int8":
+        stored_bytes += num_rows * 4  # per-row float32 scales
+
+    max_coord_drift = 0.0
+    sum_coord_drift = 0.0
+    for start in range(0, num_rows, chunk_rows):
+        reference = utils.embedding_block_pytorch(start, start + chunk_rows)
+        stored, scales = embedding_store.quantize_rows(reference.cpu().numpy(), dtype)
+        restored = torch.from_numpy(embedding_store.dequantize_rows(stored, scales))
+        drift = np.linalg.norm(
+            utils.transform_to_2d_batch_pytorch(reference)
+            - utils.transform_to_2d_batch_pytorch(restored),
+            axis=1,
+        )
+        max_coord_drift = max(max_coord_drift, float(drift.max()))
+        sum_coord_drift += float(drift.sum())
+
+    # Zero vectors are OOV everywhere else, and their cosine is 0 whatever the
+    # dtype; pairing them would only pull min_self_cosine down to 0.
+    nonzero_rows = np.flatnonzero(utils.get_nonzero_row_mask())
+    pairs = nonzero_rows[rng.integers(0, len(nonzero_rows), size=(num_pairs, 2))]
+    left = utils.gather_embedding_rows_pytorch(pairs[:, 0].tolist()).cpu()
+    right = utils.gather_embedding_rows_pytorch(pairs[:, 1].tolist()).cpu()
+    restored_left = torch.from_numpy(
+        embedding_store.dequantize_rows(
+            *embedding_store.quantize_rows(left.numpy(), dtype)
+        )
+    )
+    restored_right = torch.from_numpy(
+        embedding_store.dequantize_rows(
+            *embedding_store.quantize_rows(right.numpy(), dtype)
+        )
+    )
+    cosine_drift = (_cosine(left, right) - _cosine(restored_left, restored_right)).abs()
+    self_cosine = _cosine(left, restored_left)
+
+    return {
+        "dtype": dtype,
+        "bytes": stored_bytes,
+        "saved_vs_float32": 1.0 - stored_bytes / (num_rows * dim * 4),
+        "max_coordinate_drift": max_coord_drift,
+        "mean_coordinate_drift": sum_coord_drift / num_rows,
+        "max_pair_cosine_drift": float(cosine_drift.max()),
+        "mean_pair_cosine_drift": float(cosine_drift.mean()),
+        "min_self_cosine": float(self_cosine.min()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare float16/int8 embedding storage against float32."
+    )
+    parser.add_argument("--pairs", type=int, default=100000)
+    parser.add_argument("--chunk-rows", type=int, default=65536)
+    parser.add_argument("--json", help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    if not utils.load_numberbatch_pytorch():
+        print("EN/KO Numberbatch PyTorch embeddings could not be loaded. Aborting.")
+        return 1
+    if utils.embeddings_tensor.dtype != torch.float32:
+        print(
+            f"The reference store must be float32, found {utils.embeddings_tensor.dtype}. "
+            "Rebuild it with EMBEDDING_STORE_DTYPE = 'float32' to compare."
+        )
+        return 1
+    if utils.get_pca_model_pytorch() is None:
+        print("EN/KO PCA model could not be loaded. Aborting.")
+        return 1
+    if not utils.get_nonzero_row_mask().any():
+        print("Every EN/KO embedding row is a zero vector. Nothing to compare.")
+        return 1
+
+    rng = np.random.default_rng(0)
+    reports = [
+        report_mode(dtype, args.pairs, args.chunk_rows, rng)
+        for dtype in ("float32", "float16", "int8")
+    ]
+    print(
+        f"{'dtype':8s} {'size MB':>9s} {'saved':>6s} {'max 2D drift':>13s} "
+        f"{'mean 2D drift':>14s} {'max cos drift':>14s} {'min self cos':>13s}"
+    )
+    for r in reports:
+        print(
+            f"{r['dtype']:8s} {r['bytes'] / 2**20:9.1f} {r['saved_vs_float32']:6.0%} "
+            f"{r['max_coordinate_drift']:13.2e} {r['mean_coordinate_drift']:14.2e} "
+            f"{r['max_pair_cosine_drift']:14.2e} {r['min_self_cosine']:13.6f}"
+        )
+    if args.json:
+        with open(args.json, "w") as f_json:
+            json.dump(reports, f_json, indent=2)
+        print(f"Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
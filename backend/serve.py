@@ -0,0 +1,113 @@
+# Production launcher: gunicorn with the models loaded once, before forking.
+#
+# The master process waits for the model loader (app.ensure_models_loaded())
+# and then forks the workers, which inherit the loaded, ready state instead of
+# each loading their own copy. The
+# embedding store, vocabulary index, coordinate table and ANN index are all
+# read-only memory maps, so their pages live in the shared page cache; the
+# remaining Python objects are moved out of the garbage collector's reach with
+# gc.freeze() so refcount/GC traffic in the workers doesn't copy their pages.
+# Per-worker memory is then mostly the lookup caches.
+#
+#   python serve.py --workers 4               # Flask app, threaded workers
+#   python serve.py --workers 4 --asgi        # asgi_app with request coalescing
+#   python serve.py --prepare                 # prepare missing artifacts first
+#
+# /healthz and /readyz report the model state of the worker that answers.
+
+import argparse
+import gc
+import os
+import sys
+
+from gunicorn.app.base import BaseApplication
+
+import app as flask_app_module
+import utils
+
+
+def _limit_torch_threads(threads):
+    # Workers share the cores, so each gets a small torch thread pool (set after fork).
+    torch = sys.modules.get("torch")
+    if torch is not None and threads:
+        torch.set_num_threads(threads)
+
+
+class PreloadedApplication(BaseApplication):
+    """gunicorn application serving an already-imported, already-loaded WSGI/ASGI app."""
+
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serves the EN/KO coordinate API with gunicorn, loading models before fork."
+    )
+    parser.add_argument("--bind", default="0.0.0.0:5001")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--threads", type=int, default=4, help="Threads per (non-ASGI) worker."
+    )
+    parser.add_argument(
+        "--asgi",
+        action="store_true",
+        help="Serve asgi_app (request coalescing) with uvicorn workers.",
+    )
+    parser.add_argument(
+        "--torch-threads",
+        type=int,
+        default=1,
+        help="torch intra-op threads per worker (0 keeps torch's default).",
+    )
+    parser.add_argument("--timeout", type=int, default=120)
+    parser.add_argument(
+        "--prepare",
+        action="store_true",
+        help="Prepare missing artifacts in this (master) process before forking.",
+    )
+    args = parser.parse_args()
+
+    # Only the master prepares; the workers inherit the result.
+    if args.prepare:
+        utils.PREPARE_MISSING_ARTIFACTS = True
+    flask_app_module.ensure_models_loaded()
+    if not utils.can_serve_coordinates():
+        utils.logger.critical("EN/KO models are not loaded. Refusing to start workers.")
+        sys.exit(1)
+
+    options = {
+        "bind": args.bind,
+        "workers": args.workers,
+        "timeout": args.timeout,
+        "preload_app": True,
+        "post_fork": lambda server, worker: _limit_torch_threads(args.torch_threads),
+    }
+    if args.asgi:
+        import asgi_app
+
+        application = asgi_app.app
+        options["worker_class"] = "uvicorn.workers.UvicornWorker"
+    else:
+        application = flask_app_module.app
+        options["worker_class"] = "gthread"
+        options["threads"] = args.threads
+
+    # Everything allocated so far is shared with the workers; keep the GC from
+    # touching (and so copying) those pages.
+    gc.collect()
+    gc.freeze()
+    PreloadedApplication(application, options).run()
+
+
+if __name__ == "__main__":
+    main()
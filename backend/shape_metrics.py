@@ -0,0 +1,85 @@
+# Geometry and scoring of the game's n-gon (pivot word + guesses).
+#
+# The vertices are the 2D coordinates of the words in input order (pivot
+# first), like the frontend draws them: consecutive words are joined and the
+# last is joined back to the pivot. Words without coordinates are left out of
+# the polygon. Everything is computed on NumPy arrays in one pass.
+
+import numpy as np
+
+
+def polygon_edges(num_vertices):
+    """
+    (from, to) vertex positions of the polygon's edges: the closed ring for
+    three or more vertices, the single segment for two, nothing otherwise.
+    """
+    if num_vertices < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    if num_vertices == 2:
+        return np.array([[0, 1]], dtype=np.int64)
+    starts = np.arange(num_vertices)
+    return np.stack([starts, np.roll(starts, -1)], axis=1)
+
+
+def polygon_metrics(vertices):
+    """
+    Area (shoelace formula, absolute) and perimeter of the polygon through
+    `vertices`, a (k, 2) array in drawing order, plus its edge lengths.
+    Returns (area, perimeter, edge_lengths).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    edges = polygon_edges(len(vertices))
+    starts, ends = vertices[edges[:, 0]], vertices[edges[:, 1]]
+    lengths = np.hypot(*(ends - starts).T)
+    area = 0.0
+    if len(vertices) >= 3:
+        area = 0.5 * abs(
+            float(np.sum(starts[:, 0] * ends[:, 1] - ends[:, 0] * starts[:, 1]))
+        )
+    return area, float(lengths.sum()), lengths
+
+
+def shape_score(edge_similarities, scale=100):
+    """
+    `scale` times the mean edge similarity, negative similarities counting as
+    0 and unknown (NaN) edges skipped; 0 without edges.
+    """
+    similarities = np.asarray(edge_similarities, dtype=np.float64)
+    similarities = similarities[~np.isnan(similarities)]
+    if not len(similarities):
+        return 0
+    return int(round(scale * float(np.clip(similarities, 0.0, 1.0).mean())))
+
+
+def build_shape(words, coordinates, similarity, score_scale=100):
+    """
+    The /shape response body for `words` (pivot first), their coordinates
+    ([x, y] or None each) and their (n, n) similarity matrix (NaN = unknown).
+    """
+    present = [i for i, coord in enumerate(coordinates) if coord is not None]
+    vertices = np.asarray([coordinates[i] for i in present], dtype=np.float64)
+    area, perimeter, lengths = polygon_metrics(vertices)
+
+    edge_positions = polygon_edges(len(present))
+    word_positions = np.asarray(present, dtype=np.int64)[edge_positions]
+    edge_similarities = similarity[word_positions[:, 0], word_positions[:, 1]]
+    edges = [
+        {
+            "from": words[i],
+            "to": words[j],
+            "similarity": None if np.isnan(value) else value,
+            "length": length,
+        }
+        for (i, j), value, length in zip(
+            word_positions.tolist(), edge_similarities.tolist(), lengths.tolist()
+        )
+    ]
+    return {
+        "words": words,
+        "vertices": coordinates,
+        "missing": [word for word, coord in zip(words, coordinates) if coord is None],
+        "edges": edges,
+        "area": area,
+        "perimeter": perimeter,
+        "score": shape_score(edge_similarities, score_scale),
+    }
@@ -0,0 +1,23 @@
+import os
+import sys
+
+# The measurement lives in scripts/check_import_budget.py, so the budget can
+# also be checked by hand (and with another --budget or --module).
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "scripts"))
+
+import check_import_budget
+
+
+def test_import_app_is_within_budget():
+    seconds, _ = check_import_budget.measure_import("app")
+    assert seconds <= check_import_budget.IMPORT_BUDGET_SECONDS, (
+        f"`import app` took {seconds:.2f}s, "
+        f"budget is {check_import_budget.IMPORT_BUDGET_SECONDS:.2f}s"
+    )
+
+
+def test_import_app_keeps_heavy_modules_lazy():
+    _, eager = check_import_budget.measure_import("app")
+    assert eager == [], f"heavy modules imported eagerly: {', '.join(eager)}"
@@ -0,0 +1,127 @@
+import os
+import sys
+
+import numpy as np
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+import shape_metrics
+
+
+def test_polygon_edges_without_a_segment():
+    assert shape_metrics.polygon_edges(0).shape == (0, 2)
+    assert shape_metrics.polygon_edges(1).shape == (0, 2)
+
+
+def test_polygon_edges_of_two_vertices_are_one_segment():
+    assert shape_metrics.polygon_edges(2).tolist() == [[0, 1]]
+
+
+def test_polygon_edges_close_the_ring():
+    assert shape_metrics.polygon_edges(3).tolist() == [[0, 1], [1, 2], [2, 0]]
+    assert shape_metrics.polygon_edges(5).tolist() == [
+        [0, 1],
+        [1, 2],
+        [2, 3],
+        [3, 4],
+        [4, 0],
+    ]
+
+
+def test_polygon_metrics_of_a_right_triangle():
+    area, perimeter, lengths = shape_metrics.polygon_metrics([[0, 0], [4, 0], [0, 3]])
+    assert area == 6.0
+    assert perimeter == 12.0
+    assert lengths.tolist() == [4.0, 5.0, 3.0]
+
+
+def test_polygon_metrics_area_ignores_orientation():
+    square = [[0, 0], [0, 2], [2, 2], [2, 0]]  # clockwise
+    area, perimeter, _ = shape_metrics.polygon_metrics(square)
+    assert area == 4.0
+    assert perimeter == 8.0
+
+
+def test_polygon_metrics_of_a_segment_has_no_area():
+    area, perimeter, lengths = shape_metrics.polygon_metrics([[0, 0], [3, 4]])
+    assert area == 0.0
+    assert perimeter == 5.0
+    assert lengths.tolist() == [5.0]
+
+
+def test_polygon_metrics_of_a_point():
+    area, perimeter, lengths = shape_metrics.polygon_metrics([[1, 1]])
+    assert (area, perimeter, len(lengths)) == (0.0, 0.0, 0)
+
+
+def test_shape_score_clips_negative_similarities_to_zero():
+    assert shape_metrics.shape_score([0.5, -0.5]) == 25
+
+
+def test_shape_score_skips_unknown_edges():
+    assert shape_metrics.shape_score([0.4, np.nan, 0.6], scale=10) == 5
+
+
+def test_shape_score_without_edges_is_zero():
+    assert shape_metrics.shape_score([]) == 0
+    assert shape_metrics.shape_score([np.nan, np.nan]) == 0
+
+
+def _similarity(n, value=0.5):
+    similarity = np.full((n, n), value, dtype=np.float32)
+    np.fill_diagonal(similarity, 1.0)
+    return similarity
+
+
+def test_build_shape_joins_the_last_guess_back_to_the_pivot():
+    words = ["pivot", "a", "b"]
+    shape = shape_metrics.build_shape(
+        words, [[0, 0], [4, 0], [0, 3]], _similarity(3), score_scale=100
+    )
+    assert [(edge["from"], edge["to"]) for edge in shape["edges"]] == [
+        ("pivot", "a"),
+        ("a", "b"),
+        ("b", "pivot"),
+    ]
+    assert shape["missing"] == []
+    assert shape["area"] == 6.0
+    assert shape["perimeter"] == 12.0
+    assert shape["score"] == 50
+
+
+def test_build_shape_skips_and_reports_missing_words():
+    words = ["pivot", "lost", "a", "b"]
+    similarity = _similarity(4)
+    similarity[2, 3] = similarity[3, 2] = -0.2
+    shape = shape_metrics.build_shape(
+        words, [[0, 0], None, [4, 0], [0, 3]], similarity, score_scale=100
+    )
+    assert shape["missing"] == ["lost"]
+    assert shape["vertices"][1] is None
+    assert [(edge["from"], edge["to"]) for edge in shape["edges"]] == [
+        ("pivot", "a"),
+        ("a", "b"),
+        ("b", "pivot"),
+    ]
+    assert shape["area"] == 6.0
+    # (0.5 + 0 + 0.5) / 3, the negative edge counting as 0.
+    assert shape["score"] == 33
+
+
+def test_build_shape_reports_unknown_similarities_as_null():
+    similarity = _similarity(2)
+    similarity[0, 1] = similarity[1, 0] = np.nan
+    shape = shape_metrics.build_shape(["pivot", "a"], [[0, 0], [3, 4]], similarity)
+    assert shape["edges"] == [
+        {"from": "pivot", "to": "a", "similarity": None, "length": 5.0}
+    ]
+    assert shape["score"] == 0
+
+
+def test_build_shape_with_one_vertex_has_no_edges():
+    shape = shape_metrics.build_shape(["pivot", "lost"], [[1, 2], None], _similarity(2))
+    assert shape["edges"] == []
+    assert shape["missing"] == ["lost"]
+    assert (shape["area"], shape["perimeter"], shape["score"]) == (0.0, 0.0, 0)
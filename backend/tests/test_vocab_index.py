@@ -0,0 +1,110 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+import vocab_index
+
+# Row order is the order of the source dump, not sorted.
+KEYS = [
+    "/c/en/king",
+    "/c/ko/사랑",
+    "/c/en/queen",
+    "/c/ko/사",
+    "/c/en/new_york",
+    "/c/ko/사과",
+    "/c/en/a",
+    "/c/ko/왕",
+    "/c/en/kingdom",
+    "/c/ko/k팝",
+    "/c/en/été",
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    prefix = str(tmp_path / "vocab")
+    vocab_index.save_index(prefix, KEYS, languages=["en", "ko"])
+    return vocab_index.load_index(prefix)
+
+
+def test_save_then_load_round_trips(index, tmp_path):
+    assert vocab_index.index_exists(str(tmp_path / "vocab"))
+    assert len(index) == len(KEYS)
+    assert index.languages == ["en", "ko"]
+    assert list(index) == KEYS
+    assert list(index.key_list()) == KEYS
+    assert index.key_list()[1:3] == KEYS[1:3]
+
+
+def test_every_key_resolves_to_its_row(index):
+    for row, key in enumerate(KEYS):
+        lang, term = vocab_index.split_key(key)
+        assert index.lookup(term, lang) == row
+        assert index[key] == row
+        assert key in index
+        assert index.key_at(row) == key
+        assert index.lang_at(row) == lang
+        assert index.term_at(row) == term
+
+
+def test_missing_keys_are_not_found(index):
+    for term, lang in [("kin", "en"), ("kings", "en"), ("zzz", "en"), ("", "en")]:
+        assert index.lookup(term, lang) == -1
+    assert index.lookup("사랑해", "ko") == -1
+    assert "/c/en/castle" not in index
+    assert index.get("/c/en/castle") is None
+    with pytest.raises(KeyError):
+        index["/c/en/castle"]
+
+
+def test_keys_of_other_languages_are_not_found(index):
+    assert index.lookup("king", "ko") == -1
+    assert index.lookup("사랑", "en") == -1
+    assert index.lookup("king", "fr") == -1
+    assert "/c/fr/king" not in index
+    assert "king" not in index
+    assert index.get(42) is None
+
+
+def test_terms_are_ordered_by_utf8_bytes_within_each_language(index, tmp_path):
+    paths = vocab_index.index_paths(str(tmp_path / "vocab"))
+    order = np.load(paths["order"])
+    bounds = np.load(paths["lang_bounds"])
+    for lang_id, lang in enumerate(index.languages):
+        rows = order[bounds[lang_id] : bounds[lang_id + 1]].tolist()
+        assert {index.lang_at(row) for row in rows} == {lang}
+        terms = [index.term_at(row).encode("utf-8") for row in rows]
+        assert terms == sorted(terms)
+    # Hangul prefixes sort before their extensions, ASCII before Hangul.
+    ko_terms = [index.term_at(row) for row in order[bounds[1] : bounds[2]].tolist()]
+    assert ko_terms == ["k팝", "사", "사과", "사랑", "왕"]
+
+
+def test_default_languages_are_sorted(tmp_path):
+    prefix = str(tmp_path / "vocab")
+    vocab_index.save_index(prefix, ["/c/ko/왕", "/c/en/king"])
+    index = vocab_index.load_index(prefix)
+    assert index.languages == ["en", "ko"]
+    assert index["/c/ko/왕"] == 0
+    assert index["/c/en/king"] == 1
+
+
+def test_save_index_rejects_unknown_languages(tmp_path):
+    with pytest.raises(ValueError):
+        vocab_index.save_index(
+            str(tmp_path / "vocab"), ["/c/en/king", "/c/fr/roi"], ["en"]
+        )
+
+
+def test_empty_index(tmp_path):
+    prefix = str(tmp_path / "vocab")
+    vocab_index.save_index(prefix, [], languages=["en", "ko"])
+    index = vocab_index.load_index(prefix)
+    assert len(index) == 0
+    assert index.lookup("king", "en") == -1
@@ -1,33 +1,48 @@
 # Utility functions for data loading, preprocessing, and PCA transformation
 
-import gensim.downloader as api
-from sklearn.decomposition import PCA
+# Serving side: maps the prepared artifacts and answers lookups. Offline steps
+# (download, parse, PCA fitting, table/index builds) live in preparation.py.
+# Nothing here loads or builds a model on demand: the load_* functions are run
+# by the app's background loader (see model_lifecycle.py), and the lookup
+# functions report the models they need as unavailable until then.
+# torch is imported inside the functions that need it, so importing this module
+# (and app.py) stays cheap and the precomputed-table path never loads torch.
+
+import logging
 import numpy as np
-import joblib  # For saving/loading sklearn models
 import os
-import gzip
-import shutil
-import requests
-import pickle
-
-import torch
+import random
+import re
+
+import ann_index
+import artifact_manifest
+import embedding_store
+import fuzzy_index
+import instrumentation
+import lookup_cache
+import pca_projector
+import pivot_catalogue
+import vocab_index
 
 # --- Device Configuration ---
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-print(f"Using PyTorch device: {device}")
-
-# Global variable to hold the model and PCA
-# We load them once to save time on subsequent requests
-numberbatch_model = None
-pca_model = None
-PCA_MODEL_PATH = "data/pca_model.joblib"
-WORD_VECTORS_PATH = "data/word_vectors_for_pca.npy"  # For storing subset of vectors used for PCA training
+# Resolved on first use by get_device(), which imports torch.
+device = None
 
 # --- Configuration for Numberbatch (Multilingual EN+KO) ---
 # Using the full multilingual Numberbatch file
 NUMBERBATCH_RAW_URL = "https://conceptnet.s3.amazonaws.com/downloads/2019/numberbatch/numberbatch-19.08.txt.gz"
 NUMBERBATCH_DIM = 300
 SUPPORTED_LANGUAGES = ["en", "ko"]  # Specify supported languages
+# Candidate languages per writing system, in priority order (see
+# language_routing.py). Only languages in SUPPORTED_LANGUAGES are tried, so
+# adding e.g. "ja" or "fr" there is enough to route kana / Latin words to it.
+SCRIPT_LANGUAGES = {
+    "hangul": ["ko"],
+    "kana": ["ja"],
+    "han": ["zh", "ja", "ko"],
+    "cyrillic": ["ru"],
+    "latin": ["en", "fr", "de", "es", "it", "pt", "nl"],
+}
 
 DATA_DIR = "data"
 # Update filenames to reflect multilingual (en+ko) nature
@@ -36,7 +51,7 @@ NUMBERBATCH_GZ_PATH = os.path.join(
 )  # Full multilingual file
 NUMBERBATCH_TXT_PATH = os.path.join(
     DATA_DIR, "numberbatch-19.08.txt"
-)  # Full multilingual file
+)  # Optional decompressed copy; the parser reads the .gz directly
 
 PYTORCH_EMBEDDINGS_PATH = os.path.join(DATA_DIR, "nb_embeddings_enko.pt")
 PYTORCH_WORD_TO_IDX_PATH = os.path.join(DATA_DIR, "nb_word_to_idx_enko.pkl")
@@ -44,205 +59,469 @@ PYTORCH_IDX_TO_WORD_PATH = os.path.join(
     DATA_DIR, "nb_idx_to_word_enko.pkl"
 )  # This might be less useful if keys are full paths
 
+# Memory-mapped embedding store (see embedding_store.py). This replaces the
+# torch.save/pickle artifacts above, which are only read to migrate old data.
+EMBEDDING_STORE_PREFIX = os.path.join(DATA_DIR, "nb_store_enko")
+# "float32", "float16" (half the size) or "int8" (a quarter, plus one float32
+# scale per row). Lookups, projection and similarity dequantise on the fly.
+EMBEDDING_STORE_DTYPE = "float32"
+
+# --- Configuration for the serving vocabulary (see vocabulary_pruning.py) ---
+# "full" serves every EN/KO row; "pruned" serves the smaller artifact set
+# written by scripts/prune_vocabulary.py. Each set has its own store,
+# coordinate table, ANN / fuzzy indexes and pivot catalogue (file names get
+# the set's suffix, see select_serving_vocabulary); the PCA projector is
+# shared, so a word has the same coordinates in both.
+SERVING_VOCABULARY = "full"
+VOCABULARY_ARTIFACT_SUFFIXES = {"full": "", "pruned": "_pruned"}
+# Pruning filters, applied per language: at most this many "_"-joined tokens,
+# every token matching the language's pattern, then the word budget (in
+# frequency-list order if a list is given, otherwise vocabulary order).
+PRUNE_MAX_TOKENS = 2
+PRUNE_TOKEN_PATTERNS = {"en": r"[a-z]+(?:['\-][a-z]+)*", "ko": r"[\uac00-\ud7a3]+"}
+PRUNE_FREQUENCY_LISTS = {"en": None, "ko": None}
+PRUNE_WORD_BUDGETS = {"en": 200000, "ko": 50000}
+
 # --- Configuration for PCA (trained on EN+KO embeddings) ---
+# The fitted projection is stored as a pca_projector.PCAProjector (.npz), so
+# serving doesn't need scikit-learn. The sklearn joblib model is only read to
+# migrate data directories trained before the projector existed.
+PCA_PROJECTOR_PATH = os.path.join(DATA_DIR, "pca_projector_enko.npz")
 PCA_MODEL_PT_PATH = os.path.join(DATA_DIR, "pca_model_enko.joblib")
 WORD_VECTORS_PT_PATH = os.path.join(DATA_DIR, "word_vectors_for_pca_enko.npy")
+# "sample": fit on WORD_VECTORS_PT_PATH (scripts/prepare_pca_data.py), falling
+# back to the full fit if it is missing. "full": fit on every vocabulary row.
+PCA_FIT_MODE = "sample"
+# Full fit: "covariance" (exact, one streamed pass accumulating X^T X with torch)
+# or "incremental" (sklearn IncrementalPCA over the same chunks).
+PCA_FULL_FIT_METHOD = "covariance"
+PCA_FIT_CHUNK_ROWS = 65536
+# Whole vocabulary projected once with the PCA model: an (N, 2) float32 array
+# aligned to idx_to_word_list. Rows of zero vectors are NaN.
+COORDINATES_TABLE_PATH = os.path.join(DATA_DIR, "nb_coords_enko.npy")
+
+# --- Configuration for the build manifest (see artifact_manifest.py) ---
+# Content hashes, shapes and inputs of every prepared artifact. Loaders reject
+# artifacts whose files don't match it or that were built from another
+# vocabulary / store / PCA model; scripts/prepare_artifacts.py rebuilds only
+# the stages whose inputs changed.
+ARTIFACT_MANIFEST_PATH = os.path.join(DATA_DIR, "artifact_manifest.json")
+# Artifacts missing from the manifest (data directories prepared before it
+# existed) are loaded unchecked unless this is set. Record them with
+# scripts/prepare_artifacts.py --adopt.
+REQUIRE_ARTIFACT_MANIFEST = False
+# If set, a background loader that can't map the required artifacts runs
+# preparation.prepare_artifacts (download, parse, PCA fit...) once and
+# retries. Off by default: the app then reports degraded (503) until
+# scripts/prepare_artifacts.py has run. Only set it for a single loading
+# process, e.g. `python app.py` or the serve.py master (serve.py --prepare),
+# never in every worker.
+PREPARE_MISSING_ARTIFACTS = False
+# Retry-After (seconds) of the 503 answered while the models are loading.
+MODEL_LOADING_RETRY_AFTER_SECONDS = 5
+
+# --- Configuration for the lookup caches (see lookup_cache.py) ---
+WORD_INDEX_CACHE_SIZE = 100000
+COORDINATE_CACHE_SIZE = 100000
+CACHE_TTL_SECONDS = 3600
+
+# --- Configuration for the approximate nearest-neighbour index (see ann_index.py) ---
+ANN_INDEX_PREFIX = os.path.join(DATA_DIR, "nb_ann_enko")
+ANN_DEFAULT_NPROBE = 16
+
+# --- Configuration for the OOV fallback (see fuzzy_index.py) ---
+# Words whose exact key is OOV are resolved, in order, by a normalised spelling
+# (phrase underscores, Korean spacing), the n-gram index (typos, inflections)
+# and the average of the phrase's parts. The index is built at prepare time.
+FUZZY_INDEX_PREFIX = os.path.join(DATA_DIR, "nb_fuzzy_enko")
+FUZZY_FALLBACK_ENABLED = True
+FUZZY_MAX_EDIT_DISTANCE = 2
+FUZZY_MIN_CHARS = 3  # shorter words are too ambiguous to correct
+FUZZY_MAX_POSTINGS = 200000  # bounds the work per fuzzy lookup
+FUZZY_MAX_CANDIDATES = 32  # re-ranked by edit distance
+FUZZY_MAX_PHRASE_PARTS = 8
+
+# --- Configuration for the pivot catalogue (see pivot_catalogue.py) ---
+PIVOT_CATALOGUE_PREFIX = os.path.join(DATA_DIR, "nb_pivots_enko")
+PIVOTS_PER_LANGUAGE = 2000
+PIVOT_TOP_K = 50
+# Plain single words make good pivots: no phrases, digits or punctuation.
+PIVOT_TERM_PATTERNS = {"en": r"[a-z]{3,12}", "ko": r"[\uac00-\ud7a3]{2,5}"}
+# Optional frequency list per language (one word per line, most frequent
+# first). Without one, pivots are taken in vocabulary order.
+PIVOT_FREQUENCY_LISTS = {"en": None, "ko": None}
+# Pivots whose nearest neighbour is less similar than this are isolated vectors.
+PIVOT_MIN_NEIGHBOUR_SIMILARITY = 0.3
+# Quantiles of each pivot's similarity to a fixed random sample of the vocabulary.
+PIVOT_QUANTILE_LEVELS = (0.5, 0.9, 0.99, 0.999)
+PIVOT_QUANTILE_SAMPLE_ROWS = 20000
+
+# --- Configuration for /shape (see shape_metrics.py) ---
+SHAPE_MAX_GUESSES = 16
+# The score is this times the mean (non-negative) cosine similarity of the edges.
+SHAPE_SCORE_SCALE = 100
+
+# --- Configuration for the ASGI serving mode (see asgi_app.py) ---
+# /word-to-coordinates requests arriving within the window are coalesced into
+# one batched lookup; a batch is flushed early once it holds this many words.
+COALESCE_WINDOW_MS = 2.0
+COALESCE_MAX_BATCH = 256
+
+# --- Configuration for logging and metrics (see instrumentation.py) ---
+LOG_LEVEL = "INFO"
+# Repeated per-request warnings are logged once every this many occurrences.
+REQUEST_LOG_SAMPLE_EVERY = 100
 
 # --- Global Variables (to be loaded) ---
 # For PyTorch Numberbatch embeddings
 embeddings_tensor = None
 word_to_idx = None
 idx_to_word_list = None  # Will store list of '/c/lang/word' strings
-
-# For PCA model (still scikit-learn, but trained on data from PyTorch embeddings)
+# With the memory-mapped store, word_to_idx is a vocab_index.VocabularyIndex
+# and idx_to_word_list its row-ordered key view; both behave like dict/list.
+# For int8 stores, embeddings_tensor holds the quantised rows and
+# embedding_row_scales the per-row scales. Use gather_embedding_rows_pytorch /
+# embedding_block_pytorch to read float32 rows regardless of the storage dtype.
+embedding_row_scales = None
+
+# PCA projection (pca_projector.PCAProjector, fitted with scikit-learn or torch
+# on data from PyTorch embeddings)
 pca_model_pt = None
-
-# Fallback sample words for PCA training if dedicated training data is not available
-SAMPLE_WORDS_FOR_PCA = [
-    {"word": "king", "lang": "en"},
-    {"word": "queen", "lang": "en"},
-    {"word": "apple", "lang": "en"},
-    {"word": "love", "lang": "en"},
-    {"word": "왕", "lang": "ko"},
-    {"word": "여왕", "lang": "ko"},
-    {"word": "사과", "lang": "ko"},
-    {"word": "사랑", "lang": "ko"},
-]
+# Torch copies of the PCA parameters used by the batched projection path.
+# Stored together with the model they were taken from so a retrain refreshes them.
+_pca_projection = None  # (pca_model, components_t, bias, scale)
+# Precomputed 2D coordinates (memory-mapped), see preparation.build_and_save_coordinate_table_pytorch
+coordinates_table = None
+# (vocabulary_version, pca_version) when coordinates_table was mapped
+_coordinate_table_versions = None
+# 1 / ||row|| for every row of embeddings_tensor (0 for zero rows), computed once
+# so normalised rows are a gather plus a multiply.
+_inverse_row_norms = None  # (embeddings_tensor, inverse norms)
+_nonzero_rows = None  # (inverse norms, NumPy mask of the non-zero rows)
+# IVF-PQ index over the normalised embeddings (ann_index.IVFPQIndex)
+ann_index_pt = None
+# Character n-gram index over the vocabulary terms (fuzzy_index.FuzzyIndex)
+fuzzy_index_pt = None
+# Precomputed pivot words (pivot_catalogue.PivotCatalogue)
+pivot_catalogue_pt = None
+# Per-row index into SUPPORTED_LANGUAGES, mapped from the vocabulary's language ids
+_row_language_ids = None  # (word_to_idx, uint8 tensor)
+# Manifest hashes of what is loaded: "embedding_store", "vocabulary" and
+# "pca_projector" (absent for unrecorded artifacts). Artifacts built from other
+# ones are not loaded, see _check_artifact.
+artifact_hashes = {}
+
+# Model versions, bumped whenever the vocabulary, the PCA model or the fuzzy
+# index is (re)loaded. They are part of every cache key, and the affected
+# caches are cleared too.
+vocabulary_version = 0
+pca_version = 0
+fuzzy_index_version = 0
+# (lang, word, vocabulary_version) -> row index (-1 for OOV)
+word_index_cache = lookup_cache.LRUCache(WORD_INDEX_CACHE_SIZE, CACHE_TTL_SECONDS)
+# '/c/lang/word' -> ([x, y] or None, resolution), see resolve_oov_word_pytorch
+coordinate_cache = lookup_cache.LRUCache(COORDINATE_CACHE_SIZE, CACHE_TTL_SECONDS)
 
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# --- Helper Functions for Data Preparation (Download, Decompress, Parse) ---
+instrumentation.configure_logging(LOG_LEVEL)
+logger = instrumentation.get_logger("utils")
+
+# --- Metrics (rendered at /metrics) ---
+WORD_LOOKUPS = instrumentation.counter(
+    "word_lookups_total",
+    "Word-to-row lookups by language and result (hit or oov).",
+    ("lang", "result"),
+)
+WORD_LOOKUP_SECONDS = instrumentation.histogram(
+    "word_lookup_seconds", "Time to resolve a batch of words to rows."
+)
+OOV_RESOLUTIONS = instrumentation.counter(
+    "oov_resolutions_total",
+    "OOV words by language and fallback method (normalized, fuzzy, average, none).",
+    ("lang", "method"),
+)
+VECTOR_FETCH_SECONDS = instrumentation.histogram(
+    "vector_fetch_seconds", "Time to gather (and dequantise) embedding rows."
+)
+PROJECTION_SECONDS = instrumentation.histogram(
+    "projection_seconds",
+    "Time to project a batch of words to 2D, from the coordinate table or with PCA.",
+    ("path",),
+)
+
+
+def _cache_samples(field):
+    caches = (("word_index", word_index_cache), ("coordinate", coordinate_cache))
+    return [({"cache": name}, cache.stats()[field]) for name, cache in caches]
+
+
+instrumentation.callback_metric(
+    "lookup_cache_entries",
+    "Entries in the lookup caches.",
+    lambda: _cache_samples("size"),
+)
+for _field in ("hits", "misses", "evictions", "expirations"):
+    instrumentation.callback_metric(
+        f"lookup_cache_{_field}_total",
+        f"Lookup cache {_field}.",
+        lambda field=_field: _cache_samples(field),
+        kind="counter",
+    )
+instrumentation.callback_metric(
+    "vocabulary_size",
+    "Keys in the loaded EN/KO vocabulary.",
+    lambda: None if word_to_idx is None else len(word_to_idx),
+)
 
+# --- Serving vocabulary ---
 
-def _download_numberbatch_raw_file():
-    """Downloads the ConceptNet Numberbatch raw .txt.gz file if it doesn't exist."""
-    if not os.path.exists(NUMBERBATCH_GZ_PATH):
-        print(
-            f"Downloading FULL Multilingual ConceptNet Numberbatch from {NUMBERBATCH_RAW_URL}..."
-        )
-        print(
-            "WARNING: This is a very large file and may take a long time and significant disk space."
-        )
-        try:
-            response = requests.get(NUMBERBATCH_RAW_URL, stream=True)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            with open(NUMBERBATCH_GZ_PATH, "wb") as f:
-                for chunk in response.iter_content(
-                    chunk_size=1024 * 1024
-                ):  # Larger chunk size for large file
-                    f.write(chunk)
-                    print(".", end="", flush=True)  # Progress indicator
-            print(f"\nDownloaded to {NUMBERBATCH_GZ_PATH}")
-        except requests.exceptions.RequestException as e:
-            print(f"Error downloading Numberbatch: {e}")
-            if os.path.exists(NUMBERBATCH_GZ_PATH):  # Clean up partial download
-                os.remove(NUMBERBATCH_GZ_PATH)
-            return False
-    else:
-        print(
-            f"Multilingual Numberbatch raw file {NUMBERBATCH_GZ_PATH} already exists."
-        )
-    return True
+# Paths of every artifact derived from the vocabulary, for the full set.
+_FULL_VOCABULARY_ARTIFACTS = {
+    "EMBEDDING_STORE_PREFIX": EMBEDDING_STORE_PREFIX,
+    "COORDINATES_TABLE_PATH": COORDINATES_TABLE_PATH,
+    "ANN_INDEX_PREFIX": ANN_INDEX_PREFIX,
+    "FUZZY_INDEX_PREFIX": FUZZY_INDEX_PREFIX,
+    "PIVOT_CATALOGUE_PREFIX": PIVOT_CATALOGUE_PREFIX,
+}
 
 
-def _decompress_numberbatch_gz():
-    """Decompresses the .gz file to .txt if the .txt file doesn't exist."""
-    if not os.path.exists(NUMBERBATCH_TXT_PATH):
-        if not os.path.exists(NUMBERBATCH_GZ_PATH):
-            print(f"Error: {NUMBERBATCH_GZ_PATH} not found. Cannot decompress.")
-            return False
-        print(f"Decompressing {NUMBERBATCH_GZ_PATH} to {NUMBERBATCH_TXT_PATH}...")
-        print(
-            "WARNING: This may take a very long time and create a very large text file."
-        )
-        try:
-            with gzip.open(NUMBERBATCH_GZ_PATH, "rb") as f_in:
-                with open(NUMBERBATCH_TXT_PATH, "wb") as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            print(f"Decompressed to {NUMBERBATCH_TXT_PATH}")
-        except Exception as e:
-            print(f"Error decompressing Numberbatch: {e}")
-            if os.path.exists(NUMBERBATCH_TXT_PATH):  # Clean up partial extraction
-                os.remove(NUMBERBATCH_TXT_PATH)
-            return False
-    else:
-        print(
-            f"Decompressed multilingual Numberbatch file {NUMBERBATCH_TXT_PATH} already exists."
-        )
-    return True
+def vocabulary_artifact_path(name, vocabulary):
+    """
+    Path of a vocabulary artifact (the name of its config constant, e.g.
+    "EMBEDDING_STORE_PREFIX") in the given set ("full" or "pruned").
+    """
+    root, ext = os.path.splitext(_FULL_VOCABULARY_ARTIFACTS[name])
+    return root + VOCABULARY_ARTIFACT_SUFFIXES[vocabulary] + ext
 
 
-def _parse_numberbatch_and_save_pytorch():
+def select_serving_vocabulary(vocabulary):
     """
-    Parses the raw Numberbatch .txt file, creates PyTorch tensors and mappings,
-    and saves them to disk. Tensors are moved to the configured device.
+    Points the artifact path constants at the given vocabulary set. Call it
+    before anything is loaded (done at import for SERVING_VOCABULARY).
     """
-    global device, SUPPORTED_LANGUAGES
-    if not os.path.exists(NUMBERBATCH_TXT_PATH):
-        print(f"Error: {NUMBERBATCH_TXT_PATH} not found. Cannot parse.")
-        return False
-
-    print(
-        f"Parsing {NUMBERBATCH_TXT_PATH} for EN/KO and creating PyTorch artifacts on device: {device}..."
+    global SERVING_VOCABULARY
+    if vocabulary not in VOCABULARY_ARTIFACT_SUFFIXES:
+        raise ValueError(
+            f"Unknown vocabulary '{vocabulary}'. Expected one of {list(VOCABULARY_ARTIFACT_SUFFIXES)}."
+        )
+    SERVING_VOCABULARY = vocabulary
+    for name in _FULL_VOCABULARY_ARTIFACTS:
+        globals()[name] = vocabulary_artifact_path(name, vocabulary)
+
+
+select_serving_vocabulary(SERVING_VOCABULARY)
+
+
+# --- Model versions and caches ---
+
+
+def get_device():
+    """The torch device for the embeddings (cuda if available), resolved once."""
+    global device
+    if device is None:
+        import torch
+
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        logger.info(f"Using PyTorch device: {device}")
+    return device
+
+
+def _bump_vocabulary_version():
+    """Called whenever word_to_idx is replaced. Drops every cached lookup."""
+    global vocabulary_version
+    vocabulary_version += 1
+    word_index_cache.clear()
+    coordinate_cache.clear()
+
+
+def _bump_pca_version():
+    """Called whenever pca_model_pt is replaced. Drops cached coordinates."""
+    global pca_version
+    pca_version += 1
+    coordinate_cache.clear()
+
+
+def _bump_fuzzy_index_version():
+    """Called whenever fuzzy_index_pt is replaced. Drops cached coordinates (OOV resolutions)."""
+    global fuzzy_index_version
+    fuzzy_index_version += 1
+    coordinate_cache.clear()
+
+
+def get_cache_stats():
+    """Hit/miss/eviction counters of the lookup caches."""
+    return {
+        "vocabulary_version": vocabulary_version,
+        "pca_version": pca_version,
+        "fuzzy_index_version": fuzzy_index_version,
+        "word_index_cache": word_index_cache.stats(),
+        "coordinate_cache": coordinate_cache.stats(),
+    }
+
+
+def get_model_state():
+    """Which artifacts are loaded in this process, for the health endpoints."""
+    return {
+        "pid": os.getpid(),
+        "vocabulary_size": None if word_to_idx is None else len(word_to_idx),
+        "embeddings": (
+            None
+            if embeddings_tensor is None
+            else {
+                "rows": int(embeddings_tensor.shape[0]),
+                "dtype": str(embeddings_tensor.dtype).replace("torch.", ""),
+                "device": str(embeddings_tensor.device),
+            }
+        ),
+        "pca_model": pca_model_pt is not None,
+        "coordinate_table": coordinates_table is not None,
+        "ann_index": ann_index_pt is not None,
+        "fuzzy_index": fuzzy_index_pt is not None,
+        "pivot_catalogue": pivot_catalogue_pt is not None,
+        "vocabulary": SERVING_VOCABULARY,
+        "artifact_hashes": dict(artifact_hashes),
+    }
+
+
+def can_serve_coordinates():
+    """True if /word-to-coordinates can be answered (table, or matrix plus PCA)."""
+    return word_to_idx is not None and (
+        coordinates_table is not None
+        or (embeddings_tensor is not None and pca_model_pt is not None)
     )
-    local_word_to_idx = {}
-    local_idx_to_word_list = []
-    local_embeddings_list = []
-    processed_count = 0
 
-    try:
-        with open(NUMBERBATCH_TXT_PATH, "r", encoding="utf-8") as f:
-            # First line is header (e.g., "516783 300")
-            num_embeddings_header, dim_header = map(int, f.readline().split())
-            if dim_header != NUMBERBATCH_DIM:
-                print(
-                    f"Warning: Expected dimension {NUMBERBATCH_DIM}, but file reports {dim_header}. Using reported dimension."
-                )
-                # Update global NUMBERBATCH_DIM if you want to adapt dynamically, or stick to a fixed one.
 
-            print(
-                f"Header indicates {num_embeddings_header} total embeddings. Filtering for {SUPPORTED_LANGUAGES}..."
-            )
+def can_serve_embeddings():
+    """True if the embeddings are mapped (similarity, /shape, /nearest)."""
+    return word_to_idx is not None and embeddings_tensor is not None
 
-            for i, line in enumerate(f):
-                parts = line.strip().split(" ")
-                word_full_path = parts[0]
-
-                # Filter for supported languages (e.g., /c/en/word or /c/ko/word)
-                path_parts = word_full_path.split("/")
-                if (
-                    len(path_parts) >= 3
-                    and path_parts[1] == "c"
-                    and path_parts[2] in SUPPORTED_LANGUAGES
-                ):
-                    lang_code = path_parts[2]
-                    # word_token = path_parts[3] # The actual word token
-                    # We will use the full path like '/c/en/king' as the key in word_to_idx
-
-                    vector_values = [float(x) for x in parts[1:]]
-                    if len(vector_values) != dim_header:
-                        # print(f"Warning: Skipping line {i+2} for word '{word_full_path}'. Dim mismatch.")
-                        continue
-
-                    current_idx = len(local_idx_to_word_list)
-                    local_word_to_idx[word_full_path] = current_idx
-                    local_idx_to_word_list.append(word_full_path)
-                    local_embeddings_list.append(vector_values)
-                    processed_count += 1
-                    if processed_count % 50000 == 0:
-                        print(f"Processed {processed_count} EN/KO embeddings...")
-    except Exception as e:
-        print(f"Error parsing Numberbatch text file: {e}")
-        return False
 
-    if not local_embeddings_list:
-        print(f"No EN/KO embeddings were parsed from {NUMBERBATCH_TXT_PATH}.")
-        return False
-    print(f"Finished parsing. Found {processed_count} EN/KO embeddings.")
+# --- Loading the prepared artifacts ---
 
-    try:
-        global embeddings_tensor, word_to_idx, idx_to_word_list
-        # Create tensor on CPU first, then move to device to avoid potential OOM on GPU during large list conversion
-        temp_embeddings_tensor = torch.tensor(
-            local_embeddings_list, dtype=torch.float32
+
+def _loaded_hash(kind):
+    if kind == "pca_projector" and pca_model_pt is None:
+        # Serving from the table alone: compare with the projector on disk.
+        entry, problem = artifact_manifest.verify_artifact(
+            ARTIFACT_MANIFEST_PATH,
+            artifact_manifest.artifact_name(PCA_PROJECTOR_PATH),
+            {"projector": PCA_PROJECTOR_PATH},
+        )
+        return None if entry is None or problem else entry["content_hash"]
+    return artifact_hashes.get(kind)
+
+
+def _check_artifact(
+    label, path, paths, dependencies=("vocabulary", "embedding_store", "pca_projector")
+):
+    """
+    Checks an artifact (named after `path`, made of `paths`) against the build
+    manifest before it is mapped. Returns (ok, entry). It is rejected if its
+    files don't match the recorded ones (partial, modified or from another
+    build), or if any of `dependencies` it was built from differs from the
+    loaded one. Unrecorded artifacts (entry None) are accepted unless
+    REQUIRE_ARTIFACT_MANIFEST is set.
+    """
+    entry, problem = artifact_manifest.verify_artifact(
+        ARTIFACT_MANIFEST_PATH, artifact_manifest.artifact_name(path), paths
+    )
+    if problem:
+        logger.error(
+            f"{label} {problem}. Ignoring it; rebuild it with scripts/prepare_artifacts.py."
         )
-        embeddings_tensor = temp_embeddings_tensor.to(
-            device
-        )  # Move to configured device
-        word_to_idx = local_word_to_idx
-        idx_to_word_list = local_idx_to_word_list  # Store the list of full paths
-
-        # When saving, it saves the tensor as it is (including its device).
-        # For better portability, one might save the CPU version (embeddings_tensor.cpu())
-        # and then move to device on load. However, for simplicity, we save as is.
-        print(
-            f"Saving PyTorch EN/KO embeddings (on {embeddings_tensor.device}) to {PYTORCH_EMBEDDINGS_PATH}"
+        return False, entry
+    if entry is None:
+        if REQUIRE_ARTIFACT_MANIFEST:
+            logger.error(f"{label} is not in the artifact manifest. Ignoring it.")
+            return False, None
+        logger.warning(
+            f"{label} is not in the artifact manifest; loading it unchecked."
         )
-        torch.save(embeddings_tensor, PYTORCH_EMBEDDINGS_PATH)
+        return True, None
+    for kind in dependencies:
+        if kind == "vocabulary":
+            recorded = entry.get("vocabulary_hash")
+        else:
+            recorded = entry["inputs"].get(kind)
+        loaded = _loaded_hash(kind)
+        if recorded and loaded and recorded != loaded:
+            logger.warning(
+                f"{label} was built from another {kind.replace('_', ' ')} than the loaded one. Ignoring it."
+            )
+            return False, entry
+    return True, entry
+
+
+def _check_embedding_store():
+    """_check_artifact for the serving store. Returns (ok, entry)."""
+    return _check_artifact(
+        "EN/KO embedding store",
+        EMBEDDING_STORE_PREFIX,
+        embedding_store.artifact_paths(EMBEDDING_STORE_PREFIX),
+        dependencies=(),
+    )
 
-        print(f"Saving EN/KO word_to_idx mapping to {PYTORCH_WORD_TO_IDX_PATH}")
-        with open(PYTORCH_WORD_TO_IDX_PATH, "wb") as f_w2i:
-            pickle.dump(word_to_idx, f_w2i)
 
-        print(f"Saving EN/KO idx_to_word_list mapping to {PYTORCH_IDX_TO_WORD_PATH}")
-        with open(PYTORCH_IDX_TO_WORD_PATH, "wb") as f_i2w:
-            pickle.dump(idx_to_word_list, f_i2w)
+def _set_store_hashes(entry):
+    """Records the hashes of the store (and its vocabulary) just mapped."""
+    artifact_hashes.pop("embedding_store", None)
+    artifact_hashes.pop("vocabulary", None)
+    if entry is not None:
+        artifact_hashes["embedding_store"] = entry["content_hash"]
+        artifact_hashes["vocabulary"] = entry["vocabulary_hash"]
 
-        print("PyTorch EN/KO Numberbatch artifacts saved successfully.")
+
+def _load_embedding_store():
+    """
+    Memory-maps the embedding store into the module globals.
+    The matrix is not copied: on CPU, embeddings_tensor shares the mapped pages.
+    """
+    import torch
+
+    global embeddings_tensor, embedding_row_scales, word_to_idx, idx_to_word_list
+    ok, entry = _check_embedding_store()
+    if not ok:
+        return False
+    try:
+        matrix_np, vocabulary = embedding_store.load_store(EMBEDDING_STORE_PREFIX)
+        scales_np = embedding_store.load_row_scales(EMBEDDING_STORE_PREFIX, matrix_np)
     except Exception as e:
-        print(f"Error saving PyTorch EN/KO artifacts: {e}")
+        logger.error(f"Error loading EN/KO embedding store: {e}")
+        embeddings_tensor, word_to_idx, idx_to_word_list = None, None, None
+        embedding_row_scales = None
         return False
+
+    embeddings_tensor = torch.from_numpy(matrix_np)
+    embedding_row_scales = None if scales_np is None else torch.from_numpy(scales_np)
+    if get_device().type != "cpu":
+        embeddings_tensor = embeddings_tensor.to(get_device())
+        if embedding_row_scales is not None:
+            embedding_row_scales = embedding_row_scales.to(get_device())
+    word_to_idx = vocabulary
+    idx_to_word_list = vocabulary.key_list()
+    _set_store_hashes(entry)
+    _bump_vocabulary_version()
+
+    if embeddings_tensor.shape[1] != NUMBERBATCH_DIM:
+        logger.warning(
+            f"Loaded embeddings tensor has dimension {embeddings_tensor.shape[1]}, expected {NUMBERBATCH_DIM}."
+        )
+    logger.info(
+        f"EN/KO embedding store mapped: {embeddings_tensor.shape[0]} rows, {embeddings_tensor.dtype}, on {embeddings_tensor.device}."
+    )
     return True
 
 
 # --- Main Loading Function for PyTorch Numberbatch Embeddings ---
 def load_numberbatch_pytorch():
     """
-    Loads Numberbatch embeddings as PyTorch tensors to the configured device.
-    If preprocessed files don't exist, it triggers download, decompression, and parsing.
+    Loads Numberbatch embeddings as PyTorch tensors to the configured device,
+    by mapping the prepared embedding store. Returns False if it is missing or
+    rejected; it is built by preparation.prepare_artifacts, never here.
     """
-    global embeddings_tensor, word_to_idx, idx_to_word_list, device
+    global embeddings_tensor, word_to_idx, idx_to_word_list
 
     if (
         embeddings_tensor is not None
@@ -250,64 +529,58 @@ def load_numberbatch_pytorch():
         and idx_to_word_list is not None
     ):
         # Ensure tensor is on the correct device if it was already loaded
-        if embeddings_tensor.device != device:
-            embeddings_tensor = embeddings_tensor.to(device)
-            print(f"Moved existing EN/KO embeddings_tensor to device: {device}")
-        print(
+        if embeddings_tensor.device != get_device():
+            embeddings_tensor = embeddings_tensor.to(get_device())
+            logger.info(
+                f"Moved existing EN/KO embeddings_tensor to device: {get_device()}"
+            )
+        logger.info(
             "PyTorch EN/KO Numberbatch embeddings already loaded and on correct device."
         )
         return True
 
-    if (
-        os.path.exists(PYTORCH_EMBEDDINGS_PATH)
-        and os.path.exists(PYTORCH_WORD_TO_IDX_PATH)
-        and os.path.exists(PYTORCH_IDX_TO_WORD_PATH)
-    ):
-        print(f"Loading preprocessed PyTorch EN/KO artifacts to device: {device}...")
-        try:
-            # Load tensor and explicitly map to the configured device
-            embeddings_tensor = torch.load(PYTORCH_EMBEDDINGS_PATH, map_location=device)
-            with open(PYTORCH_WORD_TO_IDX_PATH, "rb") as f_w2i:
-                word_to_idx = pickle.load(f_w2i)
-            with open(PYTORCH_IDX_TO_WORD_PATH, "rb") as f_i2w:
-                idx_to_word_list = pickle.load(f_i2w)
-            print(
-                f"PyTorch EN/KO artifacts loaded successfully to {embeddings_tensor.device}."
-            )
+    if embedding_store.store_exists(EMBEDDING_STORE_PREFIX):
+        logger.info(
+            f"Mapping preprocessed EN/KO embedding store (device: {get_device()})..."
+        )
+        if _load_embedding_store():
+            return True
+        logger.error("Failed to map EN/KO embedding store.")
+    else:
+        logger.error(
+            f"EN/KO embedding store {EMBEDDING_STORE_PREFIX}_* not found. Prepare it with scripts/prepare_artifacts.py."
+        )
+    return False
 
-            if (
-                not isinstance(embeddings_tensor, torch.Tensor)
-                or not isinstance(word_to_idx, dict)
-                or not isinstance(idx_to_word_list, list)
-            ):
-                print(
-                    "Error: Loaded PyTorch EN/KO artifacts have incorrect types. Attempting to re-process."
-                )
-                embeddings_tensor, word_to_idx, idx_to_word_list = None, None, None
-            else:
-                if embeddings_tensor.shape[1] != NUMBERBATCH_DIM:
-                    print(
-                        f"Warning: Loaded embeddings tensor has dimension {embeddings_tensor.shape[1]}, expected {NUMBERBATCH_DIM}."
-                    )
-                return True
-        except Exception as e:
-            print(
-                f"Error loading preprocessed PyTorch EN/KO artifacts: {e}. Attempting to re-process."
+
+# --- Dequantising row access ---
+
+
+def gather_embedding_rows_pytorch(indices):
+    """
+    Returns the float32 rows of embeddings_tensor at `indices` (a sequence or
+    long tensor), dequantising int8/float16 storage.
+    """
+    import torch
+
+    with VECTOR_FETCH_SECONDS.time():
+        index_tensor = torch.as_tensor(
+            indices, dtype=torch.long, device=embeddings_tensor.device
+        )
+        rows = embeddings_tensor.index_select(0, index_tensor).float()
+        if embedding_row_scales is not None:
+            rows = rows * embedding_row_scales.index_select(0, index_tensor).unsqueeze(
+                1
             )
-            embeddings_tensor, word_to_idx, idx_to_word_list = None, None, None
+    return rows
 
-    print(
-        "Preprocessed PyTorch EN/KO artifacts not found or failed to load. Starting full preparation..."
-    )
-    if not _download_numberbatch_raw_file():
-        return False
-    if not _decompress_numberbatch_gz():
-        return False
-    if not _parse_numberbatch_and_save_pytorch():
-        return False
 
-    print("Full EN/KO Numberbatch preparation and loading complete.")
-    return True
+def embedding_block_pytorch(start, end):
+    """Returns rows [start, end) of embeddings_tensor as float32, dequantised."""
+    rows = embeddings_tensor[start:end].float()
+    if embedding_row_scales is not None:
+        rows = rows * embedding_row_scales[start:end].unsqueeze(1)
+    return rows
 
 
 # --- Word Vector Retrieval (PyTorch version) ---
@@ -317,203 +590,989 @@ def get_word_vector_pytorch(word, lang):
     Constructs the key as '/c/lang/word'.
     Returns a zero tensor on the configured device if the word is not in vocabulary.
     """
-    global embeddings_tensor, word_to_idx, device, SUPPORTED_LANGUAGES
-    if lang not in SUPPORTED_LANGUAGES:
-        # print(f"Warning: Language '{lang}' not in supported languages: {SUPPORTED_LANGUAGES}. Cannot get vector for '{word}'.")
-        return torch.zeros(NUMBERBATCH_DIM, dtype=torch.float32, device=device)
+    import torch
 
-    conceptnet_key = (
-        f"/c/{lang}/{word.lower()}"  # Numberbatch usually has lowercase words
-    )
+    global embeddings_tensor, word_to_idx, SUPPORTED_LANGUAGES
+    if lang not in SUPPORTED_LANGUAGES:
+        return torch.zeros(NUMBERBATCH_DIM, dtype=torch.float32, device=get_device())
 
     if embeddings_tensor is None or word_to_idx is None:
-        print(
-            "Error: PyTorch EN/KO Numberbatch embeddings not loaded. Attempting to load..."
+        instrumentation.log_every_n(
+            logger,
+            logging.WARNING,
+            "embeddings_not_loaded",
+            REQUEST_LOG_SAMPLE_EVERY,
+            "PyTorch EN/KO Numberbatch embeddings not loaded. Returning a zero vector.",
         )
-        if not load_numberbatch_pytorch() or embeddings_tensor is None:
-            return torch.zeros(NUMBERBATCH_DIM, dtype=torch.float32, device=device)
+        return torch.zeros(NUMBERBATCH_DIM, dtype=torch.float32, device=get_device())
 
-    if conceptnet_key in word_to_idx:
-        idx = word_to_idx[conceptnet_key]
-        return embeddings_tensor[idx]
-    else:
-        # print(f"Warning: Word '{word}' (lang: {lang}, key: {conceptnet_key}) not in EN/KO vocabulary.")
-        return torch.zeros(NUMBERBATCH_DIM, dtype=torch.float32, device=device)
+    # Numberbatch usually has lowercase words
+    with WORD_LOOKUP_SECONDS.time():
+        idx = _lookup_word_index(word.lower(), lang)
+    WORD_LOOKUPS.inc(lang, "hit" if idx >= 0 else "oov")
+    if idx >= 0:
+        return gather_embedding_rows_pytorch([idx])[0]
+    rows, _ = resolve_oov_word_pytorch(word, lang)
+    if rows:
+        return gather_embedding_rows_pytorch(rows).mean(dim=0)
+    return torch.zeros(NUMBERBATCH_DIM, dtype=torch.float32, device=get_device())
 
 
 # --- PCA Related Functions (using scikit-learn, adapted for PyTorch tensors) ---
 
 
-def train_and_save_pca_pytorch(n_components=2, force_retrain=False):
-    """
-    Trains a scikit-learn PCA model on a subset of PyTorch word vectors and saves it.
-    Word vectors are moved to CPU for scikit-learn processing.
-    """
-    global pca_model_pt, embeddings_tensor, word_to_idx, device, idx_to_word_list
-
-    if not force_retrain and os.path.exists(PCA_MODEL_PT_PATH):
-        print(f"Loading existing EN/KO PCA model from {PCA_MODEL_PT_PATH}")
-        try:
-            pca_model_pt = joblib.load(PCA_MODEL_PT_PATH)
-            print("EN/KO PCA model loaded.")
-            if not hasattr(pca_model_pt, "transform") or not hasattr(
-                pca_model_pt, "n_components_"
-            ):
-                print("Warning: Loaded EN/KO PCA model appears invalid. Will retrain.")
-                pca_model_pt = None
-            else:
-                return pca_model_pt
-        except Exception as e:
-            print(
-                f"Error loading EN/KO PCA model from {PCA_MODEL_PT_PATH}: {e}. Will retrain."
-            )
-            pca_model_pt = None
+def set_pca_model_pytorch(model, content_hash=None):
+    """
+    Installs a new PCA projector (or None) with its manifest hash, if recorded.
+    Drops coordinates cached for the old one.
+    """
+    global pca_model_pt
+    pca_model_pt = model
+    artifact_hashes.pop("pca_projector", None)
+    if model is not None and content_hash is not None:
+        artifact_hashes["pca_projector"] = content_hash
+    _bump_pca_version()
 
-    print("Training new EN/KO PCA model...")
-    if embeddings_tensor is None or word_to_idx is None or idx_to_word_list is None:
-        print(
-            "EN/KO Numberbatch embeddings not loaded. Attempting to load them first..."
-        )
-        if not load_numberbatch_pytorch() or embeddings_tensor is None:
-            print("Cannot train EN/KO PCA: Numberbatch embeddings failed to load.")
-            return None
-
-    pca_training_data_np = None
-    if os.path.exists(WORD_VECTORS_PT_PATH):
-        print(
-            f"Loading word vectors for EN/KO PCA training from {WORD_VECTORS_PT_PATH}"
-        )
-        try:
-            # This file contains NumPy array, already on CPU
-            pca_training_data_np = np.load(WORD_VECTORS_PT_PATH)
-            if pca_training_data_np.ndim == 1 and pca_training_data_np.shape[0] > 0:
-                pca_training_data_np = pca_training_data_np.reshape(1, -1)
-            elif pca_training_data_np.ndim == 0:
-                pca_training_data_np = None
-        except Exception as e:
-            print(
-                f"Error loading EN/KO word vectors from {WORD_VECTORS_PT_PATH}: {e}. Falling back."
-            )
-            pca_training_data_np = None
-    else:
-        print(
-            f"EN/KO word vectors file {WORD_VECTORS_PT_PATH} not found. Using fallback sample words."
-        )
 
-    if pca_training_data_np is None or pca_training_data_np.shape[0] < n_components:
-        if pca_training_data_np is not None:
-            print(
-                f"Loaded EN/KO data has only {pca_training_data_np.shape[0]} samples. Fallback to SAMPLE_WORDS_FOR_PCA."
-            )
-        else:
-            print(f"Falling back to using SAMPLE_WORDS_FOR_PCA for EN/KO PCA training.")
-
-        sample_word_vectors_pt = []
-        for (
-            item
-        ) in (
-            SAMPLE_WORDS_FOR_PCA
-        ):  # SAMPLE_WORDS_FOR_PCA now contains dicts {"word": w, "lang": l}
-            vec_pt = get_word_vector_pytorch(item["word"], item["lang"])
-            if not torch.all(vec_pt.eq(0)):
-                sample_word_vectors_pt.append(vec_pt)
-
-        if not sample_word_vectors_pt or len(sample_word_vectors_pt) < n_components:
-            print(
-                f"Not enough valid vectors ({len(sample_word_vectors_pt)}) from SAMPLE_WORDS_FOR_PCA for EN/KO PCA."
-            )
-            return None
-
-        stacked_tensors = torch.stack(sample_word_vectors_pt)  # Still on device
-        pca_training_data_np = (
-            stacked_tensors.detach().cpu().numpy()
-        )  # Move to CPU for scikit-learn
-        if pca_training_data_np.ndim == 1:
-            pca_training_data_np = pca_training_data_np.reshape(1, -1)
-
-    if pca_training_data_np.shape[0] < n_components:
-        print(
-            f"Not enough samples ({pca_training_data_np.shape[0]}) for EN/KO PCA with {n_components} components."
-        )
-        return None
+def _load_pca_projector():
+    """
+    Reads PCA_PROJECTOR_PATH. If only the legacy sklearn model exists, converts it
+    once (this is the only path that unpickles sklearn) and keeps its mtime, so
+    the coordinate table projected with it stays valid.
+    """
+    if os.path.exists(PCA_PROJECTOR_PATH):
+        return pca_projector.PCAProjector.load(PCA_PROJECTOR_PATH)
+    import joblib
+
+    logger.info(
+        f"Converting legacy EN/KO PCA model {PCA_MODEL_PT_PATH} to a projector..."
+    )
+    projector = pca_projector.PCAProjector.from_model(joblib.load(PCA_MODEL_PT_PATH))
+    staged_path = artifact_manifest.staging_path(PCA_PROJECTOR_PATH)
+    projector.save(staged_path)
+    model_mtime = os.path.getmtime(PCA_MODEL_PT_PATH)
+    os.utime(staged_path, (model_mtime, model_mtime))
+    artifact_manifest.publish(
+        {"projector": staged_path}, {"projector": PCA_PROJECTOR_PATH}
+    )
+    return projector
+
 
+def load_pca_model_pytorch():
+    """Loads the saved EN/KO PCA projector (converting a legacy joblib model)."""
+    if not (os.path.exists(PCA_PROJECTOR_PATH) or os.path.exists(PCA_MODEL_PT_PATH)):
+        return None
+    logger.info(f"Loading existing EN/KO PCA projector from {PCA_PROJECTOR_PATH}")
+    ok, entry = _check_artifact(
+        "EN/KO PCA projector",
+        PCA_PROJECTOR_PATH,
+        {"projector": PCA_PROJECTOR_PATH},
+        dependencies=(),
+    )
+    if not ok:
+        return None
     try:
-        current_pca = PCA(n_components=n_components)
-        current_pca.fit(pca_training_data_np)  # scikit-learn PCA runs on CPU
-        pca_model_pt = current_pca
-        joblib.dump(pca_model_pt, PCA_MODEL_PT_PATH)
-        print(f"EN/KO PCA model trained and saved to {PCA_MODEL_PT_PATH}")
+        set_pca_model_pytorch(
+            _load_pca_projector(), None if entry is None else entry["content_hash"]
+        )
     except Exception as e:
-        print(f"Error during EN/KO PCA training or saving: {e}")
-        pca_model_pt = None
+        logger.error(f"Error loading EN/KO PCA projector: {e}.")
         return None
+    logger.info("EN/KO PCA projector loaded.")
     return pca_model_pt
 
 
-def get_pca_model_pytorch(force_retrain=False):
+def get_pca_model_pytorch():
     """
-    Loads the scikit-learn PCA model (trained on PyTorch embeddings), training if necessary.
+    Returns the PCA projector, loading the saved one if it isn't loaded yet.
+    Never trains: that is preparation.train_and_save_pca_pytorch.
     """
-    global pca_model_pt
-    if pca_model_pt is None or force_retrain or not hasattr(pca_model_pt, "transform"):
-        if pca_model_pt is not None and not hasattr(pca_model_pt, "transform"):
-            print("EN/KO PCA model found but seems invalid. Retraining.")
-        pca_model_pt = train_and_save_pca_pytorch(force_retrain=force_retrain)
-    return pca_model_pt
+    if pca_model_pt is not None:
+        return pca_model_pt
+    return load_pca_model_pytorch()
 
 
 def transform_to_2d_pytorch(word_vector_pt):
     """
     Transforms a high-dimensional PyTorch word vector (on device) to 2D NumPy array (on CPU).
     """
+    import torch
+
     global pca_model_pt
     if pca_model_pt is None or not hasattr(pca_model_pt, "transform"):
-        print("EN/KO PCA model not loaded or invalid. Attempting to load/train...")
-        if get_pca_model_pytorch() is None or not hasattr(
-            pca_model_pt, "transform"
-        ):  # Ensure it tries to load/train
-            print(
-                "Error: EN/KO PCA model could not be loaded/trained or is invalid after attempt."
-            )
-            return None
+        _log_pca_unavailable()
+        return None
 
     if word_vector_pt is None or not isinstance(word_vector_pt, torch.Tensor):
-        print("Invalid input: word_vector_pt must be a PyTorch Tensor.")
+        logger.error("Invalid input: word_vector_pt must be a PyTorch Tensor.")
+        return None
+
+    # Same fused matmul as the batched path; no sklearn validation per call.
+    with PROJECTION_SECONDS.time("pca"):
+        coords = transform_to_2d_batch_pytorch(word_vector_pt.reshape(1, -1))
+    if coords is None:
+        return None
+    return coords[0]
+
+
+# --- Batched lookup and projection ---
+
+
+def _log_pca_unavailable():
+    instrumentation.log_every_n(
+        logger,
+        logging.WARNING,
+        "pca_not_loaded",
+        REQUEST_LOG_SAMPLE_EVERY,
+        "EN/KO PCA model not loaded or invalid. Cannot project.",
+    )
+
+
+def _get_pca_projection_tensors():
+    """
+    Returns (components_t, bias, scale) for the current PCA model as tensors on the
+    configured device, so a batch of vectors is projected with a single matmul:
+    coords = X @ components_t + bias  (bias = -mean @ components_t).
+    `scale` is only set for whitened models.
+    """
+    import torch
+
+    global _pca_projection
+    if pca_model_pt is None or not hasattr(pca_model_pt, "components_"):
+        _log_pca_unavailable()
+        return None
+
+    if _pca_projection is None or _pca_projection[0] is not pca_model_pt:
+        components_t = torch.as_tensor(pca_model_pt.components_t, device=get_device())
+        bias = torch.as_tensor(pca_model_pt.bias, device=get_device())
+        scale = None
+        if pca_model_pt.scale is not None:
+            scale = torch.as_tensor(pca_model_pt.scale, device=get_device())
+        _pca_projection = (pca_model_pt, components_t, bias, scale)
+    return _pca_projection[1:]
+
+
+def transform_to_2d_batch_pytorch(word_vectors_pt):
+    """
+    Projects an (n, dim) PyTorch tensor of word vectors to an (n, 2) NumPy array
+    with one matmul against the PCA components. Same result as calling
+    transform_to_2d_pytorch row by row.
+    """
+    import torch
+
+    projection = _get_pca_projection_tensors()
+    if projection is None:
+        return None
+    components_t, bias, scale = projection
+
+    vectors = word_vectors_pt.to(device=get_device(), dtype=torch.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    if vectors.shape[1] != components_t.shape[0]:
+        logger.info(
+            f"PCA model expects {components_t.shape[0]} features, got {vectors.shape[1]}."
+        )
+        return None
+
+    coords = torch.addmm(bias, vectors, components_t)
+    if scale is not None:
+        coords = coords / scale
+    return coords.detach().cpu().numpy()
+
+
+def _lookup_word_index(word, lang):
+    """Row index of an already lowercased word (-1 if OOV), through word_index_cache."""
+    cache_key = (lang, word, vocabulary_version)
+    idx = word_index_cache.get(cache_key)
+    if idx is lookup_cache.MISSING:
+        idx = word_to_idx.lookup(word, lang)
+        word_index_cache.put(cache_key, idx)
+    return idx
+
+
+def lookup_word_indices_pytorch(words, langs):
+    """
+    Resolves each (word, lang) pair to its row in embeddings_tensor, or -1 if the
+    language is unsupported or the word is not in the EN/KO vocabulary.
+    """
+    global word_to_idx
+    if word_to_idx is None:
+        instrumentation.log_every_n(
+            logger,
+            logging.WARNING,
+            "vocabulary_not_loaded",
+            REQUEST_LOG_SAMPLE_EVERY,
+            "EN/KO vocabulary not loaded. Treating every word as OOV.",
+        )
+        return [-1] * len(words)
+
+    indices = []
+    results = {}  # (lang, "hit"/"oov") -> count, added to WORD_LOOKUPS once
+    with WORD_LOOKUP_SECONDS.time():
+        for word, lang in zip(words, langs):
+            if lang not in SUPPORTED_LANGUAGES:
+                indices.append(-1)
+                continue
+            idx = _lookup_word_index(word.lower(), lang)
+            indices.append(idx)
+            key = (lang, "hit" if idx >= 0 else "oov")
+            results[key] = results.get(key, 0) + 1
+    for (lang, result), count in results.items():
+        WORD_LOOKUPS.inc(lang, result, amount=count)
+    return indices
+
+
+def choose_word_languages(words, candidates):
+    """
+    Picks one language per word from its candidates (see
+    language_routing.candidate_languages): the first candidate whose key is
+    in the vocabulary, else the first candidate, or None if there are none.
+    Only words with several candidates are looked up, all in one pass.
+    """
+    langs = [langs[0] if langs else None for langs in candidates]
+    if word_to_idx is None:
+        return langs
+    for i, (word, word_candidates) in enumerate(zip(words, candidates)):
+        if len(word_candidates) < 2:
+            continue
+        term = word.lower()
+        for lang in word_candidates:
+            if _lookup_word_index(term, lang) >= 0:
+                langs[i] = lang
+                break
+    return langs
+
+
+def get_words_coordinates_pytorch(words, langs):
+    """
+    Batched equivalent of get_word_vector_pytorch + transform_to_2d_pytorch.
+    Returns a list with [x, y] or None (OOV / zero vector) per word, or None if
+    the PCA model is unavailable. See get_words_resolved_coordinates_pytorch.
+    """
+    coords, _ = get_words_resolved_coordinates_pytorch(words, langs)
+    return coords
+
+
+def get_words_resolved_coordinates_pytorch(words, langs):
+    """
+    Like get_words_coordinates_pytorch, plus how each word was resolved
+    (see resolve_oov_word_pytorch). Words found in coordinate_cache are
+    answered from it; the rest go through _compute_words_coordinates_pytorch
+    in one batch and are cached.
+    Returns (coords, resolutions), or (None, None) if the PCA model is unavailable.
+    """
+    result = [None] * len(words)
+    resolutions = [_UNRESOLVED] * len(words)
+    # Read once: a model loaded mid-batch must not get the batch's results cached under its version.
+    versions = (vocabulary_version, pca_version, fuzzy_index_version)
+    pending = []
+    for i, (word, lang) in enumerate(zip(words, langs)):
+        if lang not in SUPPORTED_LANGUAGES:
+            continue
+        cached = coordinate_cache.get((f"/c/{lang}/{word.lower()}",) + versions)
+        if cached is lookup_cache.MISSING:
+            pending.append(i)
+        else:
+            result[i], resolutions[i] = cached
+    if not pending:
+        return result, resolutions
+
+    computed = _compute_words_coordinates_pytorch(
+        [words[i] for i in pending], [langs[i] for i in pending]
+    )
+    if computed is None:
+        return None, None
+    for i, coord, resolution in zip(pending, *computed):
+        coordinate_cache.put(
+            (f"/c/{langs[i]}/{words[i].lower()}",) + versions, (coord, resolution)
+        )
+        result[i] = coord
+        resolutions[i] = resolution
+    return result, resolutions
+
+
+def _rows_coordinates_pytorch(rows):
+    """
+    2D coordinates of vocabulary rows, None for zero vectors. Read from the
+    coordinate table when it is loaded, otherwise gathered with one
+    index_select and projected with one matmul. Returns None if the PCA model
+    is unavailable.
+    """
+    if coordinates_table is not None:
+        with PROJECTION_SECONDS.time("table"):
+            coords = coordinates_table[rows]
+            valid = (~np.isnan(coords[:, 0])).tolist()
+            coords = coords.tolist()
+        return [coord if ok else None for coord, ok in zip(coords, valid)]
+
+    import torch
+
+    if embeddings_tensor is None:
+        return [None] * len(rows)
+
+    vectors = gather_embedding_rows_pytorch(rows)
+    with PROJECTION_SECONDS.time("pca"):
+        coords = transform_to_2d_batch_pytorch(vectors)
+    if coords is None:
+        return None
+    nonzero = (~torch.all(vectors.eq(0), dim=1)).tolist()
+    return [coord.tolist() if ok else None for coord, ok in zip(coords, nonzero)]
+
+
+def resolve_word_rows_pytorch(words, langs):
+    """
+    Vocabulary rows of each word: its exact key, or the rows chosen by
+    resolve_oov_word_pytorch for OOV words ([] if unresolved).
+    Returns (word_rows, resolutions).
+    """
+    indices = lookup_word_indices_pytorch(words, langs)
+    word_rows = []
+    resolutions = []
+    for word, lang, idx in zip(words, langs, indices):
+        if idx >= 0:
+            word_rows.append([idx])
+            resolutions.append({"method": "exact", "keys": [idx_to_word_list[idx]]})
+        elif lang in SUPPORTED_LANGUAGES and word_to_idx is not None:
+            rows, resolution = resolve_oov_word_pytorch(word, lang)
+            word_rows.append(rows)
+            resolutions.append(resolution)
+        else:
+            word_rows.append([])
+            resolutions.append(_UNRESOLVED)
+    return word_rows, resolutions
+
+
+def _compute_words_coordinates_pytorch(words, langs):
+    """
+    Resolves all keys (see resolve_word_rows_pytorch) and projects every row
+    they need in one batch. A word resolved to several rows gets the mean of
+    their coordinates, which equals the projection of the mean vector since
+    PCA is affine.
+    Returns (coords, resolutions), or None if the PCA model is unavailable.
+    """
+    result = [None] * len(words)
+    word_rows, resolutions = resolve_word_rows_pytorch(words, langs)
+
+    needed = sorted({row for rows in word_rows for row in rows})
+    if not needed:
+        return result, resolutions
+    row_coords = _rows_coordinates_pytorch(needed)
+    if row_coords is None:
         return None
+    row_coords = dict(zip(needed, row_coords))
+
+    for i, rows in enumerate(word_rows):
+        coords = [row_coords[row] for row in rows if row_coords[row] is not None]
+        if len(coords) == 1:
+            result[i] = coords[0]
+        elif coords:
+            result[i] = np.mean(coords, axis=0).tolist()
+    return result, resolutions
 
-    # Ensure word_vector_pt is on CPU for scikit-learn transform
-    word_vector_np = word_vector_pt.detach().cpu().numpy().reshape(1, -1)
 
+# --- OOV fallback ---
+
+_UNRESOLVED = {"method": "none", "keys": []}
+_PHRASE_SEPARATORS = re.compile(r"[\s_\-]+")
+_EDGE_PUNCTUATION = ".,!?;:'\"()[]{}"
+
+
+def load_fuzzy_index_pytorch():
+    """Loads (memory-maps) the saved EN/KO fuzzy index if it exists."""
+    global fuzzy_index_pt
+    if word_to_idx is None or not fuzzy_index.index_exists(FUZZY_INDEX_PREFIX):
+        return False
+    ok, _ = _check_artifact(
+        "EN/KO fuzzy index",
+        FUZZY_INDEX_PREFIX,
+        fuzzy_index.index_paths(FUZZY_INDEX_PREFIX),
+    )
+    if not ok:
+        return False
     try:
-        transformed_vector_np = pca_model_pt.transform(
-            word_vector_np
-        )  # scikit-learn runs on CPU
-        return transformed_vector_np[0]
+        index = fuzzy_index.load_index(FUZZY_INDEX_PREFIX)
     except Exception as e:
-        print(f"Error transforming vector with EN/KO PCA: {e}")
-        if (
-            hasattr(pca_model_pt, "n_features_in_")
-            and word_vector_np.shape[1] != pca_model_pt.n_features_in_
-        ):
-            print(
-                f"PCA model expects {pca_model_pt.n_features_in_} features, got {word_vector_np.shape[1]}."
+        logger.error(f"Error loading EN/KO fuzzy index: {e}")
+        return False
+    if len(index) != len(word_to_idx):
+        logger.warning(
+            f"EN/KO fuzzy index has {len(index)} rows but vocabulary has {len(word_to_idx)}. Ignoring it."
+        )
+        return False
+    fuzzy_index_pt = index
+    _bump_fuzzy_index_version()
+    logger.info(f"EN/KO fuzzy index loaded: {len(index)} rows.")
+    return True
+
+
+def _fuzzy_row(term, lang):
+    # A vocabulary of another size means the index is stale (rebuild it).
+    if (
+        fuzzy_index_pt is None
+        or len(fuzzy_index_pt) != len(word_to_idx)
+        or len(term) < FUZZY_MIN_CHARS
+    ):
+        return None
+    return fuzzy_index_pt.best_match(
+        word_to_idx,
+        term,
+        lang,
+        max_distance=FUZZY_MAX_EDIT_DISTANCE,
+        max_postings=FUZZY_MAX_POSTINGS,
+        max_candidates=FUZZY_MAX_CANDIDATES,
+    )
+
+
+def resolve_oov_word_pytorch(word, lang):
+    """
+    Fallback for a word whose exact key is not in the vocabulary. Tries, in
+    order: normalised spellings ("new york" -> new_york, Korean without
+    spaces), the closest key in the fuzzy index, and the phrase's parts.
+    Returns (rows, resolution) where resolution is {"method": "normalized" |
+    "fuzzy" | "average" | "none", "keys": [...]} (plus "distance" for fuzzy).
+    """
+    if not FUZZY_FALLBACK_ENABLED or word_to_idx is None:
+        return [], _UNRESOLVED
+    term = word.strip().lower().strip(_EDGE_PUNCTUATION)
+    phrase = _PHRASE_SEPARATORS.sub("_", term).strip("_")
+    spellings = [phrase]
+    if lang == "ko":
+        spellings.append(_PHRASE_SEPARATORS.sub("", term))
+
+    rows, resolution = [], _UNRESOLVED
+    for spelling in spellings:
+        if spelling and spelling != word.lower():
+            idx = _lookup_word_index(spelling, lang)
+            if idx >= 0:
+                rows = [idx]
+                resolution = {"method": "normalized", "keys": [idx_to_word_list[idx]]}
+                break
+
+    if not rows:
+        match = _fuzzy_row(phrase, lang)
+        if match is not None:
+            rows = [match[0]]
+            resolution = {
+                "method": "fuzzy",
+                "keys": [idx_to_word_list[match[0]]],
+                "distance": match[1],
+            }
+
+    parts = [part for part in phrase.split("_") if part][:FUZZY_MAX_PHRASE_PARTS]
+    if not rows and len(parts) > 1:
+        for part in parts:
+            idx = _lookup_word_index(part, lang)
+            if idx < 0:
+                match = _fuzzy_row(part, lang)
+                idx = -1 if match is None else match[0]
+            if idx >= 0 and idx not in rows:
+                rows.append(idx)
+        if rows:
+            resolution = {
+                "method": "average",
+                "keys": [idx_to_word_list[row] for row in rows],
+            }
+
+    OOV_RESOLUTIONS.inc(lang, resolution["method"])
+    return rows, resolution
+
+
+# --- Cosine similarity ---
+
+
+def get_inverse_row_norms_pytorch(chunk_rows=65536):
+    """
+    Returns a (N,) float32 tensor with 1 / ||row|| for each row of
+    embeddings_tensor (0 for zero rows). Computed once per loaded matrix, in
+    chunks, and cached.
+    """
+    import torch
+
+    global _inverse_row_norms
+    if embeddings_tensor is None:
+        return None
+    if _inverse_row_norms is None or _inverse_row_norms[0] is not embeddings_tensor:
+        num_rows = embeddings_tensor.shape[0]
+        inverse_norms = torch.empty(
+            num_rows, dtype=torch.float32, device=embeddings_tensor.device
+        )
+        for start in range(0, num_rows, chunk_rows):
+            norms = torch.linalg.vector_norm(
+                embedding_block_pytorch(start, start + chunk_rows), dim=1
             )
+            inverse_norms[start : start + chunk_rows] = torch.where(
+                norms > 0, 1.0 / norms, torch.zeros_like(norms)
+            )
+        _inverse_row_norms = (embeddings_tensor, inverse_norms)
+    return _inverse_row_norms[1]
+
+
+def get_nonzero_row_mask():
+    """
+    NumPy boolean mask of the rows of embeddings_tensor that are not zero
+    vectors (zero rows are treated as OOV by every search). Cached.
+    """
+    global _nonzero_rows
+    inverse_norms = get_inverse_row_norms_pytorch()
+    if inverse_norms is None:
+        return None
+    if _nonzero_rows is None or _nonzero_rows[0] is not inverse_norms:
+        _nonzero_rows = (inverse_norms, (inverse_norms > 0).cpu().numpy())
+    return _nonzero_rows[1]
+
+
+def get_normalized_rows_pytorch(indices):
+    """Gathers rows of embeddings_tensor by index and L2-normalises them."""
+    import torch
+
+    inverse_norms = get_inverse_row_norms_pytorch()
+    if inverse_norms is None:
+        return None
+    index_tensor = torch.as_tensor(
+        indices, dtype=torch.long, device=embeddings_tensor.device
+    )
+    rows = gather_embedding_rows_pytorch(index_tensor)
+    return rows * inverse_norms.index_select(0, index_tensor).unsqueeze(1)
+
+
+def get_similarity_matrix_pytorch(words, langs):
+    """
+    Returns the (n, n) cosine similarity matrix of the words as a NumPy array,
+    or None if the embeddings are unavailable. See
+    get_resolved_similarity_matrix_pytorch.
+    """
+    similarity_np, _ = get_resolved_similarity_matrix_pytorch(words, langs)
+    return similarity_np
+
+
+def get_resolved_similarity_matrix_pytorch(words, langs):
+    """
+    Like get_similarity_matrix_pytorch, plus how each word was resolved (see
+    resolve_oov_word_pytorch). The matrix is computed with one matmul of the
+    normalised rows; OOV words use the vector of resolve_word_rows_pytorch
+    (the mean of its rows, as in get_word_vector_pytorch). Rows and columns
+    of words that are unresolved (or zero vectors) are NaN.
+    Returns (similarity, resolutions), or (None, None) if the embeddings are
+    unavailable.
+    """
+    import torch
+
+    word_rows, resolutions = resolve_word_rows_pytorch(words, langs)
+    similarity_np = np.full((len(words), len(words)), np.nan, dtype=np.float32)
+    found = [i for i, rows in enumerate(word_rows) if rows]
+    if not found:
+        return similarity_np, resolutions
+
+    if all(len(word_rows[i]) == 1 for i in found):
+        normalized = get_normalized_rows_pytorch([word_rows[i][0] for i in found])
+    elif embeddings_tensor is None:
+        normalized = None
+    else:
+        vectors = torch.stack(
+            [gather_embedding_rows_pytorch(word_rows[i]).mean(dim=0) for i in found]
+        )
+        normalized = torch.nn.functional.normalize(vectors, dim=1)
+    if normalized is None:
+        return None, None
+    found_similarity = (normalized @ normalized.T).clamp_(-1.0, 1.0).cpu().numpy()
+
+    nonzero = (normalized.abs().sum(dim=1) > 0).cpu().numpy()
+    found_similarity[~nonzero, :] = np.nan
+    found_similarity[:, ~nonzero] = np.nan
+    similarity_np[np.ix_(found, found)] = found_similarity
+    return similarity_np, resolutions
+
+
+# --- Approximate nearest neighbours ---
+
+
+def split_conceptnet_key(key):
+    """Splits '/c/en/king' into ('en', 'king')."""
+    return vocab_index.split_key(key)
+
+
+# Row language id of vocabulary rows whose language is not in
+# SUPPORTED_LANGUAGES (a store built under another config).
+UNSUPPORTED_LANGUAGE_ID = 255
+
+
+def get_row_language_ids_pytorch():
+    """
+    Returns a (N,) uint8 tensor with the index into SUPPORTED_LANGUAGES of every
+    vocabulary row (UNSUPPORTED_LANGUAGE_ID for other languages). Mapped from
+    the vocabulary's own language ids once and cached.
+    """
+    import torch
+
+    global _row_language_ids
+    if word_to_idx is None:
+        return None
+    if _row_language_ids is None or _row_language_ids[0] is not word_to_idx:
+        to_supported = np.array(
+            [
+                (
+                    SUPPORTED_LANGUAGES.index(lang)
+                    if lang in SUPPORTED_LANGUAGES
+                    else UNSUPPORTED_LANGUAGE_ID
+                )
+                for lang in word_to_idx.languages
+            ],
+            dtype=np.uint8,
+        )
+        row_langs = to_supported[np.asarray(word_to_idx.row_langs)]
+        _row_language_ids = (word_to_idx, torch.from_numpy(row_langs))
+    return _row_language_ids[1]
+
+
+def load_ann_index_pytorch():
+    """Loads (memory-maps) the saved EN/KO ANN index if it exists."""
+    global ann_index_pt
+    if not ann_index.index_exists(ANN_INDEX_PREFIX):
+        return False
+    ok, _ = _check_artifact(
+        "EN/KO ANN index", ANN_INDEX_PREFIX, ann_index.index_paths(ANN_INDEX_PREFIX)
+    )
+    if not ok:
+        return False
+    try:
+        index = ann_index.IVFPQIndex(ANN_INDEX_PREFIX)
+    except Exception as e:
+        logger.error(f"Error loading EN/KO ANN index: {e}")
+        return False
+    if word_to_idx is not None and len(index) != len(word_to_idx):
+        logger.warning(
+            f"EN/KO ANN index has {len(index)} rows but vocabulary has {len(word_to_idx)}. Ignoring it."
+        )
+        return False
+    ann_index_pt = index
+    logger.info(f"EN/KO ANN index loaded: {len(index)} rows, {index.nlist} lists.")
+    return True
+
+
+def _search_languages(languages):
+    """
+    The languages a nearest-neighbour search may return: `languages`, or all
+    rows (None), unless the vocabulary has rows of unsupported languages,
+    which are left out.
+    """
+    if (
+        languages is None
+        and word_to_idx is not None
+        and not set(word_to_idx.languages) <= set(SUPPORTED_LANGUAGES)
+    ):
+        return list(SUPPORTED_LANGUAGES)
+    return languages
+
+
+def _exact_scores(query_normalized, rows):
+    """Exact cosine similarity between a normalised query and the given rows."""
+    import torch
+
+    row_tensor = torch.nn.functional.normalize(
+        gather_embedding_rows_pytorch(rows), dim=1
+    )
+    return (row_tensor @ query_normalized).cpu().numpy()
+
+
+def exact_top_k_pytorch(
+    query_vectors, k=10, languages=None, exclude_rows=None, block_rows=4096
+):
+    """
+    Exact cosine top-k over the whole embeddings_tensor for a batch of queries.
+    The matrix is scanned in cache-sized blocks; each block's scores are scaled
+    by the cached inverse row norms and merged into a running (Q, k) top-k, so
+    memory stays at O(Q * block_rows) however large the vocabulary is.
+    `exclude_rows` is an optional (Q,) sequence of rows to skip per query (-1 for
+    none). Returns (rows, scores) as (Q, k) tensors; missing slots have -inf.
+    """
+    import torch
+
+    inverse_norms = get_inverse_row_norms_pytorch()
+    if inverse_norms is None:
+        return None
+    matrix_device = embeddings_tensor.device
+    queries = torch.nn.functional.normalize(
+        torch.as_tensor(query_vectors, dtype=torch.float32, device=matrix_device),
+        dim=-1,
+    )
+    if queries.ndim == 1:
+        queries = queries.unsqueeze(0)
+    num_queries = queries.shape[0]
+    num_rows = embeddings_tensor.shape[0]
+    k = min(k, num_rows)
+
+    allowed_lang_ids = None
+    languages = _search_languages(languages)
+    if languages is not None:
+        row_langs = get_row_language_ids_pytorch().to(matrix_device)
+        allowed_lang_ids = torch.tensor(
+            [SUPPORTED_LANGUAGES.index(lang) for lang in languages],
+            dtype=row_langs.dtype,
+            device=matrix_device,
+        )
+    if exclude_rows is not None:
+        exclude_rows = torch.as_tensor(
+            exclude_rows, dtype=torch.long, device=matrix_device
+        )
+
+    best_scores = torch.full(
+        (num_queries, k), float("-inf"), dtype=torch.float32, device=matrix_device
+    )
+    best_rows = torch.full((num_queries, k), -1, dtype=torch.long, device=matrix_device)
+    for start in range(0, num_rows, block_rows):
+        end = min(start + block_rows, num_rows)
+        block_inverse_norms = inverse_norms[start:end]
+        scores = (queries @ embedding_block_pytorch(start, end).T) * block_inverse_norms
+
+        invalid = block_inverse_norms == 0  # zero vectors are treated as OOV
+        if allowed_lang_ids is not None:
+            invalid = invalid | ~torch.isin(row_langs[start:end], allowed_lang_ids)
+        scores.masked_fill_(invalid.unsqueeze(0), float("-inf"))
+        if exclude_rows is not None:
+            in_block = (exclude_rows >= start) & (exclude_rows < end)
+            query_ids = torch.nonzero(in_block).squeeze(1)
+            scores[query_ids, exclude_rows[query_ids] - start] = float("-inf")
+
+        block_k = min(k, end - start)
+        block_scores, block_top = torch.topk(scores, block_k, dim=1)
+        merged_scores = torch.cat([best_scores, block_scores], dim=1)
+        merged_rows = torch.cat([best_rows, block_top + start], dim=1)
+        best_scores, merged_top = torch.topk(merged_scores, k, dim=1)
+        best_rows = torch.gather(merged_rows, 1, merged_top)
+    return best_rows, best_scores
+
+
+def get_nearest_words_exact_pytorch(words, langs, k=10, languages=None):
+    """
+    Batched exact nearest neighbours: one scan of the matrix serves every query.
+    Returns, per word, a list of (key, cosine similarity) ([] if OOV), or None if
+    the embeddings are unavailable.
+    """
+    import torch
+
+    indices = lookup_word_indices_pytorch(words, langs)
+    found = [i for i, idx in enumerate(indices) if idx >= 0]
+    results = [[] for _ in words]
+    if not found:
+        return results
+    if embeddings_tensor is None:
+        return None
+
+    query_rows = [indices[i] for i in found]
+    queries = gather_embedding_rows_pytorch(query_rows)
+    top_k = exact_top_k_pytorch(
+        queries, k=k, languages=languages, exclude_rows=query_rows
+    )
+    if top_k is None:
+        return None
+    rows, scores = top_k
+    nonzero = torch.any(queries != 0, dim=1).tolist()
+    for pos, i in enumerate(found):
+        if not nonzero[pos]:
+            continue
+        results[i] = [
+            (idx_to_word_list[row], score)
+            for row, score in zip(rows[pos].tolist(), scores[pos].tolist())
+            if row >= 0 and score != float("-inf")
+        ]
+    return results
+
+
+def get_nearest_words_pytorch(
+    word, lang, k=10, languages=None, nprobe=ANN_DEFAULT_NPROBE, exact=False
+):
+    """
+    Returns the k nearest vocabulary entries to a word as a list of
+    (key, cosine similarity). Uses the ANN index with exact re-ranking, or the
+    exact block scan if `exact` is set or no index is loaded.
+    Returns [] if the word is OOV and None if the embeddings are unavailable.
+    """
+    import torch
+
+    if exact or ann_index_pt is None:
+        results = get_nearest_words_exact_pytorch(
+            [word], [lang], k=k, languages=languages
+        )
+        return None if results is None else results[0]
+
+    idx = lookup_word_indices_pytorch([word], [lang])[0]
+    if idx < 0:
+        return []
+    if embeddings_tensor is None:
+        return None
+
+    query = torch.nn.functional.normalize(
+        gather_embedding_rows_pytorch([idx])[0], dim=0
+    )
+    if not torch.any(query):
+        return []
+    rows, scores = ann_index_pt.search(
+        query.cpu().numpy(),
+        k=k,
+        nprobe=nprobe,
+        languages=_search_languages(languages),
+        exclude_rows=np.array([idx]),
+        row_mask=get_nonzero_row_mask(),
+        rerank_fn=lambda candidate_rows: _exact_scores(query, candidate_rows),
+    )
+    return [
+        (idx_to_word_list[row], float(score))
+        for row, score in zip(rows.tolist(), scores.tolist())
+    ]
+
+
+# --- Pivot catalogue ---
+
+
+def load_pivot_catalogue_pytorch():
+    """Loads (memory-maps) the saved EN/KO pivot catalogue if it exists."""
+    global pivot_catalogue_pt
+    if not pivot_catalogue.catalogue_exists(PIVOT_CATALOGUE_PREFIX):
+        return False
+    ok, _ = _check_artifact(
+        "EN/KO pivot catalogue",
+        PIVOT_CATALOGUE_PREFIX,
+        pivot_catalogue.catalogue_paths(PIVOT_CATALOGUE_PREFIX),
+    )
+    if not ok:
+        return False
+    try:
+        catalogue = pivot_catalogue.load_catalogue(PIVOT_CATALOGUE_PREFIX)
+    except Exception as e:
+        logger.error(f"Error loading EN/KO pivot catalogue: {e}")
+        return False
+    if word_to_idx is not None and catalogue.vocabulary_size != len(word_to_idx):
+        logger.warning(
+            f"EN/KO pivot catalogue was built for {catalogue.vocabulary_size} rows but vocabulary has {len(word_to_idx)}. Ignoring it."
+        )
+        return False
+    pivot_catalogue_pt = catalogue
+    logger.info(f"EN/KO pivot catalogue loaded: {len(catalogue)} pivots.")
+    return True
+
+
+_pivot_random = random.Random()
+
+
+def get_pivot_pytorch(word=None, lang=None, k=None):
+    """
+    A pivot from the catalogue: the entry of `word` (in `lang`) if given,
+    otherwise a random pivot (of `lang` if given). Returns {"word", "lang",
+    "coordinates", "neighbors": [(key, similarity)], "similarity_quantiles"},
+    or None if there is no such pivot.
+    """
+    if pivot_catalogue_pt is None or idx_to_word_list is None:
+        return None
+    if word is None:
+        position = pivot_catalogue_pt.random_position(_pivot_random, lang)
+    else:
+        row = _lookup_word_index(word.lower(), lang)
+        position = -1 if row < 0 else pivot_catalogue_pt.position_of(row, lang)
+    if position < 0:
         return None
 
+    entry = pivot_catalogue_pt.entry(position, k)
+    return {
+        "word": split_conceptnet_key(idx_to_word_list[entry["row"]])[1],
+        "lang": entry["lang"],
+        "coordinates": entry["coords"],
+        "neighbors": [
+            (idx_to_word_list[row], score)
+            for row, score in zip(entry["neighbour_rows"], entry["neighbour_scores"])
+            if row >= 0
+        ],
+        "similarity_quantiles": dict(
+            zip(pivot_catalogue_pt.quantile_levels, entry["quantiles"])
+        ),
+    }
+
+
+# --- Precomputed 2D coordinate table ---
+
+
+def _open_coordinate_table():
+    """The coordinate table on disk, memory-mapped and checked, or None."""
+    if not os.path.exists(COORDINATES_TABLE_PATH):
+        return None
+    ok, entry = _check_artifact(
+        "EN/KO coordinate table",
+        COORDINATES_TABLE_PATH,
+        {"table": COORDINATES_TABLE_PATH},
+    )
+    if not ok:
+        return None
+    if (
+        entry is None
+        and os.path.exists(PCA_PROJECTOR_PATH)
+        and os.path.getmtime(COORDINATES_TABLE_PATH)
+        < os.path.getmtime(PCA_PROJECTOR_PATH)
+    ):
+        logger.warning(
+            "EN/KO coordinate table is older than the PCA model. Ignoring it."
+        )
+        return None
+    try:
+        table = np.load(COORDINATES_TABLE_PATH, mmap_mode="r")
+    except Exception as e:
+        logger.error(f"Error loading EN/KO coordinate table: {e}")
+        return None
+    if table.ndim != 2 or table.shape[1] != 2:
+        logger.warning(
+            f"EN/KO coordinate table has unexpected shape {table.shape}. Ignoring it."
+        )
+        return None
+    if word_to_idx is not None and table.shape[0] != len(word_to_idx):
+        logger.warning(
+            f"EN/KO coordinate table has {table.shape[0]} rows but vocabulary has {len(word_to_idx)}. Ignoring it."
+        )
+        return None
+    return table
 
-# --- Old function definitions kept for reference during refactor ---
-# def load_numberbatch_model(): (old version)
-#     # Load ConceptNet Numberbatch model (e.g., using gensim)
-#     pass
 
-# def get_word_vector(word, model): (old version)
-#     # Get 600D vector for a word
-#     pass
+def load_coordinate_table_pytorch():
+    """
+    Memory-maps the precomputed coordinate table. The table is ignored if the
+    manifest says it was projected with another PCA model or store, or its row
+    count doesn't match the vocabulary. Unrecorded tables fall back to
+    comparing mtimes with the PCA model.
+    The new table is checked before it replaces the mapped one, so requests
+    keep being served from the old table during a reload. If it is rejected,
+    the old table stays unless the vocabulary or PCA model changed since it
+    was mapped.
+    """
+    global coordinates_table, _coordinate_table_versions
+    table = _open_coordinate_table()
+    if table is None:
+        if _coordinate_table_versions != (vocabulary_version, pca_version):
+            coordinates_table = None
+        return False
+    coordinates_table = table
+    _coordinate_table_versions = (vocabulary_version, pca_version)
+    logger.info(f"EN/KO coordinate table mapped: {table.shape[0]} rows.")
+    return True
 
-# def train_pca(data, n_components=2): (old version)
-#     # Train PCA model
-#     pass
 
-# def transform_pca(vector, pca_model): (old version)
-#     # Transform vector to 2D using PCA
-#     pass
+def load_numberbatch_vocabulary_pytorch():
+    """
+    Maps only the EN/KO vocabulary (word_to_idx / idx_to_word_list), for serving
+    from the coordinate table without the 300-d matrix.
+    """
+    global word_to_idx, idx_to_word_list
+    if word_to_idx is not None and idx_to_word_list is not None:
+        return True
+    if not embedding_store.store_exists(EMBEDDING_STORE_PREFIX):
+        return load_numberbatch_pytorch()
+    ok, entry = _check_embedding_store()
+    if not ok:
+        return False
+    try:
+        vocabulary = embedding_store.load_vocabulary(EMBEDDING_STORE_PREFIX)
+    except Exception as e:
+        logger.error(f"Error loading EN/KO vocabulary: {e}")
+        return False
+    word_to_idx = vocabulary
+    idx_to_word_list = vocabulary.key_list()
+    _set_store_hashes(entry)
+    _bump_vocabulary_version()
+    logger.info(f"EN/KO vocabulary mapped: {len(vocabulary)} keys.")
+    return True
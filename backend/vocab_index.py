@@ -0,0 +1,225 @@
+# Compact, memory-mapped index over the EN/KO Numberbatch vocabulary.
+#
+# A key like '/c/en/king' is stored as its term ('king') plus a one-byte
+# language id, so the '/c/<lang>/' part is not repeated for every row. Terms
+# live in one contiguous UTF-8 buffer addressed by an offsets array. Lookups
+# binary-search a permutation of the rows sorted by (language, term bytes);
+# each language is a contiguous range of that permutation, so a (term, lang)
+# lookup is O(log n) and touches only a few pages of the mapped files.
+#
+# The index replaces the pickled word_to_idx dict and idx_to_word_list: it is
+# a Mapping of full '/c/lang/term' keys to rows and its key_list() is a
+# row-ordered sequence of those keys.
+
+import mmap
+import os
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+KEY_PREFIX = "/c/"
+
+
+def index_paths(prefix):
+    """Returns the file paths that make up a vocabulary index."""
+    return {
+        "terms": f"{prefix}_vocab_terms.bin",
+        "term_offsets": f"{prefix}_vocab_term_offsets.npy",
+        "row_langs": f"{prefix}_vocab_langs.npy",
+        "languages": f"{prefix}_vocab_languages.npy",
+        "order": f"{prefix}_vocab_term_order.npy",
+        "lang_bounds": f"{prefix}_vocab_lang_bounds.npy",
+    }
+
+
+def index_exists(prefix):
+    """True if every file of the index is present on disk."""
+    return all(os.path.exists(path) for path in index_paths(prefix).values())
+
+
+def split_key(key):
+    """Splits '/c/en/king' into ('en', 'king'). Raises ValueError for other keys."""
+    if not key.startswith(KEY_PREFIX):
+        raise ValueError(f"Not a ConceptNet key: '{key}'.")
+    lang, sep, term = key[len(KEY_PREFIX) :].partition("/")
+    if not sep or not lang:
+        raise ValueError(f"Not a ConceptNet key: '{key}'.")
+    return lang, term
+
+
+def read_frequency_list(path):
+    """
+    Words of a frequency list, most frequent first: one entry per line, the
+    word in the first column (extra columns such as counts are ignored).
+    """
+    words = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.split()
+            if fields:
+                words.append(fields[0].lower())
+    return words
+
+
+def save_index(prefix, keys, languages=None):
+    """
+    Writes the index for the row-ordered '/c/lang/term' `keys`. `languages`
+    fixes the language ids (their order); by default the sorted set of the
+    languages found in `keys` is used.
+    """
+    paths = index_paths(prefix)
+    split = [split_key(key) for key in keys]
+    if languages is None:
+        languages = sorted({lang for lang, _ in split})
+    languages = list(languages)
+    if len(languages) > 255:
+        raise ValueError(f"Too many languages for a uint8 id: {len(languages)}.")
+    lang_ids = {lang: i for i, lang in enumerate(languages)}
+
+    row_langs = np.empty(len(split), dtype=np.uint8)
+    encoded = []
+    for row, (lang, term) in enumerate(split):
+        if lang not in lang_ids:
+            raise ValueError(f"Key language '{lang}' is not in {languages}.")
+        row_langs[row] = lang_ids[lang]
+        encoded.append(term.encode("utf-8"))
+
+    total_bytes = sum(len(b) for b in encoded)
+    offsets = np.zeros(
+        len(encoded) + 1, dtype=np.uint32 if total_bytes < 2**32 else np.int64
+    )
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    lang_list = row_langs.tolist()
+    order = np.array(
+        sorted(range(len(encoded)), key=lambda row: (lang_list[row], encoded[row])),
+        dtype=np.int32,
+    )
+    lang_bounds = np.searchsorted(
+        row_langs[order], np.arange(len(languages) + 1), side="left"
+    ).astype(np.int64)
+
+    with open(paths["terms"], "wb") as f_terms:
+        f_terms.write(b"".join(encoded))
+    np.save(paths["term_offsets"], offsets)
+    np.save(paths["row_langs"], row_langs)
+    np.save(paths["languages"], np.asarray(languages, dtype=str))
+    np.save(paths["order"], order)
+    np.save(paths["lang_bounds"], lang_bounds)
+
+
+class VocabularyIndex(Mapping):
+    """
+    Read-only '/c/lang/term' -> row mapping over the memory-mapped index files.
+    Behaves like the old pickled word_to_idx dict (`in`, `[]`, `get`, `len`);
+    lookup(term, lang) skips building and parsing the full key.
+    """
+
+    def __init__(self, prefix):
+        paths = index_paths(prefix)
+        self._offsets = np.load(paths["term_offsets"], mmap_mode="r")
+        self._order = np.load(paths["order"], mmap_mode="r")
+        self.row_langs = np.load(paths["row_langs"], mmap_mode="r")
+        self.languages = [str(lang) for lang in np.load(paths["languages"])]
+        self._lang_bounds = np.load(paths["lang_bounds"])
+        self._lang_ids = {lang: i for i, lang in enumerate(self.languages)}
+        with open(paths["terms"], "rb") as f_terms:
+            if os.fstat(f_terms.fileno()).st_size > 0:
+                self._terms = mmap.mmap(f_terms.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._terms = b""
+        if len(self.row_langs) != len(self):
+            raise ValueError(
+                f"Vocabulary index is inconsistent: {len(self)} terms, {len(self.row_langs)} languages."
+            )
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _term_bytes(self, row):
+        return self._terms[int(self._offsets[row]) : int(self._offsets[row + 1])]
+
+    def _check_row(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"Vocabulary index {row} out of range.")
+        return row
+
+    def term_at(self, row):
+        """Returns the term (key without '/c/lang/') stored for `row`."""
+        return self._term_bytes(self._check_row(row)).decode("utf-8")
+
+    def lang_at(self, row):
+        """Returns the language code of `row`."""
+        return self.languages[self.row_langs[self._check_row(row)]]
+
+    def key_at(self, row):
+        """Returns the full '/c/lang/term' key of `row`."""
+        row = self._check_row(row)
+        return f"{KEY_PREFIX}{self.languages[self.row_langs[row]]}/{self.term_at(row)}"
+
+    def lookup(self, term, lang):
+        """Binary search for `term` inside the `lang` range. Returns the row or -1."""
+        lang_id = self._lang_ids.get(lang)
+        if lang_id is None:
+            return -1
+        target = term.encode("utf-8")
+        lo = int(self._lang_bounds[lang_id])
+        hi = end = int(self._lang_bounds[lang_id + 1])
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_bytes(int(self._order[mid])) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < end:
+            row = int(self._order[lo])
+            if self._term_bytes(row) == target:
+                return row
+        return -1
+
+    def index_of(self, key):
+        """Row of a full '/c/lang/term' key, or -1."""
+        try:
+            lang, term = split_key(key)
+        except ValueError:
+            return -1
+        return self.lookup(term, lang)
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self.index_of(key) >= 0
+
+    def __getitem__(self, key):
+        row = self.index_of(key) if isinstance(key, str) else -1
+        if row < 0:
+            raise KeyError(key)
+        return row
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.key_at(row)
+
+    def key_list(self):
+        """Returns a list-like, row-ordered view of the keys (idx_to_word_list)."""
+        return KeyList(self)
+
+
+class KeyList(Sequence):
+    """Row-ordered view of a VocabularyIndex, standing in for idx_to_word_list."""
+
+    def __init__(self, vocabulary):
+        self._vocabulary = vocabulary
+
+    def __len__(self):
+        return len(self._vocabulary)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self._vocabulary.key_at(i) for i in range(*row.indices(len(self)))]
+        return self._vocabulary.key_at(row)
+
+
+def load_index(prefix):
+    """Opens the vocabulary index written by save_index."""
+    return VocabularyIndex(prefix)
@@ -0,0 +1,125 @@
+# Pruning of the EN/KO vocabulary into a smaller serving artifact set.
+#
+# The full store keeps every /c/en/ and /c/ko/ row, including long phrases and
+# rare forms nobody types in the game. Pruning keeps, per language, the rows
+# that pass a token-count filter (phrases are "_"-joined) and a character
+# class filter on every token, then cuts them to a word budget, in
+# frequency-list order when a list is available and in vocabulary order
+# otherwise. Zero vectors (treated as OOV anyway) are dropped. The kept rows
+# are copied, in their original order, into a new embedding store with the
+# same dtype, and the coordinate table is sliced to match, so the pruned set
+# places every word exactly where the full set does.
+
+import json
+import re
+
+import numpy as np
+
+import embedding_store
+import vocab_index
+
+
+def token_count(term):
+    """Number of "_"-joined tokens of a ConceptNet term."""
+    return term.count("_") + 1
+
+
+def select_rows(
+    vocabulary,
+    lang,
+    max_tokens,
+    token_pattern,
+    budget,
+    frequency_words=None,
+    usable=None,
+):
+    """
+    Rows of `lang` to keep, sorted. Terms of at most `max_tokens` tokens,
+    each matching `token_pattern` (a regex for one token), are ranked by
+    their position in `frequency_words` (unlisted terms after the listed ones,
+    in vocabulary order) and the first `budget` are kept. `usable` is an
+    optional boolean mask over rows (e.g. non-zero vectors).
+    """
+    pattern = re.compile(token_pattern)
+    lang_id = vocabulary.languages.index(lang)
+    rows = np.flatnonzero(np.asarray(vocabulary.row_langs) == lang_id)
+    if usable is not None:
+        rows = rows[usable[rows]]
+
+    kept = []
+    for row in rows.tolist():
+        term = vocabulary.term_at(row)
+        if token_count(term) > max_tokens:
+            continue
+        if all(pattern.fullmatch(token) for token in term.split("_")):
+            kept.append(row)
+
+    if frequency_words is not None:
+        ranks = {}
+        for rank, word in enumerate(frequency_words):
+            ranks.setdefault(word, rank)
+        unlisted = len(ranks)
+        # sorted() is stable, so unlisted terms keep their vocabulary order.
+        kept = sorted(
+            kept, key=lambda row: ranks.get(vocabulary.term_at(row), unlisted)
+        )
+    return sorted(kept[:budget])
+
+
+def usable_rows(matrix, chunk_rows=65536):
+    """Boolean mask of the rows of a stored matrix that are not all zero."""
+    usable = np.empty(matrix.shape[0], dtype=bool)
+    for start in range(0, matrix.shape[0], chunk_rows):
+        usable[start : start + chunk_rows] = np.any(
+            matrix[start : start + chunk_rows] != 0, axis=1
+        )
+    return usable
+
+
+def write_pruned_store(source_prefix, target_prefix, rows, chunk_rows=65536):
+    """
+    Copies the given (sorted) rows of an embedding store, in the stored
+    dtype, with their int8 scales and keys, into a new store.
+    """
+    matrix, vocabulary = embedding_store.load_store(source_prefix)
+    scales = embedding_store.load_row_scales(source_prefix, matrix)
+    rows = np.asarray(rows, dtype=np.int64)
+    out = embedding_store.create_embeddings_file(
+        target_prefix, len(rows), matrix.shape[1], matrix.dtype.name
+    )
+    for start in range(0, len(rows), chunk_rows):
+        block = rows[start : start + chunk_rows]
+        out[start : start + len(block)] = matrix[block]
+    out.flush()
+    del out
+    embedding_store.save_scales(
+        target_prefix, None if scales is None else np.asarray(scales)[rows]
+    )
+    key_list = vocabulary.key_list()
+    vocab_index.save_index(
+        target_prefix, [key_list[row] for row in rows.tolist()], vocabulary.languages
+    )
+
+
+def write_pruned_table(source_path, target_path, rows):
+    """Slices a per-row .npy table (e.g. the coordinate table) to the given rows."""
+    table = np.load(source_path, mmap_mode="r")
+    np.save(target_path, np.asarray(table[np.asarray(rows, dtype=np.int64)]))
+
+
+def read_request_words(path):
+    """
+    Words of a sample request log: one word per line, or JSON lines with a
+    "words" list (the /word-to-coordinates body).
+    """
+    words = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                words.extend(json.loads(line).get("words", []))
+            else:
+                words.append(line)
+    return words